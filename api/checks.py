@@ -0,0 +1,34 @@
+from django.conf import settings
+from django.core.checks import Error, Tags, register
+
+from .services.caching import is_shared_cache
+
+
+@register(Tags.caches)
+def check_shared_cache(app_configs, **kwargs):
+    """
+    The default cache must be shared by every web and run_jobs process:
+    cache versions, StampedeCache locks and refreshes, cached API keys and
+    the rate limiter are written by one process and read by the others.
+    """
+    if is_shared_cache():
+        return []
+    return [Error(
+        "The default cache is per-process, so cache invalidations, refreshes and locks "
+        "do not reach the other web and job worker processes.",
+        hint="Use a shared backend such as django_redis.cache.RedisCache in CACHES.",
+        id='api.E001',
+    )]
+
+
+@register(Tags.security)
+def check_shared_rate_limiter(app_configs, **kwargs):
+    """Outside DEBUG the API key rate limits must be counted in Redis, not per process"""
+    if settings.DEBUG or getattr(settings, 'RATE_LIMIT_REDIS_URL', None):
+        return []
+    return [Error(
+        "RATE_LIMIT_REDIS_URL is not set, so every worker counts API key requests separately "
+        "and allows the full tier limit on its own.",
+        hint="Point RATE_LIMIT_REDIS_URL at the Redis server shared by the web workers.",
+        id='api.E002',
+    )]
@@ -0,0 +1,85 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from api.models import Lodging
+from api.services.geo import GeoService
+
+# Rough bounding box of Nepal
+NEPAL_LAT = (26.3, 30.5)
+NEPAL_LNG = (80.0, 88.2)
+
+
+class Command(BaseCommand):
+    help = 'Benchmark nearby lodging search against synthetic lodgings (rolled back afterwards)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=100000, help='Number of synthetic lodgings')
+        parser.add_argument('--queries', type=int, default=200, help='Number of nearby queries to time')
+        parser.add_argument('--radius-km', type=float, default=10, help='Search radius')
+        parser.add_argument('--limit', type=int, default=50, help='Results per query')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+
+        with transaction.atomic():
+            self.stdout.write(f"Seeding {options['count']} synthetic lodgings...")
+            Lodging.objects.bulk_create(
+                (
+                    Lodging(
+                        name=f"Synthetic lodge {i}",
+                        type='teahouse',
+                        place='Synthetic',
+                        latitude=round(rng.uniform(*NEPAL_LAT), 6),
+                        longitude=round(rng.uniform(*NEPAL_LNG), 6),
+                        min_price=1000,
+                        max_price=5000,
+                    )
+                    for i in range(options['count'])
+                ),
+                batch_size=5000
+            )
+            with connection.cursor() as cursor:
+                cursor.execute(f"ANALYZE {Lodging._meta.db_table}")
+
+            points = [
+                (rng.uniform(*NEPAL_LAT), rng.uniform(*NEPAL_LNG))
+                for _ in range(options['queries'])
+            ]
+
+            indexed = self._time(points, lambda lat, lng: GeoService.nearby(
+                Lodging.objects.all(), lat, lng, options['radius_km']
+            )[:options['limit']])
+
+            # Same distance filter without the bounding-box prefilter
+            full_scan = self._time(points[:20], lambda lat, lng: Lodging.objects.annotate(
+                distance_km=GeoService.distance_expression(lat, lng)
+            ).filter(distance_km__lte=options['radius_km']).order_by('distance_km', 'pk')[:options['limit']])
+
+            self._report('bounding box + haversine', indexed)
+            self._report('haversine full scan', full_scan)
+            if statistics.median(indexed):
+                self.stdout.write(self.style.SUCCESS(
+                    f"Median speedup: {statistics.median(full_scan) / statistics.median(indexed):.1f}x"
+                ))
+
+            transaction.set_rollback(True)
+
+    @staticmethod
+    def _time(points, make_query):
+        timings = []
+        for lat, lng in points:
+            started = time.perf_counter()
+            list(make_query(lat, lng))
+            timings.append((time.perf_counter() - started) * 1000)
+        return timings
+
+    def _report(self, label, timings):
+        timings = sorted(timings)
+        p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+        self.stdout.write(
+            f"{label}: {len(timings)} queries, median {statistics.median(timings):.2f}ms, p95 {p95:.2f}ms"
+        )
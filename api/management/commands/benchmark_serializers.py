@@ -0,0 +1,160 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test import RequestFactory
+from rest_framework.renderers import JSONRenderer
+from api.models import Destination, DestinationPhoto, Lodging, LodgingPhoto, Room
+from api.renderers import FastJSONRenderer
+from api.views import DestinationViewSet, LodgingViewSet
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed synthetic destinations and lodgings (rolled back afterwards), check that the '
+        'fast list serializers render byte-identical JSON to the ModelSerializers and time both'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=5000, help='Synthetic rows per model')
+        parser.add_argument('--page-size', type=int, default=100, help='Rows serialized per timed page')
+        parser.add_argument('--repeat', type=int, default=20, help='Timed runs per path')
+        parser.add_argument('--host', default='localhost', help='Host used for absolute photo URLs')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        request = RequestFactory(SERVER_NAME=options['host']).get('/')
+        mismatches = 0
+
+        with transaction.atomic():
+            self.stdout.write(f"Seeding {options['count']} synthetic destinations and lodgings...")
+            self._seed(rng, options['count'])
+
+            for viewset in (DestinationViewSet, LodgingViewSet):
+                label = viewset.queryset.model._meta.verbose_name_plural
+                queryset = viewset.queryset.defer('search_vector').order_by(*viewset.ordering)
+
+                # Parity over every row, in pages
+                for offset in range(0, queryset.count(), options['page_size']):
+                    page = queryset[offset:offset + options['page_size']]
+                    expected = self._serializer_path(viewset, page, request)
+                    actual = self._fast_path(viewset, page, request)
+                    if expected != actual:
+                        mismatches += 1
+                        self.stdout.write(self.style.ERROR(
+                            f"{label} rows {offset}-{offset + options['page_size']} differ:\n"
+                            f"  serializer: {expected[:300]!r}\n  fast:       {actual[:300]!r}"
+                        ))
+
+                page = queryset[:options['page_size']]
+                slow = self._time(options['repeat'], lambda: self._serializer_path(viewset, page, request))
+                fast = self._time(options['repeat'], lambda: self._fast_path(viewset, page, request))
+                self._report(f"{label} ModelSerializer + JSONRenderer", slow)
+                self._report(f"{label} fast serializer + FastJSONRenderer", fast)
+                if statistics.median(fast):
+                    self.stdout.write(self.style.SUCCESS(
+                        f"{label} median speedup: {statistics.median(slow) / statistics.median(fast):.1f}x"
+                    ))
+
+            transaction.set_rollback(True)
+
+        if mismatches:
+            raise CommandError(f"{mismatches} pages render differently on the fast path")
+        self.stdout.write(self.style.SUCCESS("Fast serializers render byte-identical output"))
+
+    @staticmethod
+    def _serializer_path(viewset, page, request):
+        rows = page.prefetch_related(*viewset.prefetch_related_fields)
+        data = viewset.serializer_class(rows, many=True, context={'request': request}).data
+        return JSONRenderer().render(data)
+
+    @staticmethod
+    def _fast_path(viewset, page, request):
+        serializer = viewset.fast_serializer_class(context={'request': request})
+        data = serializer.serialize(page.values(*serializer.get_columns()))
+        return FastJSONRenderer().render(data)
+
+    @staticmethod
+    def _time(repeat, run):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            run()
+            timings.append((time.perf_counter() - started) * 1000)
+        return timings
+
+    def _report(self, label, timings):
+        timings = sorted(timings)
+        p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+        self.stdout.write(
+            f"{label}: {len(timings)} pages, median {statistics.median(timings):.2f}ms, p95 {p95:.2f}ms"
+        )
+
+    @staticmethod
+    def _seed(rng, count):
+        """Seed rows covering the optional fields: missing coordinates, blank contacts, odd text"""
+        destinations = Destination.objects.bulk_create((
+            Destination(
+                id=f"synthetic-destination-{i}",
+                name=f"Synthetic destination {i}\u2028Sagarmāthā",
+                type=rng.choice(['city', 'trek', 'heritage', 'park']),
+                region=f"Region {rng.randrange(50)}",
+                description='Synthetic "destination"' if i % 3 else '',
+                difficulty=rng.choice(['easy', 'moderate', 'hard', None]),
+                duration=rng.choice([None, rng.randrange(1, 30)]),
+                max_elevation=rng.choice([None, round(rng.uniform(1000, 8848), 2)]),
+                min_elevation=rng.choice([None, round(rng.uniform(100, 1000), 2)]),
+                latitude=rng.choice([None, round(rng.uniform(26.3, 30.5), 6)]),
+                longitude=round(rng.uniform(80.0, 88.2), 6),
+                best_season=rng.choice([None, ['spring', 'autumn']]),
+                permits_required=['tims'] if i % 2 else None,
+                highlights=['views', 'monasteries'],
+            )
+            for i in range(count)
+        ), batch_size=5000)
+
+        DestinationPhoto.objects.bulk_create((
+            DestinationPhoto(
+                destination=destination,
+                photo=f"destinations/synthetic-{i}-{n}.jpg",
+                caption=f"View {n}",
+                is_primary=n == 0,
+            )
+            for i, destination in enumerate(destinations)
+            for n in range(i % 3)
+        ), batch_size=5000)
+
+        lodgings = Lodging.objects.bulk_create((
+            Lodging(
+                name=f"Synthetic lodge {i}",
+                type=rng.choice(['hotel', 'guesthouse', 'teahouse', 'lodge']),
+                destination=rng.choice([None, destinations[rng.randrange(count)]]),
+                place=f"Place {rng.randrange(100)}",
+                latitude=round(rng.uniform(26.3, 30.5), 6),
+                longitude=round(rng.uniform(80.0, 88.2), 6),
+                phone=rng.choice(['', '+977-1-4000000']),
+                email=rng.choice(['', f"lodge{i}@example.com"]),
+                website=rng.choice(['', f"https://lodge{i}.example.com"]),
+                min_price=1000,
+                max_price=rng.randrange(2000, 20000),
+                rating=rng.choice([None, round(rng.uniform(0, 5), 1)]),
+                amenities=rng.choice([None, ['wifi', 'hot shower']]),
+                availability=rng.random() < 0.8,
+            )
+            for i in range(count)
+        ), batch_size=5000)
+
+        Room.objects.bulk_create((
+            Room(lodging=lodging, room_type=f"Room {n}", price=1500 + n * 500, amenities=['heater'] if n else None)
+            for i, lodging in enumerate(lodgings)
+            for n in range(i % 4)
+        ), batch_size=5000)
+
+        LodgingPhoto.objects.bulk_create((
+            LodgingPhoto(lodging=lodging, photo=f"lodgings/synthetic-{i}.jpg", caption='')
+            for i, lodging in enumerate(lodgings)
+            if i % 2
+        ), batch_size=5000)
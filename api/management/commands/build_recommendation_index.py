@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from api.services.recommendations import RecommendationService
+
+class Command(BaseCommand):
+    help = 'Rebuild the destination similarity index used for recommendations'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top-k', type=int, default=None,
+                            help='Number of neighbours to keep per destination')
+
+    def handle(self, *args, **options):
+        self.stdout.write('Building destination similarity index...')
+        index = RecommendationService.rebuild_similarity_index(top_k=options['top_k'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Indexed {len(index['ids'])} destinations"
+        ))
@@ -0,0 +1,43 @@
+import uuid
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test import Client
+from django.utils import timezone
+from api.models import Destination
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed a destination matching a search term by name and a newer one matching it only by '
+        'description (rolled back afterwards), and fail unless ?search= lists the name match first'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='localhost', help='Host header (must be in ALLOWED_HOSTS)')
+
+    def handle(self, *args, **options):
+        term = f"rankcheck{uuid.uuid4().hex[:8]}"
+
+        with transaction.atomic():
+            best = Destination.objects.create(
+                name=f"{term} Lake", type='park', region='Synthetic', description='Ranking check'
+            )
+            weaker = Destination.objects.create(
+                name='Ranking check', type='park', region='Synthetic', description=f"Mentions {term} once"
+            )
+            # The better match is older, so a -created_at ordering would list it last
+            Destination.objects.filter(pk=best.pk).update(created_at=timezone.now() - timedelta(days=1))
+
+            client = Client(SERVER_NAME=options['host'])
+            response = client.get('/api/v1/destinations/', {'search': term})
+            transaction.set_rollback(True)
+
+        if response.status_code != 200:
+            raise CommandError(f"Search request failed with {response.status_code}: {response.content[:300]!r}")
+        ids = [row['id'] for row in response.json()['results']]
+        self.stdout.write(f"?search={term} returned {ids}")
+        if ids != [str(best.pk), str(weaker.pk)]:
+            raise CommandError(f"Expected the name match {best.pk} before {weaker.pk}")
+        self.stdout.write(self.style.SUCCESS("Search results are ordered by relevance"))
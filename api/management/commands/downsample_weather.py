@@ -0,0 +1,21 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from api.services.weather_history import WeatherHistoryService
+
+
+class Command(BaseCommand):
+    help = 'Roll raw WeatherData readings up into hourly and daily WeatherRollup rows'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=2,
+                            help='Number of recent days (UTC) to recompute, today included')
+
+    def handle(self, *args, **options):
+        end = timezone.now()
+        start = end - timedelta(days=max(options['days'] - 1, 0))
+        counts = WeatherHistoryService.downsample(start, end)
+        self.stdout.write(self.style.SUCCESS(
+            f"Rolled up {counts['hour']} hourly and {counts['day']} daily weather buckets"
+        ))
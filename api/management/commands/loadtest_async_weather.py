@@ -0,0 +1,87 @@
+import asyncio
+import json
+import time
+import uuid
+from urllib.parse import parse_qs, urlsplit
+
+import httpx
+from django.core.asgi import get_asgi_application
+from django.core.management.base import BaseCommand, CommandError
+from django.test import override_settings
+from api.models import WeatherData
+
+
+class Command(BaseCommand):
+    help = (
+        'Serve concurrent /weather/latest/ cache misses through the ASGI application on a single '
+        'event loop against a deliberately slow fake weather API, and fail unless they overlap'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=50, help='Concurrent requests, each for a new location')
+        parser.add_argument('--delay', type=float, default=2.0, help='Seconds the fake weather API takes to answer')
+        parser.add_argument('--host', default='localhost', help='Host header (must be in ALLOWED_HOSTS)')
+
+    def handle(self, *args, **options):
+        asyncio.run(self._run(options))
+
+    async def _run(self, options):
+        delay = options['delay']
+        prefix = f"loadtest-{uuid.uuid4().hex[:8]}"
+        upstream = await asyncio.start_server(lambda reader, writer: self._serve_weather(reader, writer, delay), '127.0.0.1', 0)
+        port = upstream.sockets[0].getsockname()[1]
+
+        try:
+            with override_settings(WEATHER_API_BASE_URL=f"http://127.0.0.1:{port}"):
+                transport = httpx.ASGITransport(app=get_asgi_application())
+                async with httpx.AsyncClient(transport=transport, base_url=f"http://{options['host']}", timeout=None) as client:
+                    self.stdout.write(
+                        f"Sending {options['requests']} concurrent requests, the weather API answers in {delay}s..."
+                    )
+                    started = time.monotonic()
+                    responses = await asyncio.gather(*(
+                        client.get('/api/v1/weather/latest/', params={'location': f"{prefix}-{i}"})
+                        for i in range(options['requests'])
+                    ))
+                    elapsed = time.monotonic() - started
+        finally:
+            upstream.close()
+            await upstream.wait_closed()
+            await WeatherData.objects.filter(location__startswith=prefix).adelete()
+
+        failed = [response.status_code for response in responses if response.status_code != 200]
+        serial = options['requests'] * delay
+        self.stdout.write(
+            f"{len(responses) - len(failed)}/{len(responses)} OK in {elapsed:.2f}s "
+            f"({serial:.0f}s if served one at a time, {serial / elapsed:.1f} requests in flight on average)"
+        )
+        if failed:
+            raise CommandError(f"{len(failed)} requests failed: {sorted(set(failed))}")
+        # One worker overlapping every upstream wait finishes in about one delay
+        if elapsed > delay * 3:
+            raise CommandError("Slow upstream requests were not served concurrently")
+        self.stdout.write(self.style.SUCCESS("Slow upstream requests were served concurrently by one event loop"))
+
+    @staticmethod
+    async def _serve_weather(reader, writer, delay):
+        """Minimal stand-in for the weather API's /current.json"""
+        request_line = (await reader.readline()).decode()
+        while (await reader.readline()) not in (b'\r\n', b''):
+            pass
+        query = parse_qs(urlsplit(request_line.split(' ')[1]).query)
+        await asyncio.sleep(delay)
+
+        body = json.dumps({
+            'location': {'name': query.get('q', [''])[0], 'lat': 27.7172, 'lon': 85.324},
+            'current': {
+                'temp_c': 20, 'feelslike_c': 19, 'condition': {'text': 'Sunny'},
+                'wind_kph': 5, 'wind_dir': 'N', 'precip_mm': 0, 'humidity': 40,
+                'pressure_mb': 1013, 'vis_km': 10, 'uv': 5,
+            },
+        }).encode()
+        writer.write(
+            b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+            b"Content-Length: " + str(len(body)).encode() + b"\r\nConnection: close\r\n\r\n" + body
+        )
+        await writer.drain()
+        writer.close()
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+from api.services.weather_history import WeatherHistoryService
+
+
+class Command(BaseCommand):
+    help = (
+        'Create upcoming monthly WeatherData partitions and roll up, optionally archive, '
+        'and drop the partitions past the raw retention period'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--months-ahead', type=int, default=None,
+                            help='Months of future partitions to keep ready (default: WEATHER_PARTITIONS_AHEAD)')
+        parser.add_argument('--retention-months', type=int, default=None,
+                            help='Months of raw readings to keep (default: WEATHER_RAW_RETENTION_MONTHS)')
+        parser.add_argument('--archive-dir', default=None,
+                            help='Write expired partitions to CSV files in this directory before dropping them')
+        parser.add_argument('--no-expire', action='store_true', help='Only create partitions')
+
+    def handle(self, *args, **options):
+        created = WeatherHistoryService.ensure_partitions(options['months_ahead'])
+        for name in created:
+            self.stdout.write(f"  created {name}")
+
+        dropped = []
+        if not options['no_expire']:
+            dropped = WeatherHistoryService.expire_partitions(options['retention_months'], options['archive_dir'])
+            for name in dropped:
+                self.stdout.write(f"  dropped {name}")
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Created {len(created)} and dropped {len(dropped)} weather partitions'
+        ))
@@ -0,0 +1,73 @@
+import logging
+import os
+import socket
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, close_old_connections
+from api.services.jobs import JobService
+
+logger = logging.getLogger(__name__)
+
+# Seconds between checks for due periodic jobs and for jobs left running by a stopped worker
+MAINTENANCE_INTERVAL = 5
+
+
+class Command(BaseCommand):
+    help = (
+        'Run background jobs: claim and run due jobs, retry failed ones with backoff '
+        'and enqueue the periodic jobs of JOB_SCHEDULE. Run as many workers as needed.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--poll-interval', type=float, default=1.0,
+                            help='Seconds to sleep when no job is due')
+        parser.add_argument('--once', action='store_true',
+                            help='Run the jobs that are due now, then exit')
+        parser.add_argument('--no-schedule', action='store_true',
+                            help='Only run queued jobs, never enqueue periodic ones')
+
+    def handle(self, *args, **options):
+        worker = f"{socket.gethostname()}:{os.getpid()}"
+        self.stdout.write(f"Worker {worker} started")
+        processed = failed = 0
+        next_maintenance = 0
+
+        try:
+            while True:
+                close_old_connections()
+                try:
+                    if time.monotonic() >= next_maintenance:
+                        if not options['no_schedule']:
+                            for name in JobService.schedule_due():
+                                self.stdout.write(f"  scheduled {name}")
+                        JobService.requeue_stale()
+                        next_maintenance = time.monotonic() + MAINTENANCE_INTERVAL
+
+                    job = JobService.claim(worker)
+                    if job is None:
+                        if options['once']:
+                            break
+                        time.sleep(options['poll_interval'])
+                        continue
+
+                    started = time.monotonic()
+                    succeeded = JobService.run(job)
+                except DatabaseError as e:
+                    # e.g. the database restarted; a job left running is requeued once stale
+                    logger.exception(f"Worker {worker} hit a database error: {e}")
+                    time.sleep(options['poll_interval'])
+                    continue
+
+                processed += 1
+                line = f"  {job.task} #{job.pk} attempt {job.attempts}: {time.monotonic() - started:.2f}s"
+                if succeeded:
+                    self.stdout.write(line)
+                else:
+                    failed += 1
+                    outcome = 'will retry' if job.status == 'queued' else 'giving up'
+                    self.stdout.write(self.style.ERROR(f"{line} failed, {outcome}"))
+        except KeyboardInterrupt:
+            self.stdout.write('Stopping worker')
+
+        self.stdout.write(self.style.SUCCESS(f'Ran {processed} jobs, {failed} failed'))
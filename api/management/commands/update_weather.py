@@ -4,7 +4,32 @@ from api.services.weather import WeatherService
 class Command(BaseCommand):
     help = 'Update weather data for all tracked locations'
 
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=None,
+                            help='Maximum number of concurrent weather API requests')
+        parser.add_argument('--rate-limit', type=float, default=None,
+                            help='Maximum weather API requests per second per host')
+
     def handle(self, *args, **options):
         self.stdout.write('Updating weather data...')
-        WeatherService.update_all_locations()
-        self.stdout.write(self.style.SUCCESS('Weather data updated successfully'))
\ No newline at end of file
+        results = WeatherService.update_all_locations(
+            max_workers=options['concurrency'],
+            requests_per_second=options['rate_limit'],
+        )
+
+        failures = [result for result in results if result['error']]
+        for result in results:
+            latency = f"{result['latency'] * 1000:.0f}ms" if result['latency'] is not None else '-'
+            line = f"  {result['location']}: {latency}"
+            if result['error']:
+                self.stdout.write(self.style.ERROR(f"{line} failed ({result['error']})"))
+            else:
+                self.stdout.write(line)
+
+        if failures:
+            self.stdout.write(self.style.WARNING(
+                f"Updated {len(results) - len(failures)} of {len(results)} locations, "
+                f"{len(failures)} failed"
+            ))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'Weather data updated successfully for {len(results)} locations'))
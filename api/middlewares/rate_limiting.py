@@ -1,10 +1,131 @@
+import logging
+import math
+import threading
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
 from django.http import JsonResponse
-from django.core.cache import cache
-from django.utils import timezone
-from api.models import APIKey  # Assuming APIKey model is in api.models
+from api.services.api_keys import APIKeyService
+from api.services.usage import UsageService
+
+logger = logging.getLogger(__name__)
+
+RATE_LIMIT_KEY_PREFIX = "rl"
+
+# Sliding-window check-and-increment, run atomically on the Redis server.
+# KEYS: current window counter, previous window counter
+# ARGV: weight of the previous window, limit, counter TTL
+SLIDING_WINDOW_SCRIPT = """
+local current = tonumber(redis.call('GET', KEYS[1]) or '0')
+local previous = tonumber(redis.call('GET', KEYS[2]) or '0')
+if previous * tonumber(ARGV[1]) + current >= tonumber(ARGV[2]) then
+    return {0, current, previous}
+end
+current = redis.call('INCR', KEYS[1])
+redis.call('EXPIRE', KEYS[1], ARGV[3])
+return {1, current, previous}
+"""
+
+
+class RateLimitResult:
+    """Outcome of a rate limit check, with the values for the X-RateLimit-* headers"""
+
+    def __init__(self, allowed, limit, current, previous, period, now):
+        self.allowed = allowed
+        self.limit = limit
+        elapsed = now % period
+        weight = (period - elapsed) / period
+        estimated = previous * weight + current
+
+        self.remaining = max(0, int(limit - estimated))
+        self.reset = int(now - elapsed + period)
+
+        # The previous window's share decays by previous/period per second
+        retry_after = period - elapsed
+        if previous and estimated >= limit:
+            retry_after = min(retry_after, (estimated - limit + 1) * period / previous)
+        self.retry_after = max(1, math.ceil(retry_after))
+
+    def headers(self):
+        headers = {
+            'X-RateLimit-Limit': str(self.limit),
+            'X-RateLimit-Remaining': str(self.remaining),
+            'X-RateLimit-Reset': str(self.reset),
+        }
+        if not self.allowed:
+            headers['Retry-After'] = str(self.retry_after)
+        return headers
+
+
+class RedisSlidingWindowLimiter:
+    """
+    Sliding-window counter shared by every worker through Redis.
+    The check and the increment run as one Lua script, i.e. one atomic
+    round-trip per request.
+    """
+
+    def __init__(self, url):
+        import redis
+
+        self.client = redis.Redis.from_url(url)
+        self.script = self.client.register_script(SLIDING_WINDOW_SCRIPT)
+
+    def hit(self, key, limit, period):
+        now = time.time()
+        window = int(now // period)
+        weight = (period - now % period) / period
+        allowed, current, previous = self.script(
+            keys=[f"{RATE_LIMIT_KEY_PREFIX}:{key}:{window}", f"{RATE_LIMIT_KEY_PREFIX}:{key}:{window - 1}"],
+            args=[weight, limit, period * 2],
+        )
+        return RateLimitResult(bool(allowed), limit, int(current), int(previous), period, now)
+
+
+class LocalSlidingWindowLimiter:
+    """
+    In-process sliding-window counter, for development and tests only: every
+    worker counts separately, so N workers allow N times the tier's limit
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+
+    def hit(self, key, limit, period):
+        now = time.time()
+        window = int(now // period)
+        weight = (period - now % period) / period
+        with self._lock:
+            current = self._counters.get((key, window), 0)
+            previous = self._counters.get((key, window - 1), 0)
+            allowed = previous * weight + current < limit
+            if allowed:
+                current += 1
+                self._counters[(key, window)] = current
+            # Drop the window that can no longer affect a decision
+            self._counters.pop((key, window - 2), None)
+        return RateLimitResult(allowed, limit, current, previous, period, now)
+
+
+def get_rate_limiter():
+    """Use Redis when RATE_LIMIT_REDIS_URL is configured, otherwise count in-process (see api.checks)"""
+    url = getattr(settings, 'RATE_LIMIT_REDIS_URL', None)
+    if url:
+        return RedisSlidingWindowLimiter(url)
+    return LocalSlidingWindowLimiter()
+
 
 # Enhanced APIKey middleware for rate limiting
 class APIKeyMiddleware:
+    """
+    Authenticates X-API-Key, applies the tier's rate limit and meters usage.
+    Works in sync and async middleware chains: under ASGI only the key lookup
+    and usage metering run in a thread, not the whole request.
+    """
+    sync_capable = True
+    async_capable = True
+
     def __init__(self, get_response):
         self.get_response = get_response
         self.rate_limits = {
@@ -12,35 +133,89 @@ class APIKeyMiddleware:
             'pro': {'requests': 1000, 'period': 3600},  # 1000 requests per hour
             'enterprise': None  # Unlimited
         }
-        
+        self.limiter = get_rate_limiter()
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
     def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        started = time.monotonic()
+        response, rate_limit = self._authorize(request)
+        if response is None:
+            response = self._add_headers(self.get_response(request), rate_limit)
+        self._record_usage(request, response, started)
+        return response
+
+    async def __acall__(self, request):
+        started = time.monotonic()
+        response, rate_limit = None, None
+        if request.META.get('HTTP_X_API_KEY'):
+            response, rate_limit = await sync_to_async(self._authorize)(request)
+        if response is None:
+            response = self._add_headers(await self.get_response(request), rate_limit)
+        if getattr(request, 'api_key', None) is not None:
+            await sync_to_async(self._record_usage)(request, response, started)
+        return response
+
+    def _record_usage(self, request, response, started):
+        # Meter requests made with a valid key, including rate-limited ones
+        key_object = getattr(request, 'api_key', None)
+        if key_object is not None:
+            UsageService.record(
+                key_object.key,
+                self._endpoint(request),
+                response.status_code,
+                (time.monotonic() - started) * 1000
+            )
+
+    def _authorize(self, request):
+        """Return (error response or None, rate limit result or None) for the request's API key"""
         api_key = request.META.get('HTTP_X_API_KEY')
+        rate_limit = None
         if api_key and not request.path.startswith('/admin/'):
-            try:
-                key_object = APIKey.objects.get(key=api_key, is_active=True)
-                # Update last used timestamp
-                key_object.last_used = timezone.now()
-                key_object.save(update_fields=['last_used'])
-                
-                # Check rate limit
-                if key_object.tier != 'enterprise':
-                    cache_key = f"api_usage_{api_key}"
-                    usage = cache.get(cache_key, 0)
-                    limit = self.rate_limits[key_object.tier]
-                    
-                    if usage >= limit['requests']:
-                        return JsonResponse({
-                            'error': 'Rate limit exceeded',
-                            'detail': f"Your {key_object.tier} plan allows {limit['requests']} requests per hour."
-                        }, status=429)
-                    
-                    # Increment usage counter
-                    cache.set(cache_key, usage + 1, limit['period'])
-                
-                # Add API key info to request
-                request.api_key = key_object
-                
-            except APIKey.DoesNotExist:
-                return JsonResponse({'error': 'Invalid API key'}, status=401)
-                
-        return self.get_response(request)
\ No newline at end of file
+            key_object = APIKeyService.get_active_key(api_key)
+            if key_object is None:
+                return JsonResponse({'error': 'Invalid API key'}, status=401), None
+
+            # Update last used timestamp (flushed to the database in batches)
+            APIKeyService.record_use(api_key)
+
+            # Add API key info to request
+            request.api_key = key_object
+
+            # Check rate limit
+            limit = self.rate_limits.get(key_object.tier)
+            if limit:
+                rate_limit = self._check_rate_limit(api_key, limit)
+
+                if rate_limit and not rate_limit.allowed:
+                    response = JsonResponse({
+                        'error': 'Rate limit exceeded',
+                        'detail': f"Your {key_object.tier} plan allows {limit['requests']} requests per hour."
+                    }, status=429)
+                    return self._add_headers(response, rate_limit), rate_limit
+
+        return None, rate_limit
+
+    def _check_rate_limit(self, api_key, limit):
+        try:
+            return self.limiter.hit(api_key, limit['requests'], limit['period'])
+        except Exception as e:
+            # Fail open: an unavailable limiter backend must not take the API down
+            logger.exception(f"Rate limiter unavailable: {e}")
+            return None
+
+    @staticmethod
+    def _endpoint(request):
+        """Route pattern of the resolved view, so usage isn't split per object id"""
+        match = getattr(request, 'resolver_match', None)
+        return match.route if match else '(unresolved)'
+
+    @staticmethod
+    def _add_headers(response, rate_limit):
+        if rate_limit:
+            for header, value in rate_limit.headers().items():
+                response[header] = value
+        return response
@@ -0,0 +1,31 @@
+# Generated by Django 5.2 on 2026-10-18 10:00
+
+import django.contrib.postgres.fields
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_index_pagination_ordering'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='APIUsage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hour', models.DateTimeField(help_text='Start of the hour the requests were made in')),
+                ('endpoint', models.CharField(max_length=255)),
+                ('status_code', models.PositiveSmallIntegerField()),
+                ('calls', models.PositiveIntegerField(default=0)),
+                ('total_latency_ms', models.FloatField(default=0)),
+                ('latency_histogram', django.contrib.postgres.fields.ArrayField(base_field=models.PositiveIntegerField(), help_text='Request counts per latency bucket', size=None)),
+                ('api_key', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='usage', to='api.apikey')),
+            ],
+            options={
+                'unique_together': {('api_key', 'hour', 'endpoint', 'status_code')},
+            },
+        ),
+    ]
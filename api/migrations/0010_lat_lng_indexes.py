@@ -0,0 +1,29 @@
+# Generated by Django 5.2 on 2026-10-18 11:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_apiusage'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='destination',
+            index=models.Index(fields=['latitude', 'longitude'], name='destination_lat_lng_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='lodging',
+            index=models.Index(fields=['latitude', 'longitude'], name='lodging_lat_lng_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='issuingoffice',
+            index=models.Index(fields=['latitude', 'longitude'], name='issuingoffice_lat_lng_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['latitude', 'longitude'], name='event_lat_lng_idx'),
+        ),
+    ]
@@ -0,0 +1,66 @@
+# Generated by Django 5.2 on 2026-10-18 12:00
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0010_lat_lng_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='destination',
+            index=models.Index(fields=['type'], name='destination_type_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='destination',
+            index=models.Index(fields=['region'], name='destination_region_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='destination',
+            index=models.Index(fields=['difficulty'], name='destination_difficulty_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='lodging',
+            index=models.Index(fields=['type', 'availability'], name='lodging_type_avail_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='lodging',
+            index=models.Index(fields=['place', 'availability'], name='lodging_place_avail_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='guide',
+            index=models.Index(condition=models.Q(('available', True)), fields=['-rating'], name='guide_available_rating_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['end_date', 'start_date'], name='event_end_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['start_date'], name='event_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='trailstatus',
+            index=models.Index(django.db.models.functions.text.Upper('region'), name='trailstatus_upper_region_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='trailstatus',
+            index=models.Index(fields=['status'], name='trailstatus_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='weatherdata',
+            index=models.Index(django.db.models.functions.text.Upper('location'), models.OrderBy(models.F('timestamp'), descending=True), name='weatherdata_loc_ts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='weatherforecast',
+            index=models.Index(django.db.models.functions.text.Upper('location'), models.F('date'), name='weatherforecast_loc_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tourismstat',
+            index=models.Index(condition=models.Q(('month__isnull', True)), fields=['-year'], name='tourismstat_annual_idx'),
+        ),
+    ]
@@ -0,0 +1,95 @@
+# Generated by Django 5.2 on 2026-10-18 13:00
+
+import django.contrib.postgres.indexes
+from django.db import migrations
+
+# Lower-case and trim every element, keeping the element order
+NORMALIZE_SQL = """
+UPDATE {table}
+SET {column} = ARRAY(
+    SELECT lower(btrim(value)) FROM unnest({column}) WITH ORDINALITY AS t(value, position) ORDER BY position
+)
+WHERE {column} IS NOT NULL
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0011_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            NORMALIZE_SQL.format(table='api_destination', column='best_season'),
+            migrations.RunSQL.noop,
+        ),
+        migrations.RunSQL(
+            NORMALIZE_SQL.format(table='api_lodging', column='amenities'),
+            migrations.RunSQL.noop,
+        ),
+        migrations.RunSQL(
+            NORMALIZE_SQL.format(table='api_guide', column='languages'),
+            migrations.RunSQL.noop,
+        ),
+        migrations.RunSQL(
+            NORMALIZE_SQL.format(table='api_guide', column='regions'),
+            migrations.RunSQL.noop,
+        ),
+        migrations.RunSQL(
+            NORMALIZE_SQL.format(table='api_guide', column='specialization'),
+            migrations.RunSQL.noop,
+        ),
+        migrations.RunSQL(
+            NORMALIZE_SQL.format(table='api_agency', column='regions'),
+            migrations.RunSQL.noop,
+        ),
+        migrations.RunSQL(
+            NORMALIZE_SQL.format(table='api_agency', column='services'),
+            migrations.RunSQL.noop,
+        ),
+        migrations.RunSQL(
+            NORMALIZE_SQL.format(table='api_permit', column='regions'),
+            migrations.RunSQL.noop,
+        ),
+        migrations.RunSQL(
+            NORMALIZE_SQL.format(table='api_event', column='activities'),
+            migrations.RunSQL.noop,
+        ),
+        migrations.AddIndex(
+            model_name='destination',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['best_season'], name='destination_best_season_gin'),
+        ),
+        migrations.AddIndex(
+            model_name='lodging',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['amenities'], name='lodging_amenities_gin'),
+        ),
+        migrations.AddIndex(
+            model_name='guide',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['languages'], name='guide_languages_gin'),
+        ),
+        migrations.AddIndex(
+            model_name='guide',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['regions'], name='guide_regions_gin'),
+        ),
+        migrations.AddIndex(
+            model_name='guide',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['specialization'], name='guide_specialization_gin'),
+        ),
+        migrations.AddIndex(
+            model_name='agency',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['regions'], name='agency_regions_gin'),
+        ),
+        migrations.AddIndex(
+            model_name='agency',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['services'], name='agency_services_gin'),
+        ),
+        migrations.AddIndex(
+            model_name='permit',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['regions'], name='permit_regions_gin'),
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['activities'], name='event_activities_gin'),
+        ),
+    ]
@@ -0,0 +1,104 @@
+# Generated by Django 5.2 on 2026-10-18 14:00
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+# Same weighting as build_search_vector() in api.search
+SEARCH_VECTOR_SQL = {
+    'api_destination': (('name', 'A'), ("array_to_string(highlights, ' ')", 'B'), ('description', 'C')),
+    'api_lodging': (('name', 'A'), ('place', 'B'), ("array_to_string(amenities, ' ')", 'C')),
+    'api_guide': (('name', 'A'), ("array_to_string(specialization, ' ')", 'B')),
+    'api_agency': (('name', 'A'), ("array_to_string(services, ' ')", 'B')),
+    'api_event': (('name', 'A'), ("array_to_string(activities, ' ')", 'B'), ('description', 'C')),
+}
+
+
+def backfill_sql(table):
+    vector = ' || '.join(
+        f"setweight(to_tsvector('english'::regconfig, COALESCE({column}, '')), '{weight}')"
+        for column, weight in SEARCH_VECTOR_SQL[table]
+    )
+    return f"UPDATE {table} SET search_vector = {vector}"
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0012_array_gin_indexes'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddField(
+            model_name='destination',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='lodging',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='guide',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='agency',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='event',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunSQL(backfill_sql('api_destination'), migrations.RunSQL.noop),
+        migrations.RunSQL(backfill_sql('api_lodging'), migrations.RunSQL.noop),
+        migrations.RunSQL(backfill_sql('api_guide'), migrations.RunSQL.noop),
+        migrations.RunSQL(backfill_sql('api_agency'), migrations.RunSQL.noop),
+        migrations.RunSQL(backfill_sql('api_event'), migrations.RunSQL.noop),
+        migrations.AddIndex(
+            model_name='destination',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='destination_search_gin'),
+        ),
+        migrations.AddIndex(
+            model_name='destination',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['name'], name='destination_name_trgm', opclasses=['gin_trgm_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='lodging',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='lodging_search_gin'),
+        ),
+        migrations.AddIndex(
+            model_name='lodging',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['name'], name='lodging_name_trgm', opclasses=['gin_trgm_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='guide',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='guide_search_gin'),
+        ),
+        migrations.AddIndex(
+            model_name='guide',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['name'], name='guide_name_trgm', opclasses=['gin_trgm_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='agency',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='agency_search_gin'),
+        ),
+        migrations.AddIndex(
+            model_name='agency',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['name'], name='agency_name_trgm', opclasses=['gin_trgm_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='event_search_gin'),
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['name'], name='event_name_trgm', opclasses=['gin_trgm_ops']),
+        ),
+    ]
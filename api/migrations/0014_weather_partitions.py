@@ -0,0 +1,89 @@
+# Generated by Django 5.2 on 2026-10-18 15:00
+
+import django.db.models.functions.text
+from datetime import datetime, timezone
+from django.db import migrations, models
+
+PARTITIONS_AHEAD = 3
+
+
+def add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return month.replace(year=index // 12, month=index % 12 + 1)
+
+
+def partition_weather_data(apps, schema_editor):
+    """
+    Rebuild api_weatherdata as a table range-partitioned by month on
+    timestamp, with a default partition for anything outside the monthly ones.
+    The primary key becomes (id, timestamp) as Postgres requires the
+    partition key in it; Django keeps treating id as the primary key.
+    """
+    WeatherData = apps.get_model('api', 'WeatherData')
+    table = WeatherData._meta.db_table
+    staging = f"{table}_partitioned"
+    quote = schema_editor.quote_name
+
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(f"SELECT min(timestamp), max(timestamp) FROM {quote(table)}")
+        first, last = cursor.fetchone()
+
+    now = datetime.now(timezone.utc)
+    first, last = first or now, max(last or now, now)
+    month = datetime(first.year, first.month, 1, tzinfo=timezone.utc)
+    end = add_months(datetime(last.year, last.month, 1, tzinfo=timezone.utc), PARTITIONS_AHEAD)
+
+    schema_editor.execute(f"CREATE TABLE {quote(staging)} (LIKE {quote(table)}) PARTITION BY RANGE (timestamp)")
+    schema_editor.execute(f"ALTER TABLE {quote(staging)} ALTER COLUMN id ADD GENERATED BY DEFAULT AS IDENTITY")
+    schema_editor.execute(f"CREATE TABLE {quote(table + '_default')} PARTITION OF {quote(staging)} DEFAULT")
+    while month <= end:
+        schema_editor.execute(
+            f"CREATE TABLE {quote(f'{table}_p{month:%Y%m}')} PARTITION OF {quote(staging)} "
+            f"FOR VALUES FROM (%s) TO (%s)",
+            [month, add_months(month, 1)]
+        )
+        month = add_months(month, 1)
+
+    schema_editor.execute(f"INSERT INTO {quote(staging)} SELECT * FROM {quote(table)}")
+    schema_editor.execute(
+        f"SELECT setval(pg_get_serial_sequence(%s, 'id'), coalesce((SELECT max(id) FROM {quote(staging)}), 0) + 1, false)",
+        [staging]
+    )
+    schema_editor.execute(f"DROP TABLE {quote(table)}")
+    schema_editor.execute(f"ALTER TABLE {quote(staging)} RENAME TO {quote(table)}")
+    schema_editor.execute(f"ALTER TABLE {quote(table)} ADD CONSTRAINT {quote(table + '_pkey')} PRIMARY KEY (id, timestamp)")
+    # Partitioned indexes cascade to every current and future partition
+    for sql in schema_editor._model_indexes_sql(WeatherData):
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0013_search_vectors'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WeatherRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('location', models.CharField(max_length=100)),
+                ('interval', models.CharField(choices=[('hour', 'Hourly'), ('day', 'Daily')], max_length=10)),
+                ('bucket', models.DateTimeField(help_text='Start of the hour or day (UTC) the readings fall in')),
+                ('samples', models.PositiveIntegerField(help_text='Number of raw readings aggregated')),
+                ('min_temperature', models.FloatField()),
+                ('max_temperature', models.FloatField()),
+                ('avg_temperature', models.FloatField()),
+                ('total_precipitation', models.FloatField(help_text='Precipitation in mm')),
+                ('max_wind_speed', models.IntegerField(help_text='Wind speed in km/h')),
+                ('avg_humidity', models.FloatField()),
+                ('avg_pressure', models.FloatField()),
+            ],
+            options={
+                'unique_together': {('location', 'interval', 'bucket')},
+                'indexes': [models.Index(django.db.models.functions.text.Upper('location'), models.F('interval'), models.F('bucket'), name='weatherrollup_loc_bucket_idx')],
+            },
+        ),
+        migrations.RunPython(partition_weather_data, migrations.RunPython.noop),
+    ]
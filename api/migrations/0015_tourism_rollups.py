@@ -0,0 +1,64 @@
+# Generated by Django 5.2 on 2026-10-18 16:00
+
+from django.db import migrations
+
+# Each view has a unique index so it can be refreshed CONCURRENTLY
+CREATE_ROLLUPS_SQL = """
+CREATE MATERIALIZED VIEW api_tourism_monthly_arrivals AS
+SELECT year, month, total_arrivals::bigint AS arrivals
+FROM api_tourismstat
+WHERE month IS NOT NULL;
+
+CREATE UNIQUE INDEX api_tourism_monthly_arrivals_key ON api_tourism_monthly_arrivals (year, month);
+
+-- A year's total is its annual row if there is one, else the sum of its months
+CREATE MATERIALIZED VIEW api_tourism_yearly_arrivals AS
+WITH totals AS (
+    SELECT year, coalesce(
+        max(total_arrivals) FILTER (WHERE month IS NULL),
+        sum(total_arrivals) FILTER (WHERE month IS NOT NULL)
+    )::bigint AS arrivals
+    FROM api_tourismstat
+    GROUP BY year
+)
+SELECT totals.year, totals.arrivals,
+       totals.arrivals - previous.arrivals AS delta,
+       round(100.0 * (totals.arrivals - previous.arrivals) / NULLIF(previous.arrivals, 0), 2) AS delta_percentage
+FROM totals
+LEFT JOIN totals previous ON previous.year = totals.year - 1;
+
+CREATE UNIQUE INDEX api_tourism_yearly_arrivals_key ON api_tourism_yearly_arrivals (year);
+
+-- Same rule per nationality: the annual breakdown if the year has one, else the monthly ones
+CREATE MATERIALIZED VIEW api_tourism_nationality_yearly AS
+WITH annual_years AS (
+    SELECT DISTINCT stat.year
+    FROM api_nationalitystat breakdown
+    JOIN api_tourismstat stat ON stat.id = breakdown.tourism_stat_id
+    WHERE stat.month IS NULL
+)
+SELECT stat.year, breakdown.nationality, sum(breakdown.count)::bigint AS arrivals
+FROM api_nationalitystat breakdown
+JOIN api_tourismstat stat ON stat.id = breakdown.tourism_stat_id
+WHERE (stat.month IS NULL) = (stat.year IN (SELECT year FROM annual_years))
+GROUP BY stat.year, breakdown.nationality;
+
+CREATE UNIQUE INDEX api_tourism_nationality_yearly_key ON api_tourism_nationality_yearly (year, nationality);
+"""
+
+DROP_ROLLUPS_SQL = """
+DROP MATERIALIZED VIEW IF EXISTS api_tourism_nationality_yearly;
+DROP MATERIALIZED VIEW IF EXISTS api_tourism_yearly_arrivals;
+DROP MATERIALIZED VIEW IF EXISTS api_tourism_monthly_arrivals;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0014_weather_partitions'),
+    ]
+
+    operations = [
+        migrations.RunSQL(CREATE_ROLLUPS_SQL, DROP_ROLLUPS_SQL),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2 on 2026-10-18 18:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0016_jobs'),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='job',
+            name='job_active_dedup_key',
+        ),
+        migrations.AlterField(
+            model_name='job',
+            name='dedup_key',
+            field=models.CharField(blank=True, help_text='At most one queued job exists per key', max_length=255, null=True),
+        ),
+        migrations.AddConstraint(
+            model_name='job',
+            constraint=models.UniqueConstraint(condition=models.Q(('status', 'queued')), fields=('dedup_key',), name='job_queued_dedup_key'),
+        ),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 5.2 on 2026-10-18 19:00
+
+from django.db import migrations
+
+# Same weighting as search_vector_fields on each model. A generated column
+# can't be used: array_to_string() is not immutable.
+SEARCH_VECTOR_COLUMNS = {
+    'api_destination': (('name', 'A'), ('highlights', 'B'), ('description', 'C')),
+    'api_lodging': (('name', 'A'), ('place', 'B'), ('amenities', 'C')),
+    'api_guide': (('name', 'A'), ('specialization', 'B')),
+    'api_agency': (('name', 'A'), ('services', 'B')),
+    'api_event': (('name', 'A'), ('activities', 'B'), ('description', 'C')),
+}
+ARRAY_COLUMNS = {'highlights', 'amenities', 'specialization', 'services', 'activities'}
+
+
+def vector_sql(table, row):
+    parts = []
+    for column, weight in SEARCH_VECTOR_COLUMNS[table]:
+        value = f"{row}{column}"
+        if column in ARRAY_COLUMNS:
+            value = f"array_to_string({value}, ' ')"
+        parts.append(f"setweight(to_tsvector('english'::regconfig, COALESCE({value}, '')), '{weight}')")
+    return ' || '.join(parts)
+
+
+def trigger_sql(table):
+    """Recompute search_vector in the row being written, whichever way it is written (bulk paths included)"""
+    columns = ', '.join(column for column, _ in SEARCH_VECTOR_COLUMNS[table])
+    return f"""
+        CREATE FUNCTION {table}_search_vector() RETURNS trigger AS $$
+        BEGIN
+            NEW.search_vector := {vector_sql(table, 'NEW.')};
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql;
+
+        CREATE TRIGGER {table}_search_vector
+            BEFORE INSERT OR UPDATE OF {columns} ON {table}
+            FOR EACH ROW EXECUTE FUNCTION {table}_search_vector();
+
+        UPDATE {table} SET search_vector = {vector_sql(table, '')};
+    """
+
+
+def drop_trigger_sql(table):
+    return f"""
+        DROP TRIGGER IF EXISTS {table}_search_vector ON {table};
+        DROP FUNCTION IF EXISTS {table}_search_vector();
+    """
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0017_job_queued_dedup_key'),
+    ]
+
+    operations = [
+        migrations.RunSQL(trigger_sql(table), drop_trigger_sql(table))
+        for table in SEARCH_VECTOR_COLUMNS
+    ]
@@ -1,13 +1,31 @@
 from django.db import models
+from django.db.models import F, Q
+from django.db.models.functions import Upper
 from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.core.validators import MinValueValidator, MaxValueValidator
+from django.utils import timezone
 import uuid
 
 
+def normalize_array_value(value):
+    """Canonical form of a filterable ArrayField element, used for storage and filtering"""
+    return value.strip().lower()
+
+
 class TimestampedModel(models.Model):
     """Base model with created and updated timestamps"""
-    created_at = models.DateTimeField(auto_now_add=True)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
     updated_at = models.DateTimeField(auto_now=True)
+    
+    # ArrayFields stored lower-cased (see api.signals) so membership
+    # filters can compare exact values through GIN indexes
+    normalized_array_fields = ()
+    # (field, weight) pairs kept in a `search_vector` column for full-text
+    # search (see api.search); weight 'A' ranks highest. The column is filled
+    # by a database trigger (migration 0018), so bulk writes keep it current
+    search_vector_fields = ()
 
     class Meta:
         abstract = True
@@ -45,6 +63,21 @@ class Destination(TimestampedModel):
     best_season = ArrayField(models.CharField(max_length=50), blank=True, null=True)
     permits_required = ArrayField(models.CharField(max_length=50), blank=True, null=True)
     highlights = ArrayField(models.CharField(max_length=255), blank=True, null=True)
+    search_vector = SearchVectorField(null=True, editable=False)
+    
+    normalized_array_fields = ('best_season',)
+    search_vector_fields = (('name', 'A'), ('highlights', 'B'), ('description', 'C'))
+    
+    class Meta:
+        indexes = [
+            GinIndex(fields=['best_season'], name='destination_best_season_gin'),
+            models.Index(fields=['latitude', 'longitude'], name='destination_lat_lng_idx'),
+            models.Index(fields=['type'], name='destination_type_idx'),
+            models.Index(fields=['region'], name='destination_region_idx'),
+            models.Index(fields=['difficulty'], name='destination_difficulty_idx'),
+            GinIndex(fields=['search_vector'], name='destination_search_gin'),
+            GinIndex(fields=['name'], opclasses=['gin_trgm_ops'], name='destination_name_trgm'),
+        ]
     
     def __str__(self):
         return f"{self.name} ({self.type})"
@@ -88,6 +121,20 @@ class Lodging(TimestampedModel):
     amenities = ArrayField(models.CharField(max_length=50), blank=True, null=True)
     booking_link = models.URLField(blank=True)
     availability = models.BooleanField(default=True)
+    search_vector = SearchVectorField(null=True, editable=False)
+    
+    normalized_array_fields = ('amenities',)
+    search_vector_fields = (('name', 'A'), ('place', 'B'), ('amenities', 'C'))
+    
+    class Meta:
+        indexes = [
+            GinIndex(fields=['amenities'], name='lodging_amenities_gin'),
+            models.Index(fields=['latitude', 'longitude'], name='lodging_lat_lng_idx'),
+            models.Index(fields=['type', 'availability'], name='lodging_type_avail_idx'),
+            models.Index(fields=['place', 'availability'], name='lodging_place_avail_idx'),
+            GinIndex(fields=['search_vector'], name='lodging_search_gin'),
+            GinIndex(fields=['name'], opclasses=['gin_trgm_ops'], name='lodging_name_trgm'),
+        ]
     
     def __str__(self):
         return f"{self.name} ({self.type} in {self.place})"
@@ -132,6 +179,21 @@ class Guide(TimestampedModel):
     photo = models.ImageField(upload_to='guides/', blank=True, null=True)
     available = models.BooleanField(default=True)
     daily_rate = models.PositiveIntegerField(help_text="Daily rate in NPR")
+    search_vector = SearchVectorField(null=True, editable=False)
+    
+    normalized_array_fields = ('languages', 'regions', 'specialization')
+    search_vector_fields = (('name', 'A'), ('specialization', 'B'))
+    
+    class Meta:
+        indexes = [
+            GinIndex(fields=['languages'], name='guide_languages_gin'),
+            GinIndex(fields=['regions'], name='guide_regions_gin'),
+            GinIndex(fields=['specialization'], name='guide_specialization_gin'),
+            # top_rated(): rating >= 4.5 among available guides
+            models.Index(fields=['-rating'], condition=Q(available=True), name='guide_available_rating_idx'),
+            GinIndex(fields=['search_vector'], name='guide_search_gin'),
+            GinIndex(fields=['name'], opclasses=['gin_trgm_ops'], name='guide_name_trgm'),
+        ]
     
     def __str__(self):
         return f"{self.name} (License: {self.license_id})"
@@ -164,6 +226,18 @@ class Agency(TimestampedModel):
                                 validators=[MinValueValidator(0), MaxValueValidator(5)],
                                 blank=True, null=True)
     logo = models.ImageField(upload_to='agencies/', blank=True, null=True)
+    search_vector = SearchVectorField(null=True, editable=False)
+    
+    normalized_array_fields = ('regions', 'services')
+    search_vector_fields = (('name', 'A'), ('services', 'B'))
+    
+    class Meta:
+        indexes = [
+            GinIndex(fields=['regions'], name='agency_regions_gin'),
+            GinIndex(fields=['services'], name='agency_services_gin'),
+            GinIndex(fields=['search_vector'], name='agency_search_gin'),
+            GinIndex(fields=['name'], opclasses=['gin_trgm_ops'], name='agency_name_trgm'),
+        ]
     
     def __str__(self):
         return f"{self.name} (License: {self.license_id})"
@@ -192,6 +266,13 @@ class Permit(TimestampedModel):
     online_application = models.URLField(blank=True)
     validity = models.CharField(max_length=255)
     
+    normalized_array_fields = ('regions',)
+    
+    class Meta:
+        indexes = [
+            GinIndex(fields=['regions'], name='permit_regions_gin'),
+        ]
+    
     def __str__(self):
         return self.name
 
@@ -226,6 +307,11 @@ class IssuingOffice(models.Model):
     phone = models.CharField(max_length=20, blank=True)
     website = models.URLField(blank=True)
     
+    class Meta:
+        indexes = [
+            models.Index(fields=['latitude', 'longitude'], name='issuingoffice_lat_lng_idx'),
+        ]
+    
     def __str__(self):
         return self.name
 
@@ -264,6 +350,21 @@ class Event(TimestampedModel):
     description = models.TextField()
     significance = models.TextField(blank=True)
     activities = ArrayField(models.CharField(max_length=255), blank=True, null=True)
+    search_vector = SearchVectorField(null=True, editable=False)
+    
+    normalized_array_fields = ('activities',)
+    search_vector_fields = (('name', 'A'), ('activities', 'B'), ('description', 'C'))
+    
+    class Meta:
+        indexes = [
+            GinIndex(fields=['activities'], name='event_activities_gin'),
+            models.Index(fields=['latitude', 'longitude'], name='event_lat_lng_idx'),
+            # upcoming(): end_date >= today ORDER BY start_date
+            models.Index(fields=['end_date', 'start_date'], name='event_end_start_idx'),
+            models.Index(fields=['start_date'], name='event_start_idx'),
+            GinIndex(fields=['search_vector'], name='event_search_gin'),
+            GinIndex(fields=['name'], opclasses=['gin_trgm_ops'], name='event_name_trgm'),
+        ]
     
     def __str__(self):
         return f"{self.name} ({self.start_date} to {self.end_date})"
@@ -303,6 +404,13 @@ class TrailStatus(TimestampedModel):
     status = models.CharField(max_length=20, choices=STATUS_CHOICES)
     source = models.CharField(max_length=255)
     
+    class Meta:
+        indexes = [
+            # region__iexact lookups compare UPPER(region)
+            models.Index(Upper('region'), name='trailstatus_upper_region_idx'),
+            models.Index(fields=['status'], name='trailstatus_status_idx'),
+        ]
+    
     def __str__(self):
         return f"{self.name}: {self.status}"
 
@@ -357,7 +465,7 @@ class WeatherData(models.Model):
     latitude = models.DecimalField(max_digits=9, decimal_places=6)
     longitude = models.DecimalField(max_digits=9, decimal_places=6)
     elevation = models.IntegerField(help_text="Elevation in meters")
-    timestamp = models.DateTimeField()
+    timestamp = models.DateTimeField(db_index=True)
     temperature = models.IntegerField(help_text="Temperature in celsius")
     feels_like = models.IntegerField(help_text="Feels like temperature in celsius")
     condition = models.CharField(max_length=50)
@@ -369,6 +477,12 @@ class WeatherData(models.Model):
     visibility = models.IntegerField(help_text="Visibility in meters")
     uv_index = models.IntegerField()
     
+    class Meta:
+        indexes = [
+            # location__iexact + latest('timestamp') / timestamp ranges
+            models.Index(Upper('location'), F('timestamp').desc(), name='weatherdata_loc_ts_idx'),
+        ]
+    
     def __str__(self):
         return f"Weather for {self.location} at {self.timestamp}"
 
@@ -386,11 +500,44 @@ class WeatherForecast(models.Model):
     
     class Meta:
         unique_together = ('location', 'date')
+        indexes = [
+            # location__iexact + date ranges
+            models.Index(Upper('location'), F('date'), name='weatherforecast_loc_date_idx'),
+        ]
     
     def __str__(self):
         return f"Forecast for {self.location} on {self.date}"
 
 
+class WeatherRollup(models.Model):
+    """Hourly or daily aggregate of raw WeatherData readings, kept after the raw rows expire"""
+    INTERVALS = [
+        ('hour', 'Hourly'),
+        ('day', 'Daily'),
+    ]
+    
+    location = models.CharField(max_length=100)
+    interval = models.CharField(max_length=10, choices=INTERVALS)
+    bucket = models.DateTimeField(help_text="Start of the hour or day (UTC) the readings fall in")
+    samples = models.PositiveIntegerField(help_text="Number of raw readings aggregated")
+    min_temperature = models.FloatField()
+    max_temperature = models.FloatField()
+    avg_temperature = models.FloatField()
+    total_precipitation = models.FloatField(help_text="Precipitation in mm")
+    max_wind_speed = models.IntegerField(help_text="Wind speed in km/h")
+    avg_humidity = models.FloatField()
+    avg_pressure = models.FloatField()
+    
+    class Meta:
+        unique_together = ('location', 'interval', 'bucket')
+        indexes = [
+            models.Index(Upper('location'), 'interval', 'bucket', name='weatherrollup_loc_bucket_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.get_interval_display()} weather for {self.location} at {self.bucket}"
+
+
 class TourismStat(models.Model):
     """Tourism statistics"""
     year = models.IntegerField()
@@ -403,6 +550,10 @@ class TourismStat(models.Model):
     
     class Meta:
         unique_together = ('year', 'month')
+        indexes = [
+            # annual(): month IS NULL ORDER BY -year
+            models.Index(fields=['-year'], condition=Q(month__isnull=True), name='tourismstat_annual_idx'),
+        ]
     
     def __str__(self):
         if self.month:
@@ -466,4 +617,69 @@ class APIKey(TimestampedModel):
     @classmethod
     def generate_key(cls):
         """Generate a secure random API key"""
-        return secrets.token_hex(32)  # 64 character hex string
\ No newline at end of file
+        return secrets.token_hex(32)  # 64 character hex string
+
+class APIUsage(models.Model):
+    """Hourly request counts and latency histogram per API key, endpoint and status"""
+    # Upper bounds (ms) of the latency histogram buckets; the last bucket is unbounded
+    LATENCY_BUCKETS_MS = [10, 25, 50, 100, 250, 500, 1000, 2500, 5000]
+
+    api_key = models.ForeignKey(APIKey, on_delete=models.CASCADE, related_name='usage')
+    hour = models.DateTimeField(help_text="Start of the hour the requests were made in")
+    endpoint = models.CharField(max_length=255)
+    status_code = models.PositiveSmallIntegerField()
+    calls = models.PositiveIntegerField(default=0)
+    total_latency_ms = models.FloatField(default=0)
+    latency_histogram = ArrayField(models.PositiveIntegerField(), help_text="Request counts per latency bucket")
+
+    class Meta:
+        unique_together = ('api_key', 'hour', 'endpoint', 'status_code')
+
+    def __str__(self):
+        return f"{self.api_key_id} {self.endpoint} {self.status_code}: {self.calls} calls at {self.hour}"
+
+
+class Job(models.Model):
+    """A unit of background work, run by `manage.py run_jobs` (see JobService)"""
+    STATUSES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('succeeded', 'Succeeded'),
+        ('failed', 'Failed'),
+    ]
+    task = models.CharField(max_length=100, help_text="Registered task name, e.g. 'email.send'")
+    payload = models.JSONField(default=dict, blank=True, help_text="Keyword arguments the task is called with")
+    status = models.CharField(max_length=20, choices=STATUSES, default='queued')
+    dedup_key = models.CharField(max_length=255, null=True, blank=True,
+                                 help_text="At most one queued job exists per key")
+    run_at = models.DateTimeField(default=timezone.now, help_text="Earliest time the job may run")
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    locked_by = models.CharField(max_length=100, blank=True, help_text="Worker running the job")
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            # Only queued jobs: a job enqueued while its twin runs must still run afterwards
+            models.UniqueConstraint(fields=['dedup_key'], condition=Q(status='queued'),
+                                    name='job_queued_dedup_key'),
+        ]
+        indexes = [
+            # Workers claim the oldest due queued job
+            models.Index(fields=['run_at'], condition=Q(status='queued'), name='job_queued_run_at_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.task} #{self.pk} ({self.status})"
+
+
+class JobSchedule(models.Model):
+    """Next run of a periodic job declared in settings.JOB_SCHEDULE"""
+    name = models.CharField(max_length=100, primary_key=True)
+    next_run_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.name} next at {self.next_run_at}"
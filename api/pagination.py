@@ -0,0 +1,40 @@
+from rest_framework.pagination import CursorPagination
+
+
+class KeysetCursorPagination(CursorPagination):
+    """
+    Opaque-cursor keyset pagination for the read-only viewsets.
+
+    Pages are sliced with a `WHERE <ordering column> < <cursor position>`
+    predicate on an indexed column instead of an OFFSET, so every page costs
+    the same however large the table grows, and `next` links stay stable
+    while new rows are being inserted.
+    """
+    page_size = 50
+    page_size_query_param = 'page_size'
+    ordering = ('-created_at', '-id')
+
+    # Largest page a client may request, by API key tier
+    tier_max_page_sizes = {
+        'anonymous': 100,
+        'free': 100,
+        'pro': 500,
+        'enterprise': 1000,
+    }
+
+    def get_max_page_size(self, request):
+        """Return the largest page size allowed for the caller's API key tier"""
+        api_key = getattr(request, 'api_key', None)
+        tier = api_key.tier if api_key else 'anonymous'
+        return self.tier_max_page_sizes.get(tier, self.tier_max_page_sizes['anonymous'])
+
+    def get_page_size(self, request):
+        self.max_page_size = self.get_max_page_size(request)
+        return super().get_page_size(request)
+
+    def get_ordering(self, request, queryset, view):
+        # Viewsets declare the indexed keyset ordering for their model; with
+        # an ordering filter (e.g. SearchRankOrderingFilter) that one decides
+        if getattr(view, 'ordering', None):
+            self.ordering = view.ordering
+        return super().get_ordering(request, queryset, view)
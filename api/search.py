@@ -0,0 +1,52 @@
+import re
+
+from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramWordSimilarity
+from django.db.models import F, Q
+from rest_framework import filters
+
+SEARCH_CONFIG = 'english'
+
+
+class FullTextSearchFilter(filters.SearchFilter):
+    """
+    `?search=` backed by the indexed `search_vector` column.
+
+    Every term is prefix-matched (so as-you-type queries work), rows are
+    annotated with `search_rank` and a trigram word similarity on `name`
+    catches misspelt place names ("Anapurna"). Models without
+    `search_vector_fields` fall back to the ILIKE search over `search_fields`.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        if not getattr(queryset.model, 'search_vector_fields', ()):
+            return super().filter_queryset(request, queryset, view)
+
+        words = [word for term in self.get_search_terms(request) for word in re.findall(r'\w+', term)]
+        if not words:
+            return queryset
+
+        text = ' '.join(words)
+        query = SearchQuery(
+            ' & '.join(f"{word}:*" for word in words), search_type='raw', config=SEARCH_CONFIG
+        )
+        similarity = TrigramWordSimilarity(text, 'name')
+
+        return queryset.annotate(
+            search_rank=SearchRank(F('search_vector'), query) + similarity
+        ).filter(
+            Q(search_vector=query) | Q(name__trigram_word_similar=text)
+        )
+
+
+class SearchRankOrderingFilter(filters.OrderingFilter):
+    """
+    OrderingFilter whose default ordering puts the best `?search=` match
+    first. It ranks rows by the `search_rank` that FullTextSearchFilter
+    annotates, then by `-pk`, which keeps the keyset cursor unique. An
+    explicit `?ordering=` and unsearched lists keep the usual ordering.
+    """
+
+    def get_ordering(self, request, queryset, view):
+        if 'search_rank' in queryset.query.annotations and not request.query_params.get(self.ordering_param):
+            return ('-search_rank', '-pk')
+        return super().get_ordering(request, queryset, view)
@@ -0,0 +1,188 @@
+from abc import ABC, abstractmethod
+from collections import defaultdict
+from decimal import Decimal
+
+from django.utils import timezone
+from ..models import Destination, DestinationPhoto, Lodging, LodgingPhoto
+
+
+def _datetime(value):
+    """A DateTimeField value rendered the way DRF's DateTimeField does"""
+    if value is None:
+        return None
+    value = timezone.localtime(value).isoformat()
+    if value.endswith('+00:00'):
+        value = value[:-6] + 'Z'
+    return value
+
+
+def _decimal(value, exponent):
+    """A DecimalField value rendered the way DRF's DecimalField does (as a string)"""
+    if value is None:
+        return None
+    return '{:f}'.format(value.quantize(exponent))
+
+
+class ValuesSerializer(ABC):
+    """
+    Read-only serializer over `.values()` rows for hot list endpoints.
+
+    Builds the same representation as the matching ModelSerializer with plain
+    dict construction: rows are read as dicts, nested relations are loaded
+    with one `.values()` query each and grouped by parent id, and no model
+    instances or serializer fields are created. Subclasses list the columns
+    they read in `columns` and the reverse relations in `relations`.
+
+    FastSerializerParityTests (api.tests) and `manage.py benchmark_serializers`
+    check that the rendered output is byte-identical to the ModelSerializer's.
+    """
+    model = None
+    columns = ()
+    # Reverse relation name -> columns read from the related rows
+    relations = {}
+
+    def __init__(self, context=None):
+        self.context = context or {}
+        self.request = self.context.get('request')
+
+    def get_columns(self):
+        return ('pk', *self.columns)
+
+    def get_related(self, rows):
+        """Related rows of every relation, grouped by parent primary key"""
+        ids = [row['pk'] for row in rows]
+        related = {}
+        for name, columns in self.relations.items():
+            relation = self.model._meta.get_field(name)
+            parent = relation.field.attname
+            grouped = defaultdict(list)
+            if ids:
+                queryset = relation.related_model._default_manager.filter(**{f"{parent}__in": ids})
+                for item in queryset.values(parent, *columns):
+                    grouped[item[parent]].append(item)
+            related[name] = grouped
+        return related
+
+    def serialize(self, rows):
+        rows = list(rows)
+        related = self.get_related(rows)
+        return [self.to_representation(row, related) for row in rows]
+
+    @abstractmethod
+    def to_representation(self, row, related):
+        """The representation of one row, given the output of get_related"""
+
+    def image_url(self, field, name):
+        """An ImageField value rendered the way DRF's ImageField does"""
+        if not name:
+            return None
+        url = field.storage.url(name)
+        if self.request is not None:
+            return self.request.build_absolute_uri(url)
+        return url
+
+
+class FastDestinationSerializer(ValuesSerializer):
+    """Same output as DestinationSerializer"""
+    model = Destination
+    columns = (
+        'id', 'name', 'type', 'region', 'description', 'difficulty', 'duration',
+        'latitude', 'longitude', 'max_elevation', 'min_elevation', 'best_season',
+        'permits_required', 'highlights', 'created_at', 'updated_at'
+    )
+    relations = {'photos': ('photo', 'caption', 'is_primary')}
+    photo_field = DestinationPhoto._meta.get_field('photo')
+
+    def to_representation(self, row, related):
+        latitude, longitude = row['latitude'], row['longitude']
+        max_elevation, min_elevation = row['max_elevation'], row['min_elevation']
+        return {
+            'id': row['id'],
+            'name': row['name'],
+            'type': row['type'],
+            'region': row['region'],
+            'description': row['description'],
+            'difficulty': row['difficulty'],
+            'duration': row['duration'],
+            'coordinates': {'lat': latitude, 'lng': longitude} if latitude and longitude else None,
+            'elevation': (
+                {'max': max_elevation, 'min': min_elevation}
+                if max_elevation or min_elevation else None
+            ),
+            'best_season': row['best_season'],
+            'permits_required': row['permits_required'],
+            'highlights': row['highlights'],
+            'photos': [
+                {
+                    'photo': self.image_url(self.photo_field, photo['photo']),
+                    'caption': photo['caption'],
+                    'is_primary': photo['is_primary'],
+                }
+                for photo in related['photos'].get(row['pk'], ())
+            ],
+            'created_at': _datetime(row['created_at']),
+            'updated_at': _datetime(row['updated_at']),
+        }
+
+
+class FastLodgingSerializer(ValuesSerializer):
+    """Same output as LodgingSerializer"""
+    model = Lodging
+    columns = (
+        'id', 'name', 'type', 'place', 'latitude', 'longitude', 'destination_id',
+        'phone', 'email', 'website', 'min_price', 'max_price', 'rating', 'amenities',
+        'booking_link', 'availability', 'created_at', 'updated_at'
+    )
+    relations = {
+        'rooms': ('room_type', 'price', 'capacity', 'amenities'),
+        'photos': ('photo', 'caption'),
+    }
+    photo_field = LodgingPhoto._meta.get_field('photo')
+    rating_exponent = Decimal('.1') ** Lodging._meta.get_field('rating').decimal_places
+
+    def to_representation(self, row, related):
+        location = {
+            'place': row['place'],
+            'coordinates': {'lat': row['latitude'], 'lng': row['longitude']},
+        }
+        if row['destination_id']:
+            location['destination_id'] = row['destination_id']
+
+        contact = {}
+        if row['phone']:
+            contact['phone'] = row['phone']
+        if row['email']:
+            contact['email'] = row['email']
+        if row['website']:
+            contact['website'] = row['website']
+
+        return {
+            'id': row['id'],
+            'name': row['name'],
+            'type': row['type'],
+            'location': location,
+            'contact': contact,
+            'price_range': {'min': row['min_price'], 'max': row['max_price'], 'currency': 'NPR'},
+            'rooms': [
+                {
+                    'room_type': room['room_type'],
+                    'price': room['price'],
+                    'capacity': room['capacity'],
+                    'amenities': room['amenities'],
+                }
+                for room in related['rooms'].get(row['pk'], ())
+            ],
+            'rating': _decimal(row['rating'], self.rating_exponent),
+            'amenities': row['amenities'],
+            'booking_link': row['booking_link'],
+            'availability': row['availability'],
+            'photos': [
+                {
+                    'photo': self.image_url(self.photo_field, photo['photo']),
+                    'caption': photo['caption'],
+                }
+                for photo in related['photos'].get(row['pk'], ())
+            ],
+            'created_at': _datetime(row['created_at']),
+            'updated_at': _datetime(row['updated_at']),
+        }
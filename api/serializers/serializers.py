@@ -8,6 +8,61 @@ from ..models import (
 )
 from django.contrib.auth.models import User
 from django.contrib.auth.password_validation import validate_password
+from ..services.usage import UsageService
+
+
+class DynamicFieldsModelSerializer(serializers.ModelSerializer):
+    """
+    ModelSerializer whose output can be narrowed per request.
+
+    `fields` limits the output to the named fields, `expand` adds nested
+    relations (Meta.expandable_fields) to such a selection and `omit` drops
+    fields; without any of them every field in Meta.fields is serialized.
+    Meta.field_sources names the model columns read by computed fields and
+    Meta.expandable_fields the prefetches each nested relation needs, so
+    views can load only what a selection uses.
+    """
+
+    def __init__(self, *args, fields=None, omit=None, expand=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields or omit:
+            selected = set(self.select_fields(fields, omit, expand))
+            for name in list(self.fields):
+                if name not in selected:
+                    self.fields.pop(name)
+
+    @classmethod
+    def select_fields(cls, fields=None, omit=None, expand=None):
+        """Names of the fields serialized for a selection, in Meta.fields order"""
+        requested = set(fields or ()) | set(expand or ())
+        omit = set(omit or ())
+        return [
+            name for name in cls.Meta.fields
+            if (not fields or name in requested) and name not in omit
+        ]
+
+    @classmethod
+    def get_model_columns(cls, selected):
+        """Model fields the selected fields read, or None when some can't be told"""
+        model = cls.Meta.model
+        expandable = getattr(cls.Meta, 'expandable_fields', {})
+        sources = getattr(cls.Meta, 'field_sources', {})
+        concrete = {field.name for field in model._meta.concrete_fields}
+        columns = {model._meta.pk.name}
+        for name in selected:
+            if name in expandable:
+                continue
+            names = sources.get(name, (name,))
+            if not concrete.issuperset(names):
+                return None
+            columns.update(names)
+        return columns
+
+    @classmethod
+    def get_prefetch_paths(cls, selected):
+        """Prefetch paths needed by the nested relations among the selected fields"""
+        expandable = getattr(cls.Meta, 'expandable_fields', {})
+        return {path for name in selected for path in expandable.get(name, ())}
 
 class UserRegistrationSerializer(serializers.ModelSerializer):
     password = serializers.CharField(write_only=True, required=True, validators=[validate_password])
@@ -37,8 +92,7 @@ class UserProfileSerializer(serializers.ModelSerializer):
         read_only_fields = ('id', 'date_joined', 'last_login', 'api_usage')
         
     def get_api_usage(self, obj):
-        # You can implement your API usage tracking here
-        return {'total_calls': 0}  # Placeholder for now
+        return UsageService.get_user_usage(obj)
 
 class DestinationPhotoSerializer(serializers.ModelSerializer):
     class Meta:
@@ -46,7 +100,7 @@ class DestinationPhotoSerializer(serializers.ModelSerializer):
         fields = ['photo', 'caption', 'is_primary']
 
 
-class DestinationSerializer(serializers.ModelSerializer):
+class DestinationSerializer(DynamicFieldsModelSerializer):
     photos = DestinationPhotoSerializer(many=True, read_only=True)
     coordinates = serializers.SerializerMethodField()
     elevation = serializers.SerializerMethodField()
@@ -58,6 +112,11 @@ class DestinationSerializer(serializers.ModelSerializer):
             'duration', 'coordinates', 'elevation', 'best_season', 
             'permits_required', 'highlights', 'photos', 'created_at', 'updated_at'
         ]
+        expandable_fields = {'photos': ('photos',)}
+        field_sources = {
+            'coordinates': ('latitude', 'longitude'),
+            'elevation': ('max_elevation', 'min_elevation'),
+        }
     
     def get_coordinates(self, obj):
         if obj.latitude and obj.longitude:
@@ -88,7 +147,7 @@ class LodgingPhotoSerializer(serializers.ModelSerializer):
         fields = ['photo', 'caption']
 
 
-class LodgingSerializer(serializers.ModelSerializer):
+class LodgingSerializer(DynamicFieldsModelSerializer):
     rooms = RoomSerializer(many=True, read_only=True)
     photos = LodgingPhotoSerializer(many=True, read_only=True)
     location = serializers.SerializerMethodField()
@@ -102,6 +161,12 @@ class LodgingSerializer(serializers.ModelSerializer):
             'rooms', 'rating', 'amenities', 'booking_link', 'availability',
             'photos', 'created_at', 'updated_at'
         ]
+        expandable_fields = {'rooms': ('rooms',), 'photos': ('photos',)}
+        field_sources = {
+            'location': ('place', 'latitude', 'longitude', 'destination'),
+            'contact': ('phone', 'email', 'website'),
+            'price_range': ('min_price', 'max_price'),
+        }
     
     def get_location(self, obj):
         location_data = {
@@ -112,8 +177,8 @@ class LodgingSerializer(serializers.ModelSerializer):
             }
         }
         
-        if obj.destination:
-            location_data['destination_id'] = obj.destination.id
+        if obj.destination_id:
+            location_data['destination_id'] = obj.destination_id
             
         return location_data
     
@@ -141,7 +206,7 @@ class GuideReviewSerializer(serializers.ModelSerializer):
         fields = ['user_name', 'rating', 'comment', 'date']
 
 
-class GuideSerializer(serializers.ModelSerializer):
+class GuideSerializer(DynamicFieldsModelSerializer):
     reviews = GuideReviewSerializer(many=True, read_only=True)
     contact = serializers.SerializerMethodField()
     daily_rate = serializers.SerializerMethodField()
@@ -153,6 +218,10 @@ class GuideSerializer(serializers.ModelSerializer):
             'experience_years', 'specialization', 'rating', 'reviews',
             'photo', 'available', 'daily_rate', 'created_at', 'updated_at'
         ]
+        expandable_fields = {'reviews': ('reviews',)}
+        field_sources = {
+            'contact': ('phone', 'email'),
+        }
     
     def get_contact(self, obj):
         contact_data = {}
@@ -175,7 +244,7 @@ class AgencyReviewSerializer(serializers.ModelSerializer):
         fields = ['user_name', 'rating', 'comment', 'date']
 
 
-class AgencySerializer(serializers.ModelSerializer):
+class AgencySerializer(DynamicFieldsModelSerializer):
     reviews = AgencyReviewSerializer(many=True, read_only=True)
     contact = serializers.SerializerMethodField()
     
@@ -185,6 +254,10 @@ class AgencySerializer(serializers.ModelSerializer):
             'id', 'name', 'license_id', 'address', 'contact', 'regions',
             'services', 'rating', 'reviews', 'logo', 'created_at', 'updated_at'
         ]
+        expandable_fields = {'reviews': ('reviews',)}
+        field_sources = {
+            'contact': ('phone', 'email', 'website'),
+        }
     
     def get_contact(self, obj):
         contact_data = {
@@ -196,12 +269,15 @@ class AgencySerializer(serializers.ModelSerializer):
         return contact_data
 
 
-class IssuingOfficeSerializer(serializers.ModelSerializer):
+class IssuingOfficeSerializer(DynamicFieldsModelSerializer):
     coordinates = serializers.SerializerMethodField()
     
     class Meta:
         model = IssuingOffice
         fields = ['name', 'address', 'coordinates', 'hours', 'phone', 'website']
+        field_sources = {
+            'coordinates': ('latitude', 'longitude'),
+        }
     
     def get_coordinates(self, obj):
         return {
@@ -216,7 +292,7 @@ class PermitFeeSerializer(serializers.ModelSerializer):
         fields = ['nationality', 'amount', 'currency']
 
 
-class PermitSerializer(serializers.ModelSerializer):
+class PermitSerializer(DynamicFieldsModelSerializer):
     fees = PermitFeeSerializer(many=True, read_only=True)
     issuing_offices = serializers.SerializerMethodField()
     
@@ -227,6 +303,7 @@ class PermitSerializer(serializers.ModelSerializer):
             'issuing_offices', 'application_process', 'online_application', 'validity',
             'created_at', 'updated_at'
         ]
+        expandable_fields = {'fees': ('fees',), 'issuing_offices': ('issuing_offices__office',)}
     
     def get_issuing_offices(self, obj):
         permit_offices = obj.issuing_offices.all()
@@ -248,7 +325,7 @@ class EventPhotoSerializer(serializers.ModelSerializer):
         fields = ['photo', 'caption']
 
 
-class EventSerializer(serializers.ModelSerializer):
+class EventSerializer(DynamicFieldsModelSerializer):
     photos = EventPhotoSerializer(many=True, read_only=True)
     links = EventLinkSerializer(many=True, read_only=True)
     location = serializers.SerializerMethodField()
@@ -260,6 +337,10 @@ class EventSerializer(serializers.ModelSerializer):
             'description', 'significance', 'activities', 'photos', 'links',
             'created_at', 'updated_at'
         ]
+        expandable_fields = {'photos': ('photos',), 'links': ('links',)}
+        field_sources = {
+            'location': ('city', 'venue', 'latitude', 'longitude'),
+        }
     
     def get_location(self, obj):
         return {
@@ -286,7 +367,7 @@ class TrailSegmentSerializer(serializers.ModelSerializer):
         fields = ['segment', 'status', 'description', 'alerts']
 
 
-class TrailStatusSerializer(serializers.ModelSerializer):
+class TrailStatusSerializer(DynamicFieldsModelSerializer):
     conditions = TrailSegmentSerializer(many=True, read_only=True)
     last_updated = serializers.SerializerMethodField()  # Define as SerializerMethodField
     
@@ -296,13 +377,17 @@ class TrailStatusSerializer(serializers.ModelSerializer):
             'id', 'name', 'region', 'status', 'conditions', 'source',
             'last_updated'
         ]
+        expandable_fields = {'conditions': ('conditions', 'conditions__alerts')}
+        field_sources = {
+            'last_updated': ('updated_at',),
+        }
     
     # This method should be outside of Meta class
     def get_last_updated(self, obj):
         return obj.updated_at
 
 
-class WeatherForecastSerializer(serializers.ModelSerializer):
+class WeatherForecastSerializer(DynamicFieldsModelSerializer):
     class Meta:
         model = WeatherForecast
         fields = [
@@ -326,7 +411,7 @@ class NationalityStatSerializer(serializers.ModelSerializer):
         fields = ['nationality', 'count', 'percentage']
 
 
-class TourismStatSerializer(serializers.ModelSerializer):
+class TourismStatSerializer(DynamicFieldsModelSerializer):
     nationality_breakdown = NationalityStatSerializer(many=True, read_only=True)
     purpose_breakdown = PurposeStatSerializer(many=True, read_only=True)
     period = serializers.SerializerMethodField()
@@ -338,6 +423,13 @@ class TourismStatSerializer(serializers.ModelSerializer):
             'fastest_growing_market', 'fastest_growing_percentage',
             'nationality_breakdown', 'purpose_breakdown', 'period'
         ]
+        expandable_fields = {
+            'nationality_breakdown': ('nationality_breakdown',),
+            'purpose_breakdown': ('purpose_breakdown',),
+        }
+        field_sources = {
+            'period': ('year', 'month'),
+        }
     
     def get_period(self, obj):
         if obj.month:
@@ -346,7 +438,7 @@ class TourismStatSerializer(serializers.ModelSerializer):
     
 
 
-class WeatherDataSerializer(serializers.ModelSerializer):
+class WeatherDataSerializer(DynamicFieldsModelSerializer):
     location_coordinates = serializers.SerializerMethodField()
     
     class Meta:
@@ -357,6 +449,9 @@ class WeatherDataSerializer(serializers.ModelSerializer):
             'wind_direction', 'precipitation', 'humidity', 'pressure', 
             'visibility', 'uv_index'
         ]
+        field_sources = {
+            'location_coordinates': ('latitude', 'longitude'),
+        }
     
     def get_location_coordinates(self, obj):
         return {
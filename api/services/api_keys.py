@@ -0,0 +1,103 @@
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from ..models import APIKey
+from .background import PeriodicFlusher
+from .caching import is_shared_cache
+
+# Cache keys and durations
+API_KEY_CACHE_KEY = "api_key_{key}"
+API_KEY_CACHE_DURATION = 60 * 5  # 5 minutes
+# Seconds a worker may keep using a key revoked in another worker; a revoke
+# clears the shared cache, so this only bounds staleness when it is shared
+API_KEY_LOCAL_CACHE_DURATION = 10
+LAST_USED_FLUSH_INTERVAL = 30  # seconds
+LAST_USED_FLUSH_BATCH_SIZE = 500
+
+# Per-process state: recently resolved keys and unflushed last_used timestamps
+_local_keys = {}
+_pending_last_used = {}
+_lock = threading.Lock()
+
+
+class APIKeyService:
+    """
+    Service for resolving API keys on the request path.
+
+    Keys are looked up through a short-lived in-process cache backed by the
+    shared cache, and `last_used` is coalesced in memory and written back in
+    one batched UPDATE by a background flusher, so a request carrying an API
+    key normally costs no database round-trip at all.
+    """
+
+    @staticmethod
+    def get_active_key(key):
+        """
+        Get the active APIKey for a key string, or None.
+        First tries the process cache, then the shared cache, then the database.
+        """
+        now = time.monotonic()
+        local = _local_keys.get(key)
+        if local and local[1] > now:
+            return local[0]
+
+        cache_key = API_KEY_CACHE_KEY.format(key=key)
+        key_object = cache.get(cache_key)
+        if key_object is None:
+            try:
+                key_object = APIKey.objects.get(key=key, is_active=True)
+            except APIKey.DoesNotExist:
+                return None
+            cache.set(cache_key, key_object, APIKeyService._shared_cache_duration())
+
+        local_duration = getattr(settings, 'API_KEY_LOCAL_CACHE_DURATION', API_KEY_LOCAL_CACHE_DURATION)
+        _local_keys[key] = (key_object, now + local_duration)
+        return key_object
+
+    @staticmethod
+    def _shared_cache_duration():
+        # A per-process cache is only cleared in the process that handled the
+        # revoke (api.checks rejects one), so keep its entries as short as the local ones
+        if is_shared_cache():
+            return API_KEY_CACHE_DURATION
+        return getattr(settings, 'API_KEY_LOCAL_CACHE_DURATION', API_KEY_LOCAL_CACHE_DURATION)
+
+    @staticmethod
+    def invalidate(key):
+        """Forget a cached key, e.g. after it was revoked or edited"""
+        _local_keys.pop(key, None)
+        cache.delete(API_KEY_CACHE_KEY.format(key=key))
+
+    @staticmethod
+    def record_use(key):
+        """Remember that a key was used; the timestamp is written by the flusher"""
+        with _lock:
+            _pending_last_used[key] = timezone.now()
+        _flusher.ensure_started()
+
+    @staticmethod
+    def flush_last_used():
+        """Write all pending last_used timestamps in batched UPDATEs"""
+        global _pending_last_used
+        with _lock:
+            pending, _pending_last_used = _pending_last_used, {}
+        if not pending:
+            return 0
+
+        APIKey.objects.bulk_update(
+            [APIKey(key=key, last_used=last_used) for key, last_used in pending.items()],
+            ['last_used'],
+            batch_size=LAST_USED_FLUSH_BATCH_SIZE
+        )
+        return len(pending)
+
+
+_flusher = PeriodicFlusher(
+    'api-key-last-used-flusher',
+    APIKeyService.flush_last_used,
+    lambda: getattr(settings, 'API_KEY_LAST_USED_FLUSH_INTERVAL', LAST_USED_FLUSH_INTERVAL)
+)
@@ -0,0 +1,45 @@
+import atexit
+import logging
+import threading
+import time
+
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+
+class PeriodicFlusher:
+    """
+    Daemon thread that calls `func` every `interval` seconds, and once more
+    at interpreter exit. Used to write coalesced request-path state (API key
+    last_used, usage counters) back to the database in batches.
+    """
+
+    def __init__(self, name, func, interval):
+        self.name = name
+        self.func = func
+        self.interval = interval
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def ensure_started(self):
+        """Start the thread on first use; cheap to call on every request"""
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+                atexit.register(self.func)
+
+    def _run(self):
+        interval = self.interval() if callable(self.interval) else self.interval
+        while True:
+            time.sleep(interval)
+            try:
+                self.func()
+            except Exception as e:
+                logger.exception(f"Error in background flusher {self.name}: {e}")
+            finally:
+                # Don't hold an idle connection open from this thread
+                connection.close()
@@ -0,0 +1,53 @@
+import math
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+
+# Cache keys
+CACHE_VERSION_KEY = "cache_version_{model}"
+
+
+class CacheVersionService:
+    """
+    Service for versioned, per-model cache namespaces.
+
+    Cached responses embed the current version of every model they were built
+    from in their keys. Saving or deleting a row bumps its model's version
+    (see api.signals), so older entries are simply never read again and can
+    be given long timeouts without ever being served stale.
+
+    Versions are nanosecond timestamps of the last change, which also makes
+    them usable as Last-Modified validators.
+    """
+
+    @staticmethod
+    def _key(model):
+        return CACHE_VERSION_KEY.format(model=model._meta.label_lower)
+
+    @staticmethod
+    def get_versions(models):
+        """Return the current version of each model, in one cache round-trip"""
+        keys = [CacheVersionService._key(model) for model in models]
+        versions = cache.get_many(keys)
+        missing = {key: time.time_ns() for key in keys if key not in versions}
+        for key, version in missing.items():
+            # An evicted version restarts at "now": never an old value, and never too early a Last-Modified
+            cache.add(key, version, None)
+        if missing:
+            versions.update(cache.get_many(list(missing)))
+        return tuple(versions.get(key, 0) for key in keys)
+
+    @staticmethod
+    def bump(model):
+        """Move a model to a new namespace once the current transaction commits"""
+        transaction.on_commit(lambda: CacheVersionService._bump(model))
+
+    @staticmethod
+    def _bump(model):
+        cache.set(CacheVersionService._key(model), time.time_ns(), None)
+
+    @staticmethod
+    def last_modified(versions):
+        """Epoch seconds of the latest change among the given versions, rounded up"""
+        return math.ceil(max(versions) / 1e9)
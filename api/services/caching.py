@@ -0,0 +1,198 @@
+import asyncio
+import logging
+import math
+import random
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS, cache
+
+logger = logging.getLogger(__name__)
+
+# Cache keys and durations
+LOCK_CACHE_KEY = "lock_{key}"
+LOCK_TIMEOUT = 30  # seconds, bounds how long a crashed worker can hold a refresh
+LOCK_WAIT_TIMEOUT = 5  # seconds a caller with nothing to serve waits for the lock holder
+LOCK_POLL_INTERVAL = 0.05  # seconds
+EARLY_REFRESH_BETA = 1.0  # > 1 refreshes earlier, < 1 later
+
+# Backends whose entries only exist inside the process that wrote them
+PER_PROCESS_CACHE_BACKENDS = ('django.core.cache.backends.locmem.LocMemCache',)
+
+
+def is_shared_cache(alias=DEFAULT_CACHE_ALIAS):
+    """Whether every process sees the entries of the `alias` cache (see api.checks)"""
+    return settings.CACHES[alias]['BACKEND'] not in PER_PROCESS_CACHE_BACKENDS
+
+
+class StampedeCache:
+    """
+    Cache helper that protects expensive loads from thundering herds.
+
+    Values are stored as (value, soft expiry, load time) envelopes that
+    outlive their soft expiry by a grace period. On read:
+
+    - each caller may refresh a value shortly *before* it expires, with a
+      probability that rises as expiry nears and with how slow the load is
+      (probabilistic early refresh), so popular keys rarely expire at all;
+    - only the caller holding a short cache lock recomputes (single flight);
+    - everyone else keeps getting the previous value until the new one is
+      stored (stale-while-revalidate), and only callers with nothing to serve
+      wait briefly for the lock holder.
+
+    Both the lock and serve-stale only work across processes with a shared
+    cache backend (e.g. Redis): under a per-process cache such as
+    LocMemCache each process takes its own lock, and a value refreshed by
+    another process (say the run_jobs worker) is never seen until the
+    local entry expires. api.checks therefore rejects per-process caches.
+
+    None (e.g. a failed API call) is never cached, while empty results are.
+    When a refresh returns None or raises, callers keep getting the previous
+    value if there is one.
+
+    `aget_or_compute` is the same protocol for async callers, over the same
+    cache entries.
+    """
+
+    @staticmethod
+    def get_or_compute(key, compute, timeout, stale_timeout=None):
+        """Get a cached value, computing it at most once at a time across workers"""
+        entry = cache.get(key)
+        if entry is not None and not StampedeCache._should_refresh(entry):
+            return entry[0]
+
+        lock_key = LOCK_CACHE_KEY.format(key=key)
+        token = uuid.uuid4().hex
+        if cache.add(lock_key, token, LOCK_TIMEOUT):
+            return StampedeCache._compute_and_store(key, lock_key, token, compute, timeout, stale_timeout, entry)
+
+        if entry is not None:
+            logger.debug(f"Serving stale {key} while another worker refreshes it")
+            return entry[0]
+
+        # Cold key: wait for the worker that holds the lock instead of piling on
+        deadline = time.monotonic() + LOCK_WAIT_TIMEOUT
+        while time.monotonic() < deadline:
+            time.sleep(LOCK_POLL_INTERVAL)
+            entry = cache.get(key)
+            if entry is not None:
+                return entry[0]
+            if cache.add(lock_key, token, LOCK_TIMEOUT):
+                return StampedeCache._compute_and_store(key, lock_key, token, compute, timeout, stale_timeout, None)
+
+        logger.warning(f"Timed out waiting for {key} to be refreshed, computing it directly")
+        return compute()
+
+    @staticmethod
+    async def aget_or_compute(key, compute, timeout, stale_timeout=None):
+        """get_or_compute for async callers: `compute` returns an awaitable and waiting yields to the event loop"""
+        entry = await cache.aget(key)
+        if entry is not None and not StampedeCache._should_refresh(entry):
+            return entry[0]
+
+        lock_key = LOCK_CACHE_KEY.format(key=key)
+        token = uuid.uuid4().hex
+        if await cache.aadd(lock_key, token, LOCK_TIMEOUT):
+            return await StampedeCache._acompute_and_store(key, lock_key, token, compute, timeout, stale_timeout, entry)
+
+        if entry is not None:
+            logger.debug(f"Serving stale {key} while another worker refreshes it")
+            return entry[0]
+
+        deadline = time.monotonic() + LOCK_WAIT_TIMEOUT
+        while time.monotonic() < deadline:
+            await asyncio.sleep(LOCK_POLL_INTERVAL)
+            entry = await cache.aget(key)
+            if entry is not None:
+                return entry[0]
+            if await cache.aadd(lock_key, token, LOCK_TIMEOUT):
+                return await StampedeCache._acompute_and_store(key, lock_key, token, compute, timeout, stale_timeout, None)
+
+        logger.warning(f"Timed out waiting for {key} to be refreshed, computing it directly")
+        return await compute()
+
+    @staticmethod
+    def get(key):
+        """Get a cached value regardless of its freshness, or None"""
+        entry = cache.get(key)
+        return entry[0] if entry is not None else None
+
+    @staticmethod
+    def get_many(keys):
+        """Get the cached values of several keys that have not expired yet"""
+        now = time.time()
+        return {key: entry[0] for key, entry in cache.get_many(keys).items() if entry[1] > now}
+
+    @staticmethod
+    def set(key, value, timeout, stale_timeout=None, load_time=0.0):
+        """Store a value computed outside get_or_compute (e.g. a bulk refresh)"""
+        StampedeCache.set_many({key: value}, timeout, stale_timeout, load_time)
+
+    @staticmethod
+    def set_many(values, timeout, stale_timeout=None, load_time=0.0):
+        cache.set_many(*StampedeCache._entries(values, timeout, stale_timeout, load_time))
+
+    @staticmethod
+    async def aset_many(values, timeout, stale_timeout=None, load_time=0.0):
+        await cache.aset_many(*StampedeCache._entries(values, timeout, stale_timeout, load_time))
+
+    @staticmethod
+    def _entries(values, timeout, stale_timeout, load_time):
+        """Envelopes for set_many/aset_many, and the cache timeout that keeps them through the grace period"""
+        expires_at = time.time() + timeout
+        return (
+            {key: (value, expires_at, load_time) for key, value in values.items()},
+            timeout + (timeout if stale_timeout is None else stale_timeout)
+        )
+
+    @staticmethod
+    def _should_refresh(entry):
+        _, expires_at, load_time = entry
+        # XFetch: refresh early with probability growing as expiry approaches
+        early = load_time * EARLY_REFRESH_BETA * -math.log(1.0 - random.random())
+        return time.time() + early >= expires_at
+
+    @staticmethod
+    def _compute_and_store(key, lock_key, token, compute, timeout, stale_timeout, entry):
+        try:
+            started = time.monotonic()
+            try:
+                value = compute()
+            except Exception:
+                if entry is None:
+                    raise
+                logger.exception(f"Refreshing {key} raised, serving the previous value")
+                return entry[0]
+            load_time = time.monotonic() - started
+            if value is not None:
+                StampedeCache.set(key, value, timeout, stale_timeout, load_time)
+            elif entry is not None:
+                logger.warning(f"Refreshing {key} failed, serving the previous value")
+                return entry[0]
+            return value
+        finally:
+            if cache.get(lock_key) == token:
+                cache.delete(lock_key)
+
+    @staticmethod
+    async def _acompute_and_store(key, lock_key, token, compute, timeout, stale_timeout, entry):
+        try:
+            started = time.monotonic()
+            try:
+                value = await compute()
+            except Exception:
+                if entry is None:
+                    raise
+                logger.exception(f"Refreshing {key} raised, serving the previous value")
+                return entry[0]
+            load_time = time.monotonic() - started
+            if value is not None:
+                await StampedeCache.aset_many({key: value}, timeout, stale_timeout, load_time)
+            elif entry is not None:
+                logger.warning(f"Refreshing {key} failed, serving the previous value")
+                return entry[0]
+            return value
+        finally:
+            if await cache.aget(lock_key) == token:
+                await cache.adelete(lock_key)
@@ -0,0 +1,56 @@
+import math
+
+from django.db.models import ExpressionWrapper, F, FloatField, Value
+from django.db.models.functions import ASin, Cast, Cos, Least, Power, Radians, Sin, Sqrt
+
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE_LATITUDE = 111.045
+
+
+class GeoService:
+    """Service for proximity queries on models with latitude/longitude columns"""
+
+    @staticmethod
+    def bounding_box(lat, lng, radius_km):
+        """Return (min_lat, max_lat, min_lng, max_lng) enclosing a circle around a point"""
+        lat_delta = radius_km / KM_PER_DEGREE_LATITUDE
+        # Degrees of longitude shrink towards the poles
+        cos_lat = max(math.cos(math.radians(lat)), 1e-6)
+        lng_delta = min(180.0, radius_km / (KM_PER_DEGREE_LATITUDE * cos_lat))
+        return lat - lat_delta, lat + lat_delta, lng - lng_delta, lng + lng_delta
+
+    @staticmethod
+    def distance_expression(lat, lng):
+        """Haversine great-circle distance in km from a point to each row"""
+        row_lat = Cast(F('latitude'), FloatField())
+        row_lng = Cast(F('longitude'), FloatField())
+        a = (
+            Power(Sin(Radians(row_lat - Value(lat)) / 2.0), 2)
+            + Cos(Radians(Value(lat))) * Cos(Radians(row_lat)) * Power(Sin(Radians(row_lng - Value(lng)) / 2.0), 2)
+        )
+        return ExpressionWrapper(
+            2.0 * EARTH_RADIUS_KM * ASin(Least(Sqrt(a), Value(1.0))),
+            output_field=FloatField()
+        )
+
+    @staticmethod
+    def nearby(queryset, lat, lng, radius_km):
+        """
+        Filter a queryset to rows within `radius_km` of a point, annotated
+        with `distance_km` and ordered nearest first.
+
+        A bounding box on the indexed (latitude, longitude) columns narrows
+        the candidates before the haversine distance is computed, so only
+        rows near the point are ever evaluated.
+        """
+        min_lat, max_lat, min_lng, max_lng = GeoService.bounding_box(lat, lng, radius_km)
+        return queryset.filter(
+            latitude__gte=min_lat,
+            latitude__lte=max_lat,
+            longitude__gte=min_lng,
+            longitude__lte=max_lng,
+        ).annotate(
+            distance_km=GeoService.distance_expression(lat, lng)
+        ).filter(
+            distance_km__lte=radius_km
+        ).order_by('distance_km', 'pk')
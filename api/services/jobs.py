@@ -0,0 +1,215 @@
+import logging
+import random
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from ..models import Job, JobSchedule
+
+logger = logging.getLogger(__name__)
+
+# Retries and locking
+JOB_MAX_ATTEMPTS = 5
+JOB_RETRY_BACKOFF = 30  # seconds before the first retry, doubled for each further one
+JOB_RETRY_BACKOFF_MAX = 60 * 60  # 1 hour
+JOB_LOCK_TIMEOUT = 60 * 30  # seconds before a running job whose worker died is requeued
+JOB_RETENTION_DAYS = 7  # finished jobs are pruned after this many days
+
+# Periodic jobs: name -> task, payload and interval (seconds)
+JOB_SCHEDULE = {
+    'refresh-weather': {'task': 'weather.refresh', 'interval': 60 * 30},
+    'import-trails': {'task': 'trails.import', 'interval': 60 * 60},
+    'maintain-weather-partitions': {'task': 'weather.partitions', 'interval': 60 * 60 * 24},
+    'prune-jobs': {'task': 'jobs.prune', 'interval': 60 * 60 * 24},
+}
+
+# Task name -> function, filled by @job_task (see api.tasks)
+JOB_TASKS = {}
+
+
+def job_task(name):
+    """Register a function as the task run for jobs named `name`"""
+    def register(func):
+        JOB_TASKS[name] = func
+        return func
+    return register
+
+
+class JobService:
+    """
+    Service for the database-backed background job queue.
+
+    Request handlers enqueue a job and return; `manage.py run_jobs` workers
+    claim due jobs with SELECT ... FOR UPDATE SKIP LOCKED, so any number of
+    workers can share the queue. Failed jobs are retried with exponential
+    backoff and jitter up to `max_attempts`. A `dedup_key` keeps at most one
+    queued job per key; one enqueued while its twin is running is kept, so
+    work triggered by newer changes isn't lost. Workers also enqueue the
+    periodic jobs of JOB_SCHEDULE (or settings.JOB_SCHEDULE) when they fall due.
+    """
+
+    @staticmethod
+    def enqueue(task, payload=None, dedup_key=None, run_at=None, max_attempts=None):
+        """
+        Queue a job, or return the job already queued under `dedup_key`.
+        The job is part of the current transaction, so it only becomes
+        visible to workers if that transaction commits.
+        """
+        if task not in JOB_TASKS:
+            raise ValueError(f"Unknown job task '{task}'")
+
+        job = Job(
+            task=task,
+            payload=payload or {},
+            dedup_key=dedup_key,
+            run_at=run_at or timezone.now(),
+            max_attempts=max_attempts or getattr(settings, 'JOB_MAX_ATTEMPTS', JOB_MAX_ATTEMPTS),
+        )
+        if dedup_key is None:
+            job.save()
+            return job
+
+        try:
+            with transaction.atomic():
+                job.save()
+            return job
+        except IntegrityError:
+            existing = Job.objects.filter(dedup_key=dedup_key, status='queued').first()
+            if existing is None:
+                # The other job was claimed in the meantime
+                return JobService.enqueue(task, payload, dedup_key, run_at, max_attempts)
+            logger.debug(f"Job {task} already queued as #{existing.pk} under {dedup_key}")
+            return existing
+
+    @staticmethod
+    def claim(worker):
+        """Lock the oldest due job for `worker` and mark it running, or return None"""
+        with transaction.atomic():
+            job = Job.objects.select_for_update(skip_locked=True).filter(
+                status='queued',
+                run_at__lte=timezone.now()
+            ).order_by('run_at', 'id').first()
+            if job is None:
+                return None
+
+            job.status = 'running'
+            job.attempts += 1
+            job.locked_by = worker
+            job.locked_at = timezone.now()
+            job.save(update_fields=['status', 'attempts', 'locked_by', 'locked_at'])
+            return job
+
+    @staticmethod
+    def run(job):
+        """Run a claimed job, then record its success, schedule its retry or mark it failed"""
+        func = JOB_TASKS.get(job.task)
+        try:
+            if func is None:
+                raise LookupError(f"No task registered as '{job.task}'")
+            func(**job.payload)
+        except Exception as e:
+            JobService._fail(job, e)
+            return False
+
+        job.status = 'succeeded'
+        job.finished_at = timezone.now()
+        job.last_error = ''
+        job.save(update_fields=['status', 'finished_at', 'last_error'])
+        return True
+
+    @staticmethod
+    def _fail(job, error):
+        job.last_error = ''.join(traceback.format_exception(error))
+        if job.attempts >= job.max_attempts:
+            job.status = 'failed'
+            job.finished_at = timezone.now()
+            logger.error(f"Job {job.task} #{job.pk} failed after {job.attempts} attempts: {error}")
+            job.save(update_fields=['status', 'finished_at', 'last_error'])
+            return
+
+        delay = JobService.retry_delay(job.attempts)
+        job.status = 'queued'
+        job.run_at = timezone.now() + timedelta(seconds=delay)
+        try:
+            with transaction.atomic():
+                job.save(update_fields=['status', 'run_at', 'last_error'])
+        except IntegrityError:
+            # A twin was queued under the same dedup_key meanwhile and will do the same work
+            job.status = 'failed'
+            job.finished_at = timezone.now()
+            job.save(update_fields=['status', 'finished_at', 'last_error'])
+            logger.warning(f"Job {job.task} #{job.pk} failed, superseded by a queued job: {error}")
+            return
+        logger.warning(
+            f"Job {job.task} #{job.pk} failed (attempt {job.attempts}/{job.max_attempts}), "
+            f"retrying in {delay:.0f}s: {error}"
+        )
+
+    @staticmethod
+    def retry_delay(attempts):
+        """Seconds before retrying after `attempts` failures: exponential, capped, with full jitter"""
+        base = getattr(settings, 'JOB_RETRY_BACKOFF', JOB_RETRY_BACKOFF)
+        cap = getattr(settings, 'JOB_RETRY_BACKOFF_MAX', JOB_RETRY_BACKOFF_MAX)
+        ceiling = min(cap, base * 2 ** (attempts - 1))
+        # Full jitter keeps jobs that failed together from retrying together
+        return random.uniform(ceiling / 2, ceiling)
+
+    @staticmethod
+    def requeue_stale():
+        """Requeue running jobs whose worker stopped responding before finishing them"""
+        timeout = getattr(settings, 'JOB_LOCK_TIMEOUT', JOB_LOCK_TIMEOUT)
+        now = timezone.now()
+        stale = Job.objects.filter(status='running', locked_at__lt=now - timedelta(seconds=timeout))
+        requeued = 0
+        # One by one: each may clash with a twin queued under its dedup_key
+        for pk in stale.values_list('pk', flat=True):
+            job = Job.objects.filter(pk=pk, status='running')
+            try:
+                with transaction.atomic():
+                    requeued += job.update(status='queued', run_at=now, locked_by='')
+            except IntegrityError:
+                job.update(status='failed', finished_at=now, last_error='Worker stopped; superseded by a queued job')
+        if requeued:
+            logger.warning(f"Requeued {requeued} jobs left running by a stopped worker")
+        return requeued
+
+    @staticmethod
+    def schedule_due():
+        """Enqueue the periodic jobs that are due; each is enqueued by one worker only"""
+        schedule = getattr(settings, 'JOB_SCHEDULE', JOB_SCHEDULE)
+        now = timezone.now()
+        JobSchedule.objects.bulk_create(
+            [JobSchedule(name=name, next_run_at=now) for name in schedule],
+            ignore_conflicts=True
+        )
+
+        enqueued = []
+        with transaction.atomic():
+            due = JobSchedule.objects.select_for_update(skip_locked=True).filter(
+                name__in=list(schedule),
+                next_run_at__lte=now
+            )
+            for entry in due:
+                spec = schedule[entry.name]
+                JobService.enqueue(spec['task'], spec.get('payload'), dedup_key=f"schedule:{entry.name}")
+                interval = timedelta(seconds=spec['interval'])
+                entry.next_run_at += interval
+                if entry.next_run_at <= now:
+                    # Skip missed runs rather than catching up on them
+                    entry.next_run_at = now + interval
+                entry.save(update_fields=['next_run_at'])
+                enqueued.append(entry.name)
+        return enqueued
+
+    @staticmethod
+    def prune(days=None):
+        """Delete succeeded and failed jobs that finished more than `days` days ago"""
+        days = getattr(settings, 'JOB_RETENTION_DAYS', JOB_RETENTION_DAYS) if days is None else days
+        deleted, _ = Job.objects.filter(
+            status__in=['succeeded', 'failed'],
+            finished_at__lt=timezone.now() - timedelta(days=days)
+        ).delete()
+        return deleted
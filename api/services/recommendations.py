@@ -1,58 +1,199 @@
 # A ML service for recommendations
 
+import logging
+from datetime import timedelta
+from pathlib import Path
+
+import numpy as np
 import pandas as pd
-from sklearn.metrics.pairwise import cosine_similarity
+from django.conf import settings
+from django.db.models import BooleanField, ExpressionWrapper, Q
+from django.utils import timezone
 from sklearn.feature_extraction.text import TfidfVectorizer
-from django.core.cache import cache
+
+from .jobs import JobService
+
+logger = logging.getLogger(__name__)
+
+# Defaults
+SIMILARITY_INDEX_TOP_K = 20
+SIMILARITY_INDEX_CHUNK_SIZE = 512  # rows of the similarity matrix computed at once
+SIMILARITY_INDEX_REBUILD_DELAY = 60  # seconds of edits batched into one rebuild
+SIMILARITY_INDEX_DEDUP_KEY = "similarity-index"
+
 
 class RecommendationService:
+    """
+    Content-based destination recommendations.
+
+    Similarities are precomputed into a top-K neighbour index (destination
+    ids plus a K-wide matrix of neighbour positions and scores) that is
+    stored as a compressed NumPy artifact on disk and kept loaded in each
+    process, so a recommendation request is an O(K) lookup instead of a
+    TF-IDF refit. Requests never refit: until a queued rebuild has indexed a
+    destination, it gets destinations of the same region or type instead.
+    """
+    # (artifact mtime, index) of the copy loaded by this process
+    _loaded = (None, None)
+    # Artifact mtimes (None: no artifact yet) this process already queued a rebuild for
+    _rebuilds_requested = set()
+
     @staticmethod
     def get_destination_recommendations(destination_id, limit=5):
         """Get content-based recommendations for a destination"""
-        cache_key = f"rec_{destination_id}_{limit}"
-        cached = cache.get(cache_key)
-        if cached:
-            return cached
-            
-        # Get all destinations
         from api.models import Destination
-        destinations = Destination.objects.all()
-        
-        # Create a DataFrame
-        df = pd.DataFrame(list(destinations.values('id', 'name', 'type', 'region', 'description')))
-        
-        # Simple content-based filtering
-        df['content'] = df['name'] + ' ' + df['type'] + ' ' + df['region'] + ' ' + df['description']
-        
-        # Create TF-IDF matrix
-        tfidf = TfidfVectorizer(stop_words='english')
-        tfidf_matrix = tfidf.fit_transform(df['content'])
-        
-        # Get index of the source destination
-        idx = df[df['id'] == destination_id].index[0]
-        
-        # Compute similarity scores
-        cosine_sim = cosine_similarity(tfidf_matrix[idx].reshape(1, -1), tfidf_matrix).flatten()
-        
-        # Get top similar destinations (excluding self)
-        sim_scores = list(enumerate(cosine_sim))
-        sim_scores = sorted(sim_scores, key=lambda x: x[1], reverse=True)
-        sim_scores = [x for x in sim_scores if x[0] != idx][:limit]
-        
-        # Get indices and scores
-        indices = [i[0] for i in sim_scores]
-        ids = df.iloc[indices]['id'].tolist()
-        
+
+        index = RecommendationService.get_similarity_index()
+        position = index['positions'].get(destination_id) if index is not None else None
+
+        if position is None:
+            # No index yet, or the destination was added since it was built
+            destination = Destination.objects.filter(pk=destination_id).first()
+            if destination is None:
+                return []
+            RecommendationService._request_rebuild(index['mtime'] if index is not None else None)
+            return RecommendationService._fallback_recommendations(destination, limit)
+
+        neighbours = index['neighbours'][position][:limit]
+        ids = [str(index['ids'][i]) for i in neighbours]
+
         # Get actual destination objects
-        recommended = list(Destination.objects.filter(id__in=ids))
-        
+        recommended = list(Destination.objects.filter(id__in=ids).prefetch_related('photos'))
+
         # Sort in order of similarity
-        recommended_sorted = sorted(
-            recommended, 
-            key=lambda x: ids.index(x.id)
+        return sorted(recommended, key=lambda x: ids.index(x.id))
+
+    @staticmethod
+    def get_similarity_index():
+        """
+        Get the destination similarity index, or None until one was built.
+        First tries the copy loaded in this process, then the artifact on
+        disk. The artifact's mtime tells whether another process rebuilt it
+        since it was loaded.
+        """
+        path = RecommendationService._index_path()
+        try:
+            mtime = path.stat().st_mtime
+        except FileNotFoundError:
+            mtime = None
+
+        loaded_mtime, index = RecommendationService._loaded
+        if index is not None and loaded_mtime == mtime:
+            return index
+
+        if mtime is not None:
+            with np.load(path) as data:
+                index = RecommendationService._make_index(
+                    data['ids'], data['neighbours'], data['scores'], mtime
+                )
+            RecommendationService._loaded = (mtime, index)
+            return index
+
+        return None
+
+    @staticmethod
+    def _request_rebuild(mtime):
+        """Queue a rebuild for requests the index can't answer, once per artifact and process"""
+        if mtime in RecommendationService._rebuilds_requested:
+            return
+        RecommendationService._rebuilds_requested.add(mtime)
+        RecommendationService.schedule_rebuild()
+
+    @staticmethod
+    def _fallback_recommendations(destination, limit):
+        """Destinations sharing the region or type, same region first, while the index lacks `destination`"""
+        from api.models import Destination
+
+        return list(Destination.objects.filter(
+            Q(region=destination.region) | Q(type=destination.type)
+        ).exclude(
+            pk=destination.pk
+        ).annotate(
+            same_region=ExpressionWrapper(Q(region=destination.region), output_field=BooleanField())
+        ).order_by('-same_region', '-created_at').prefetch_related('photos')[:limit])
+
+    @staticmethod
+    def schedule_rebuild():
+        """
+        Queue a rebuild of the similarity index. It runs after a short delay,
+        and edits made until then share the same queued job, so a bulk edit
+        refits the model once.
+        """
+        delay = getattr(settings, 'RECOMMENDATION_REBUILD_DELAY', SIMILARITY_INDEX_REBUILD_DELAY)
+        return JobService.enqueue(
+            'recommendations.rebuild_index',
+            dedup_key=SIMILARITY_INDEX_DEDUP_KEY,
+            run_at=timezone.now() + timedelta(seconds=delay)
+        )
+
+    @staticmethod
+    def rebuild_similarity_index(top_k=None):
+        """Refit the TF-IDF model and store a fresh top-K neighbour index"""
+        from api.models import Destination
+
+        top_k = top_k or getattr(settings, 'RECOMMENDATION_TOP_K', SIMILARITY_INDEX_TOP_K)
+
+        # Create a DataFrame
+        df = pd.DataFrame(
+            list(Destination.objects.values('id', 'name', 'type', 'region', 'description')),
+            columns=['id', 'name', 'type', 'region', 'description']
         )
-        
-        # Cache for 24 hours
-        cache.set(cache_key, recommended_sorted, 60*60*24)
-        
-        return recommended_sorted
\ No newline at end of file
+        k = max(0, min(top_k, len(df) - 1))
+        neighbours = np.zeros((len(df), k), dtype=np.int32)
+        scores = np.zeros((len(df), k), dtype=np.float32)
+
+        if k:
+            # Simple content-based filtering
+            df['content'] = df['name'] + ' ' + df['type'] + ' ' + df['region'] + ' ' + df['description']
+
+            # Create TF-IDF matrix; rows are L2-normalised so the dot
+            # product of two rows is their cosine similarity
+            tfidf = TfidfVectorizer(stop_words='english')
+            tfidf_matrix = tfidf.fit_transform(df['content'])
+
+            for start in range(0, len(df), SIMILARITY_INDEX_CHUNK_SIZE):
+                end = min(start + SIMILARITY_INDEX_CHUNK_SIZE, len(df))
+                similarity = (tfidf_matrix[start:end] @ tfidf_matrix.T).toarray()
+
+                # Exclude each destination from its own neighbours
+                rows = np.arange(end - start)
+                similarity[rows, rows + start] = -1
+
+                # Keep the K best candidates, then order them by score
+                candidates = np.argpartition(-similarity, k - 1, axis=1)[:, :k]
+                candidate_scores = np.take_along_axis(similarity, candidates, axis=1)
+                order = np.argsort(-candidate_scores, axis=1, kind='stable')
+                neighbours[start:end] = np.take_along_axis(candidates, order, axis=1)
+                scores[start:end] = np.take_along_axis(candidate_scores, order, axis=1)
+
+        ids = np.array(df['id'].astype(str).tolist(), dtype=str)
+
+        path = RecommendationService._index_path()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write next to the artifact and swap it in so readers never see a partial file
+        tmp_path = path.with_name(f"{path.stem}.tmp.npz")
+        np.savez_compressed(tmp_path, ids=ids, neighbours=neighbours, scores=scores)
+        tmp_path.replace(path)
+
+        index = RecommendationService._make_index(ids, neighbours, scores, path.stat().st_mtime)
+        RecommendationService._loaded = (index['mtime'], index)
+
+        logger.info(f"Built destination similarity index for {len(ids)} destinations (top {k})")
+        return index
+
+    @staticmethod
+    def _make_index(ids, neighbours, scores, mtime):
+        return {
+            'ids': ids,
+            'neighbours': neighbours,
+            'scores': scores,
+            'positions': {str(dest_id): i for i, dest_id in enumerate(ids)},
+            'mtime': mtime,
+        }
+
+    @staticmethod
+    def _index_path():
+        return Path(getattr(
+            settings, 'RECOMMENDATION_INDEX_PATH',
+            Path(settings.BASE_DIR) / 'var' / 'destination_similarity.npz'
+        ))
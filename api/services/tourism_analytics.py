@@ -0,0 +1,96 @@
+import logging
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+
+from .jobs import JobService
+
+logger = logging.getLogger(__name__)
+
+# Optional inclusive year bounds shared by every series query
+YEAR_RANGE_SQL = "(%(start_year)s::integer IS NULL OR year >= %(start_year)s) AND (%(end_year)s::integer IS NULL OR year <= %(end_year)s)"
+
+# Materialized views created in migration 0015
+MONTHLY_ARRIVALS_VIEW = "api_tourism_monthly_arrivals"
+YEARLY_ARRIVALS_VIEW = "api_tourism_yearly_arrivals"
+NATIONALITY_YEARLY_VIEW = "api_tourism_nationality_yearly"
+TOP_NATIONALITIES_LIMIT = 10
+
+# Statistic edits within this many seconds share one rollup refresh
+TOURISM_ROLLUP_REFRESH_DELAY = 30
+TOURISM_ROLLUP_DEDUP_KEY = "tourism-rollups"
+
+
+class TourismAnalyticsService:
+    """
+    Service for tourism statistics series.
+
+    Series are read from materialized rollups of TourismStat and
+    NationalityStat, refreshed by a queued job after either changes (see
+    api.signals), and returned column-oriented ({"year": [...],
+    "arrivals": [...]}) so chart libraries can consume them directly.
+    """
+
+    @staticmethod
+    def schedule_refresh():
+        """Queue a rollup refresh; changes made before it runs share the same job"""
+        delay = getattr(settings, 'TOURISM_ROLLUP_REFRESH_DELAY', TOURISM_ROLLUP_REFRESH_DELAY)
+        return JobService.enqueue(
+            'tourism.refresh_rollups',
+            dedup_key=TOURISM_ROLLUP_DEDUP_KEY,
+            run_at=timezone.now() + timedelta(seconds=delay)
+        )
+
+    @staticmethod
+    def refresh():
+        """Recompute every rollup; readers keep seeing the old rows meanwhile"""
+        with connection.cursor() as cursor:
+            for view in (MONTHLY_ARRIVALS_VIEW, YEARLY_ARRIVALS_VIEW, NATIONALITY_YEARLY_VIEW):
+                cursor.execute(f"REFRESH MATERIALIZED VIEW CONCURRENTLY {view}")
+        logger.info("Refreshed tourism statistics rollups")
+
+    @staticmethod
+    def _columns(sql, params, names):
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            rows = cursor.fetchall()
+        return {name: [row[index] for row in rows] for index, name in enumerate(names)}
+
+
+    @staticmethod
+    def get_monthly_arrivals(start_year=None, end_year=None):
+        """Arrivals for every month with data, oldest first"""
+        return TourismAnalyticsService._columns(
+            f"SELECT year, month, arrivals FROM {MONTHLY_ARRIVALS_VIEW} WHERE {YEAR_RANGE_SQL} ORDER BY year, month",
+            {'start_year': start_year, 'end_year': end_year},
+            ('year', 'month', 'arrivals')
+        )
+
+    @staticmethod
+    def get_year_over_year(start_year=None, end_year=None):
+        """Yearly arrivals with the change from the previous calendar year (null when it has no data)"""
+        return TourismAnalyticsService._columns(
+            f"SELECT year, arrivals, delta, delta_percentage FROM {YEARLY_ARRIVALS_VIEW} WHERE {YEAR_RANGE_SQL} ORDER BY year",
+            {'start_year': start_year, 'end_year': end_year},
+            ('year', 'arrivals', 'delta', 'delta_percentage')
+        )
+
+    @staticmethod
+    def get_top_nationalities(start_year=None, end_year=None, limit=TOP_NATIONALITIES_LIMIT):
+        """The nationalities with the most arrivals over a range of years, with their share of the total"""
+        return TourismAnalyticsService._columns(
+            f"""
+            SELECT nationality, sum(arrivals) AS total,
+                   round(100.0 * sum(arrivals) / NULLIF(sum(sum(arrivals)) OVER (), 0), 2)
+            FROM {NATIONALITY_YEARLY_VIEW}
+            WHERE {YEAR_RANGE_SQL}
+            GROUP BY nationality
+            ORDER BY total DESC, nationality
+            LIMIT %(limit)s
+            """,
+            {'start_year': start_year, 'end_year': end_year, 'limit': limit},
+            ('nationality', 'arrivals', 'percentage')
+        )
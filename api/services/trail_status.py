@@ -1,11 +1,14 @@
 import requests
 import logging
-from datetime import datetime, timedelta
+from datetime import timedelta
 from django.conf import settings
 from django.core.cache import cache
+from django.db import transaction
 from django.utils import timezone
 
 from ..models import TrailStatus, TrailSegment, TrailAlert
+from .cache_versions import CacheVersionService
+from .caching import StampedeCache
 
 logger = logging.getLogger(__name__)
 
@@ -14,6 +17,7 @@ TRAIL_STATUS_CACHE_KEY = "trail_status_{trail_id}"
 ALL_TRAILS_CACHE_KEY = "all_trails_status"
 TRAIL_STATUS_CACHE_DURATION = 60 * 60 * 6  # 6 hours
 TRAILS_WITH_ALERTS_CACHE_KEY = "trails_with_alerts"
+IMPORT_BATCH_SIZE = 500  # rows per bulk UPDATE statement
 
 class TrailStatusService:
     """Service for retrieving and managing trail status information"""
@@ -22,24 +26,16 @@ class TrailStatusService:
     def get_all_trails():
         """
         Get status for all trails
-        First tries cache, then database
+        First tries cache, then database; concurrent misses share one load
         """
-        # Try getting from cache first
-        cached_trails = cache.get(ALL_TRAILS_CACHE_KEY)
-        if cached_trails:
-            logger.debug("Returning cached trail status list")
-            return cached_trails
-            
-        # Get from database and cache
-        trails = TrailStatus.objects.all().prefetch_related(
-            'conditions', 
-            'conditions__alerts'
+        return StampedeCache.get_or_compute(
+            ALL_TRAILS_CACHE_KEY,
+            lambda: list(TrailStatus.objects.all().prefetch_related(
+                'conditions', 
+                'conditions__alerts'
+            )),
+            TRAIL_STATUS_CACHE_DURATION
         )
-        
-        # Cache for future requests
-        cache.set(ALL_TRAILS_CACHE_KEY, list(trails), TRAIL_STATUS_CACHE_DURATION)
-        
-        return trails
     
     @staticmethod
     def get_trail_status(trail_id):
@@ -72,24 +68,33 @@ class TrailStatusService:
     @staticmethod
     def get_trails_with_alerts():
         """Get all trails that have active alerts"""
-        # Try getting from cache first
-        cached_trails = cache.get(TRAILS_WITH_ALERTS_CACHE_KEY)
-        if cached_trails:
-            logger.debug("Returning cached trails with alerts")
-            return cached_trails
-            
-        # Get from database
-        trails_with_alerts = TrailStatus.objects.filter(
+        return StampedeCache.get_or_compute(
+            TRAILS_WITH_ALERTS_CACHE_KEY,
+            lambda: list(TrailStatusService._trails_with_alerts()),
+            TRAIL_STATUS_CACHE_DURATION
+        )
+    
+    @staticmethod
+    async def aget_trails_with_alerts():
+        """get_trails_with_alerts for async views, sharing its cache entry"""
+        return await StampedeCache.aget_or_compute(
+            TRAILS_WITH_ALERTS_CACHE_KEY,
+            TrailStatusService._aload_trails_with_alerts,
+            TRAIL_STATUS_CACHE_DURATION
+        )
+    
+    @staticmethod
+    async def _aload_trails_with_alerts():
+        return [trail async for trail in TrailStatusService._trails_with_alerts()]
+    
+    @staticmethod
+    def _trails_with_alerts():
+        return TrailStatus.objects.filter(
             conditions__alerts__isnull=False
         ).distinct().prefetch_related(
             'conditions', 
             'conditions__alerts'
         )
-        
-        # Cache for future requests
-        cache.set(TRAILS_WITH_ALERTS_CACHE_KEY, list(trails_with_alerts), TRAIL_STATUS_CACHE_DURATION)
-        
-        return trails_with_alerts
     
     @staticmethod
     def get_trails_by_region(region):
@@ -236,7 +241,23 @@ class TrailStatusService:
     
     @staticmethod
     def import_trail_updates_from_external_source(source_url=None):
-        """Import trail status updates from external sources"""
+        """
+        Import trail status updates from external sources.
+
+        The feed is diffed against the current trails, segments and alerts in
+        memory and the differences are written with bulk inserts/updates in a
+        single transaction. Only trails that actually changed are touched and
+        have their cache entries invalidated.
+
+        This is bulk_create + bulk_update rather than one
+        bulk_create(update_conflicts=True): ON CONFLICT needs a unique
+        constraint to match on, and trails are identified by (name, region)
+        and segments by (trail, segment) without one. An upsert would also
+        rewrite every row of the feed, while the diff knows which trails
+        changed and so which cache entries to drop.
+
+        Returns a summary of the changes, or False if the import failed.
+        """
         try:
             # If no source URL provided, use the one from settings
             if not source_url:
@@ -255,57 +276,131 @@ class TrailStatusService:
                 
             data = response.json()
             
-            # Process the imported data
-            for trail_data in data.get('trails', []):
-                try:
-                    trail_name = trail_data.get('name')
-                    region = trail_data.get('region')
-                    status = trail_data.get('status')
-                    
-                    # Find or create the trail
-                    trail, created = TrailStatus.objects.update_or_create(
-                        name=trail_name,
-                        region=region,
-                        defaults={
-                            'status': status,
-                            'source': f"Imported from {source_url} on {timezone.now().strftime('%Y-%m-%d')}"
-                        }
-                    )
-                    
-                    # Update segments
-                    for segment_data in trail_data.get('segments', []):
-                        segment_name = segment_data.get('name')
-                        segment_status = segment_data.get('status')
-                        segment_description = segment_data.get('description', '')
-                        
-                        segment, created = TrailSegment.objects.update_or_create(
-                            trail=trail,
-                            segment=segment_name,
-                            defaults={
-                                'status': segment_status,
-                                'description': segment_description
-                            }
-                        )
-                        
-                        # Handle alerts for this segment
-                        for alert_data in segment_data.get('alerts', []):
-                            # Create only if it doesn't exist with same description
-                            TrailAlert.objects.get_or_create(
-                                segment=segment,
-                                type=alert_data.get('type', 'other'),
-                                severity=alert_data.get('severity', 'medium'),
-                                description=alert_data.get('description', '')
-                            )
-                except Exception as segment_error:
-                    logger.error(f"Error processing trail segment: {segment_error}")
-                    continue
+            with transaction.atomic():
+                summary = TrailStatusService._apply_trail_feed(data.get('trails', []), source_url)
+                # Bulk writes send no signals, so bump the cached responses explicitly
+                if summary['changed_trail_ids']:
+                    for model in (TrailStatus, TrailSegment, TrailAlert):
+                        CacheVersionService.bump(model)
             
-            # Invalidate all caches
-            cache.delete(ALL_TRAILS_CACHE_KEY)
-            cache.delete(TRAILS_WITH_ALERTS_CACHE_KEY)
+            # Invalidate caches of the trails that changed
+            if summary['changed_trail_ids']:
+                cache.delete_many(
+                    [TRAIL_STATUS_CACHE_KEY.format(trail_id=trail_id) for trail_id in summary['changed_trail_ids']]
+                    + [ALL_TRAILS_CACHE_KEY, TRAILS_WITH_ALERTS_CACHE_KEY]
+                )
             
-            return True
+            return summary
             
         except Exception as e:
             logger.exception(f"Error importing trail updates: {e}")
-            return False
\ No newline at end of file
+            return False
+    
+    @staticmethod
+    def _apply_trail_feed(trails_data, source_url):
+        """Diff a trail feed against the database and bulk-apply the changes"""
+        now = timezone.now()
+        source = f"Imported from {source_url} on {now.strftime('%Y-%m-%d')}"
+        
+        # Normalise the feed, keyed the same way as the existing rows
+        feed = {}
+        for trail_data in trails_data:
+            try:
+                segments = {}
+                for segment_data in trail_data.get('segments', []):
+                    alerts = {
+                        (
+                            alert_data.get('type', 'other'),
+                            alert_data.get('severity', 'medium'),
+                            alert_data.get('description', '')
+                        )
+                        for alert_data in segment_data.get('alerts', [])
+                    }
+                    segments[segment_data['name']] = (
+                        segment_data.get('status'),
+                        segment_data.get('description', ''),
+                        alerts
+                    )
+                feed[(trail_data['name'], trail_data.get('region'))] = (trail_data.get('status'), segments)
+            except (AttributeError, KeyError, TypeError) as trail_error:
+                logger.error(f"Error processing trail segment: {trail_error}")
+                continue
+        
+        # Load the current state of every trail in the feed
+        trails = {
+            (trail.name, trail.region): trail
+            for trail in TrailStatus.objects.filter(name__in={name for name, _ in feed})
+        }
+        segments = {
+            (segment.trail_id, segment.segment): segment
+            for segment in TrailSegment.objects.filter(trail__in=trails.values())
+        }
+        alerts = set(
+            TrailAlert.objects.filter(segment__in=segments.values())
+            .values_list('segment_id', 'type', 'severity', 'description')
+        )
+        
+        new_trails, changed_trails, created_trail_ids = [], {}, set()
+        new_segments, changed_segments = [], []
+        new_alerts = []
+        
+        for key, (status, segments_data) in feed.items():
+            trail = trails.get(key)
+            if trail is None:
+                trail = TrailStatus(name=key[0], region=key[1], status=status, source=source)
+                trails[key] = trail
+                new_trails.append(trail)
+                created_trail_ids.add(trail.pk)
+            elif trail.status != status:
+                trail.status = status
+                changed_trails[trail.pk] = trail
+            
+            for segment_name, (segment_status, description, alerts_data) in segments_data.items():
+                segment = segments.get((trail.pk, segment_name))
+                if segment is None:
+                    segment = TrailSegment(
+                        trail=trail, segment=segment_name,
+                        status=segment_status, description=description
+                    )
+                    new_segments.append(segment)
+                    pending_alerts = alerts_data
+                    segment_changed = True
+                else:
+                    pending_alerts = {
+                        alert for alert in alerts_data
+                        if (segment.pk, *alert) not in alerts
+                    }
+                    segment_changed = (segment.status, segment.description) != (segment_status, description)
+                    if segment_changed:
+                        segment.status = segment_status
+                        segment.description = description
+                        changed_segments.append(segment)
+                
+                new_alerts.extend(
+                    TrailAlert(segment=segment, type=alert_type, severity=severity, description=alert_description)
+                    for alert_type, severity, alert_description in pending_alerts
+                )
+                
+                if (segment_changed or pending_alerts) and trail.pk not in created_trail_ids:
+                    changed_trails[trail.pk] = trail
+        
+        for trail in changed_trails.values():
+            trail.source = source
+            trail.updated_at = now
+        
+        TrailStatus.objects.bulk_create(new_trails)
+        TrailStatus.objects.bulk_update(
+            list(changed_trails.values()), ['status', 'source', 'updated_at'], batch_size=IMPORT_BATCH_SIZE
+        )
+        TrailSegment.objects.bulk_create(new_segments)
+        TrailSegment.objects.bulk_update(changed_segments, ['status', 'description'], batch_size=IMPORT_BATCH_SIZE)
+        TrailAlert.objects.bulk_create(new_alerts)
+        
+        return {
+            'trails_created': len(new_trails),
+            'trails_updated': len(changed_trails),
+            'segments_created': len(new_segments),
+            'segments_updated': len(changed_segments),
+            'alerts_created': len(new_alerts),
+            'changed_trail_ids': [str(trail_id) for trail_id in [*created_trail_ids, *changed_trails]],
+        }
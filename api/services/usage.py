@@ -0,0 +1,115 @@
+import bisect
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q, Sum
+from django.utils import timezone
+
+from ..models import APIUsage
+from .background import PeriodicFlusher
+
+USAGE_FLUSH_INTERVAL = 60  # seconds
+USAGE_FLUSH_BATCH_SIZE = 500
+
+# Per-process counters: (api key, hour, endpoint, status) -> [calls, total latency ms, histogram]
+_counters = {}
+_lock = threading.Lock()
+
+# Adds the pending counts onto the hourly row, so every worker can flush
+# its own counters without read-modify-write races
+UPSERT_USAGE_SQL = """
+INSERT INTO {table} (api_key_id, hour, endpoint, status_code, calls, total_latency_ms, latency_histogram)
+VALUES {values}
+ON CONFLICT (api_key_id, hour, endpoint, status_code) DO UPDATE SET
+    calls = {table}.calls + EXCLUDED.calls,
+    total_latency_ms = {table}.total_latency_ms + EXCLUDED.total_latency_ms,
+    latency_histogram = ARRAY(
+        SELECT a + b
+        FROM unnest({table}.latency_histogram, EXCLUDED.latency_histogram) WITH ORDINALITY AS t(a, b, i)
+        ORDER BY i
+    )
+"""
+
+
+class UsageService:
+    """
+    Service for per-API-key usage metering.
+
+    Requests are counted in process memory (a dict update under a lock) and
+    a background flusher rolls the counters up into hourly `APIUsage` rows
+    with multi-row upserts. Reports read the pre-aggregated rows.
+    """
+
+    @staticmethod
+    def record(api_key, endpoint, status_code, latency_ms):
+        """Count one request; costs a dictionary update on the request path"""
+        hour = timezone.now().replace(minute=0, second=0, microsecond=0)
+        bucket = bisect.bisect_left(APIUsage.LATENCY_BUCKETS_MS, latency_ms)
+        key = (api_key, hour, endpoint, status_code)
+        with _lock:
+            counter = _counters.get(key)
+            if counter is None:
+                counter = _counters[key] = [0, 0.0, [0] * (len(APIUsage.LATENCY_BUCKETS_MS) + 1)]
+            counter[0] += 1
+            counter[1] += latency_ms
+            counter[2][bucket] += 1
+        _flusher.ensure_started()
+
+    @staticmethod
+    def flush():
+        """Add all pending counters onto their hourly rows"""
+        global _counters
+        with _lock:
+            pending, _counters = _counters, {}
+        if not pending:
+            return 0
+
+        rows = [
+            (api_key, hour, endpoint, status_code, calls, total_latency, histogram)
+            for (api_key, hour, endpoint, status_code), (calls, total_latency, histogram) in pending.items()
+        ]
+        with connection.cursor() as cursor:
+            for start in range(0, len(rows), USAGE_FLUSH_BATCH_SIZE):
+                batch = rows[start:start + USAGE_FLUSH_BATCH_SIZE]
+                values = ', '.join(['(%s, %s, %s, %s, %s, %s, %s::integer[])'] * len(batch))
+                cursor.execute(
+                    UPSERT_USAGE_SQL.format(table=APIUsage._meta.db_table, values=values),
+                    [value for row in batch for value in row]
+                )
+        return len(rows)
+
+    @staticmethod
+    def get_user_usage(user):
+        """Summarise a user's API usage from the hourly rollups"""
+        since = timezone.now() - timedelta(hours=24)
+        usage = APIUsage.objects.filter(api_key__user=user)
+
+        totals = usage.aggregate(
+            total_calls=Sum('calls'),
+            last_24_hours=Sum('calls', filter=Q(hour__gte=since)),
+            errors=Sum('calls', filter=Q(status_code__gte=400)),
+            total_latency_ms=Sum('total_latency_ms'),
+        )
+        total_calls = totals['total_calls'] or 0
+
+        by_key = usage.values('api_key__name', 'api_key__tier').annotate(calls=Sum('calls')).order_by('-calls')
+
+        return {
+            'total_calls': total_calls,
+            'last_24_hours': totals['last_24_hours'] or 0,
+            'errors': totals['errors'] or 0,
+            'avg_latency_ms': round(totals['total_latency_ms'] / total_calls, 1) if total_calls else None,
+            'by_key': [
+                {'name': row['api_key__name'], 'tier': row['api_key__tier'], 'calls': row['calls']}
+                for row in by_key
+            ],
+        }
+
+
+_flusher = PeriodicFlusher(
+    'api-usage-flusher',
+    UsageService.flush,
+    lambda: getattr(settings, 'API_USAGE_FLUSH_INTERVAL', USAGE_FLUSH_INTERVAL)
+)
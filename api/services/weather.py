@@ -1,19 +1,64 @@
+import httpx
 import requests
 import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+from urllib.parse import urlsplit
+
+import numpy as np
 from django.conf import settings
-from django.core.cache import cache
+from django.db import transaction
+from django.db.models.functions import Upper
 from django.utils import timezone
+from requests.adapters import HTTPAdapter
 
 from ..models import WeatherData, WeatherForecast
+from .cache_versions import CacheVersionService
+from .caching import StampedeCache
+from .jobs import JobService
 
 logger = logging.getLogger(__name__)
 
 # Cache keys and durations
 CURRENT_WEATHER_CACHE_KEY = "weather_data_{location}"
-FORECAST_CACHE_KEY = "weather_forecast_{location}"
+FORECAST_CACHE_KEY = "weather_forecast_{location}_{days}"
 CURRENT_WEATHER_CACHE_DURATION = 60 * 30  # 30 minutes
 FORECAST_CACHE_DURATION = 60 * 60 * 3  # 3 hours
+WEATHER_REFRESH_DEDUP_KEY = "weather_refresh_{location}"
+
+WEATHER_API_BASE_URL = "https://api.weatherapi.com/v1"
+WEATHER_API_TIMEOUT = 10  # seconds
+WEATHER_REFRESH_CONCURRENCY = 8
+WEATHER_API_RATE_LIMIT = 10  # requests per second per host
+
+# Elevation adjustments
+LAPSE_RATE_PER_100M = 0.65  # °C cooler per 100m climbed
+PRESSURE_DROP_PER_M = 1 / 8  # hPa lost per metre climbed (approximate)
+UV_ALTITUDE_STEP = 1000  # metres above the reading where UV goes up by one
+MAX_UV_INDEX = 11
+
+
+class HostRateLimiter:
+    """Thread-safe limiter that spaces out requests made to the same host"""
+
+    def __init__(self, requests_per_second):
+        self.interval = 1.0 / requests_per_second if requests_per_second else 0
+        self._lock = threading.Lock()
+        self._next_slot = {}
+
+    def wait(self, url):
+        """Block until a request to the host of `url` is allowed"""
+        if not self.interval:
+            return
+        host = urlsplit(url).netloc
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
 
 
 class WeatherService:
@@ -23,63 +68,191 @@ class WeatherService:
     def get_current_weather(location):
         """
         Get current weather for a location.
-        First tries cache, then database, then external API.
+        First tries cache, then database, then external API; concurrent
+        misses for the same location are coalesced into a single load.
         """
-        # Try getting from cache first
         cache_key = CURRENT_WEATHER_CACHE_KEY.format(location=location)
-        cached_weather = cache.get(cache_key)
-        if cached_weather:
-            logger.debug(f"Returning cached weather for {location}")
-            return cached_weather
+        return StampedeCache.get_or_compute(
+            cache_key,
+            lambda: WeatherService._load_current_weather(location),
+            CURRENT_WEATHER_CACHE_DURATION
+        )
 
-        # Try getting latest from database
+    @staticmethod
+    def _load_current_weather(location):
+        """
+        Get the latest stored weather from the last 3 hours. An older reading
+        is returned while a background job refreshes it; only a location
+        without any reading is fetched from the API inline.
+        """
         try:
-            # Get weather data from the last 3 hours
             three_hours_ago = timezone.now() - timedelta(hours=3)
-            latest_weather = WeatherData.objects.filter(
+            return WeatherData.objects.filter(
                 location__iexact=location,
                 timestamp__gte=three_hours_ago
             ).latest('timestamp')
-            
-            # Cache and return the result
-            cache.set(cache_key, latest_weather, CURRENT_WEATHER_CACHE_DURATION)
-            return latest_weather
-            
         except WeatherData.DoesNotExist:
-            # Data not found or too old, fetch from API
+            pass
+        
+        stale = WeatherData.objects.filter(location__iexact=location).order_by('-timestamp').first()
+        if stale is None:
             return WeatherService._fetch_and_store_current_weather(location)
+        
+        JobService.enqueue(
+            'weather.refresh_location',
+            {'location': location},
+            dedup_key=WEATHER_REFRESH_DEDUP_KEY.format(location=location.lower())
+        )
+        return stale
+    
+    @staticmethod
+    def refresh_current_weather(location):
+        """Fetch and store the current weather for a location and replace its cached copy"""
+        weather = WeatherService._fetch_and_store_current_weather(location)
+        if weather:
+            StampedeCache.set(
+                CURRENT_WEATHER_CACHE_KEY.format(location=location), weather, CURRENT_WEATHER_CACHE_DURATION
+            )
+        return weather
+    
+    @staticmethod
+    async def aget_current_weather(location):
+        """
+        get_current_weather for async views: the database and the external API
+        are awaited, so a slow API call doesn't hold a worker thread
+        """
+        cache_key = CURRENT_WEATHER_CACHE_KEY.format(location=location)
+        return await StampedeCache.aget_or_compute(
+            cache_key,
+            lambda: WeatherService._aload_current_weather(location),
+            CURRENT_WEATHER_CACHE_DURATION
+        )
+
+    @staticmethod
+    async def _aload_current_weather(location):
+        try:
+            three_hours_ago = timezone.now() - timedelta(hours=3)
+            return await WeatherData.objects.filter(
+                location__iexact=location,
+                timestamp__gte=three_hours_ago
+            ).alatest('timestamp')
+        except WeatherData.DoesNotExist:
+            return await WeatherService._afetch_and_store_current_weather(location)
     
     @staticmethod
     def get_forecast(location, days=7):
         """
         Get weather forecast for a location.
-        First tries cache, then database, then external API.
+        First tries cache, then database, then external API; each number of
+        days is cached separately, and concurrent misses for the same
+        location and days are coalesced into a single load.
         """
-        # Try getting from cache first
-        cache_key = FORECAST_CACHE_KEY.format(location=location)
-        cached_forecast = cache.get(cache_key)
-        if cached_forecast:
-            logger.debug(f"Returning cached forecast for {location}")
-            return cached_forecast
+        cache_key = FORECAST_CACHE_KEY.format(location=location, days=days)
+        return StampedeCache.get_or_compute(
+            cache_key,
+            lambda: WeatherService._load_forecast(location, days),
+            FORECAST_CACHE_DURATION
+        )
 
-        # Try getting from database
+    @staticmethod
+    def _load_forecast(location, days):
+        """Get the stored forecast if it covers every day, else fetch it"""
         today = timezone.now().date()
         end_date = today + timedelta(days=days)
         
-        forecasts = WeatherForecast.objects.filter(
+        forecasts = list(WeatherForecast.objects.filter(
             location__iexact=location,
             date__gte=today,
             date__lt=end_date
-        ).order_by('date')
+        ).order_by('date'))
         
         # If we have all days needed, return from DB
-        if forecasts.count() == days:
-            cache.set(cache_key, list(forecasts), FORECAST_CACHE_DURATION)
+        if len(forecasts) == days:
             return forecasts
         
         # Otherwise fetch from API
         return WeatherService._fetch_and_store_forecast(location, days)
     
+    @staticmethod
+    def get_current_weather_batch(locations):
+        """
+        Get current weather for many locations at once, as {location: WeatherData or None}.
+
+        Cache hits are read with one get_many, database hits with one
+        DISTINCT ON (location) query, and only the remaining locations are
+        fetched from the external API, concurrently.
+        """
+        locations = list(dict.fromkeys(locations))
+        cache_keys = {CURRENT_WEATHER_CACHE_KEY.format(location=location): location for location in locations}
+        cached = StampedeCache.get_many(list(cache_keys))
+        results = {cache_keys[key]: weather for key, weather in cached.items()}
+        
+        misses = [location for location in locations if location not in results]
+        stored = {}
+        if misses:
+            # Latest reading of the last 3 hours per location, like get_current_weather
+            latest = WeatherData.objects.annotate(
+                location_key=Upper('location')
+            ).filter(
+                location_key__in=[location.upper() for location in misses],
+                timestamp__gte=timezone.now() - timedelta(hours=3)
+            ).order_by('location_key', '-timestamp').distinct('location_key')
+            by_key = {weather.location_key: weather for weather in latest}
+            stored = {location: by_key[location.upper()] for location in misses if location.upper() in by_key}
+            results.update(stored)
+            misses = [location for location in misses if location not in stored]
+        
+        fetched = WeatherService._fetch_current_weather_many(misses) if misses else {}
+        results.update(fetched)
+        
+        StampedeCache.set_many({
+            CURRENT_WEATHER_CACHE_KEY.format(location=location): weather
+            for location, weather in {**stored, **fetched}.items()
+        }, CURRENT_WEATHER_CACHE_DURATION)
+        
+        return {location: results.get(location) for location in locations}
+    
+    @staticmethod
+    def _fetch_current_weather_many(locations):
+        """Fetch current weather for several locations concurrently and store it in one bulk insert"""
+        max_workers = min(len(locations), getattr(settings, 'WEATHER_REFRESH_CONCURRENCY', WEATHER_REFRESH_CONCURRENCY))
+        limiter = HostRateLimiter(getattr(settings, 'WEATHER_API_RATE_LIMIT', WEATHER_API_RATE_LIMIT))
+        url = f"{WeatherService._api_base_url()}/current.json"
+        api_key = getattr(settings, 'WEATHER_API_KEY', 'demo_key')
+        
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        
+        def fetch(location):
+            try:
+                limiter.wait(url)
+                response = session.get(
+                    url,
+                    params={'key': api_key, 'q': location, 'aqi': 'no'},
+                    timeout=WEATHER_API_TIMEOUT
+                )
+                if response.status_code != 200:
+                    logger.error(f"Weather API error for {location}: {response.status_code} - {response.text}")
+                    return None
+                return WeatherService._parse_current_weather(location, response.json())
+            except Exception as e:
+                logger.exception(f"Error fetching weather data for {location}: {e}")
+                return None
+        
+        try:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                fetched = dict(zip(locations, executor.map(fetch, locations)))
+        finally:
+            session.close()
+        
+        fetched = {location: weather for location, weather in fetched.items() if weather is not None}
+        if fetched:
+            WeatherData.objects.bulk_create(fetched.values())
+            CacheVersionService.bump(WeatherData)
+        return fetched
+    
     @staticmethod
     def _fetch_and_store_current_weather(location):
         """Fetch current weather from external API and store in database"""
@@ -89,56 +262,83 @@ class WeatherService:
             
             # Example API call (replace with actual weather API)
             response = requests.get(
-                f"https://api.weatherapi.com/v1/current.json",
+                f"{WeatherService._api_base_url()}/current.json",
                 params={
                     'key': api_key,
                     'q': location,
                     'aqi': 'no'
                 },
-                timeout=10
+                timeout=WEATHER_API_TIMEOUT
             )
             
             if response.status_code != 200:
                 logger.error(f"Weather API error: {response.status_code} - {response.text}")
                 return None
                 
-            # Parse response (adjust according to your actual API)
-            data = response.json()
-            current = data['current']
-            location_data = data['location']
-            
-            # Create new WeatherData object
-            weather = WeatherData(
-                location=location,
-                latitude=location_data['lat'],
-                longitude=location_data['lon'],
-                elevation=location_data.get('elevation', 0),
-                timestamp=timezone.now(),
-                temperature=current['temp_c'],
-                feels_like=current['feelslike_c'],
-                condition=current['condition']['text'],
-                wind_speed=current['wind_kph'],
-                wind_direction=current['wind_dir'],
-                precipitation=current['precip_mm'],
-                humidity=current['humidity'],
-                pressure=current['pressure_mb'],
-                visibility=current['vis_km'] * 1000,  # convert to meters
-                uv_index=current['uv']
-            )
+            weather = WeatherService._parse_current_weather(location, response.json())
             
             # Save to database
             weather.save()
             
-            # Cache the result
-            cache_key = CURRENT_WEATHER_CACHE_KEY.format(location=location)
-            cache.set(cache_key, weather, CURRENT_WEATHER_CACHE_DURATION)
+            return weather
+            
+        except Exception as e:
+            logger.exception(f"Error fetching weather data for {location}: {e}")
+            return None
+    
+    @staticmethod
+    async def _afetch_and_store_current_weather(location):
+        """_fetch_and_store_current_weather over an async HTTP client"""
+        try:
+            api_key = getattr(settings, 'WEATHER_API_KEY', 'demo_key')
+            
+            async with httpx.AsyncClient(timeout=WEATHER_API_TIMEOUT) as client:
+                response = await client.get(
+                    f"{WeatherService._api_base_url()}/current.json",
+                    params={
+                        'key': api_key,
+                        'q': location,
+                        'aqi': 'no'
+                    }
+                )
+            
+            if response.status_code != 200:
+                logger.error(f"Weather API error: {response.status_code} - {response.text}")
+                return None
             
+            weather = WeatherService._parse_current_weather(location, response.json())
+            await weather.asave()
             return weather
             
         except Exception as e:
             logger.exception(f"Error fetching weather data for {location}: {e}")
             return None
     
+    @staticmethod
+    def _parse_current_weather(location, data):
+        """Build an unsaved WeatherData from a weather API response"""
+        # Parse response (adjust according to your actual API)
+        current = data['current']
+        location_data = data['location']
+        
+        return WeatherData(
+            location=location,
+            latitude=location_data['lat'],
+            longitude=location_data['lon'],
+            elevation=location_data.get('elevation', 0),
+            timestamp=timezone.now(),
+            temperature=current['temp_c'],
+            feels_like=current['feelslike_c'],
+            condition=current['condition']['text'],
+            wind_speed=current['wind_kph'],
+            wind_direction=current['wind_dir'],
+            precipitation=current['precip_mm'],
+            humidity=current['humidity'],
+            pressure=current['pressure_mb'],
+            visibility=current['vis_km'] * 1000,  # convert to meters
+            uv_index=current['uv']
+        )
+    
     @staticmethod
     def _fetch_and_store_forecast(location, days=7):
         """Fetch weather forecast from external API and store in database"""
@@ -148,7 +348,7 @@ class WeatherService:
             
             # Example API call
             response = requests.get(
-                f"https://api.weatherapi.com/v1/forecast.json",
+                f"{WeatherService._api_base_url()}/forecast.json",
                 params={
                     'key': api_key,
                     'q': location,
@@ -156,17 +356,14 @@ class WeatherService:
                     'aqi': 'no',
                     'alerts': 'no'
                 },
-                timeout=10
+                timeout=WEATHER_API_TIMEOUT
             )
             
             if response.status_code != 200:
                 logger.error(f"Weather API error: {response.status_code} - {response.text}")
-                return []
+                return None
                 
-            # Parse response (adjust according to your actual API)
-            data = response.json()
-            forecast_days = data['forecast']['forecastday']
-            location_data = data['location']
+            forecasts = WeatherService._parse_forecast(location, response.json())
             
             # Delete existing forecasts for this period
             today = timezone.now().date()
@@ -177,45 +374,151 @@ class WeatherService:
                 date__lt=end_date
             ).delete()
             
-            # Create new forecast objects
-            forecasts = []
-            for day_data in forecast_days:
-                day = day_data['day']
-                astro = day_data['astro']
-                
-                forecast = WeatherForecast(
-                    location=location,
-                    date=day_data['date'],
-                    min_temp=day['mintemp_c'],
-                    max_temp=day['maxtemp_c'],
-                    condition=day['condition']['text'],
-                    precipitation_chance=day['daily_chance_of_rain'],
-                    sunrise=datetime.strptime(astro['sunrise'], '%I:%M %p').time(),
-                    sunset=datetime.strptime(astro['sunset'], '%I:%M %p').time()
-                )
+            for forecast in forecasts:
                 forecast.save()
-                forecasts.append(forecast)
-            
-            # Cache the result
-            cache_key = FORECAST_CACHE_KEY.format(location=location)
-            cache.set(cache_key, forecasts, FORECAST_CACHE_DURATION)
             
             return forecasts
             
         except Exception as e:
             logger.exception(f"Error fetching forecast data for {location}: {e}")
-            return []
+            return None
     
     @staticmethod
-    def update_all_locations():
-        """Update weather data for all locations we track"""
+    def _parse_forecast(location, data):
+        """Build unsaved WeatherForecast objects from a weather API response"""
+        # Parse response (adjust according to your actual API)
+        forecasts = []
+        for day_data in data['forecast']['forecastday']:
+            day = day_data['day']
+            astro = day_data['astro']
+            
+            forecasts.append(WeatherForecast(
+                location=location,
+                date=day_data['date'],
+                min_temp=day['mintemp_c'],
+                max_temp=day['maxtemp_c'],
+                condition=day['condition']['text'],
+                precipitation_chance=day['daily_chance_of_rain'],
+                sunrise=datetime.strptime(astro['sunrise'], '%I:%M %p').time(),
+                sunset=datetime.strptime(astro['sunset'], '%I:%M %p').time()
+            ))
+        return forecasts
+    
+    @staticmethod
+    def _api_base_url():
+        return getattr(settings, 'WEATHER_API_BASE_URL', WEATHER_API_BASE_URL).rstrip('/')
+    
+    @staticmethod
+    def update_all_locations(max_workers=None, requests_per_second=None, days=7):
+        """
+        Update weather data for all locations we track.
+
+        Locations are fetched concurrently over a pooled keep-alive session,
+        with at most `max_workers` requests in flight and at most
+        `requests_per_second` requests per host. A single forecast call
+        returns both current conditions and the forecast, so each location
+        costs one request. Results are written with bulk inserts in one
+        transaction.
+
+        Returns a list of per-location results with `location`, `latency`
+        (seconds) and `error` (None on success).
+        """
         # Get unique locations from existing data
         locations = set(WeatherData.objects.values_list('location', flat=True).distinct())
         locations.update(WeatherForecast.objects.values_list('location', flat=True).distinct())
+        if not locations:
+            return []
+        
+        max_workers = max_workers or getattr(settings, 'WEATHER_REFRESH_CONCURRENCY', WEATHER_REFRESH_CONCURRENCY)
+        if requests_per_second is None:
+            requests_per_second = getattr(settings, 'WEATHER_API_RATE_LIMIT', WEATHER_API_RATE_LIMIT)
+        limiter = HostRateLimiter(requests_per_second)
         
-        for location in locations:
-            WeatherService._fetch_and_store_current_weather(location)
-            WeatherService._fetch_and_store_forecast(location)
+        # Keep-alive connections shared by all workers
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        
+        try:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                results = list(executor.map(
+                    lambda location: WeatherService._fetch_location(session, limiter, location, days),
+                    sorted(locations)
+                ))
+        finally:
+            session.close()
+        
+        fetched = [result for result in results if result['error'] is None]
+        weather_rows = [result.pop('weather') for result in fetched]
+        forecast_rows = [forecast for result in fetched for forecast in result.pop('forecasts')]
+        
+        # Workers only do HTTP; all database writes happen here in bulk
+        with transaction.atomic():
+            WeatherData.objects.bulk_create(weather_rows)
+            WeatherForecast.objects.bulk_create(
+                forecast_rows,
+                update_conflicts=True,
+                unique_fields=['location', 'date'],
+                update_fields=['min_temp', 'max_temp', 'condition', 'precipitation_chance', 'sunrise', 'sunset']
+            )
+            # Bulk writes send no signals, so bump the cached responses explicitly
+            CacheVersionService.bump(WeatherData)
+            CacheVersionService.bump(WeatherForecast)
+        
+        cache_entries = {}
+        for weather in weather_rows:
+            cache_entries[CURRENT_WEATHER_CACHE_KEY.format(location=weather.location)] = weather
+        StampedeCache.set_many(cache_entries, CURRENT_WEATHER_CACHE_DURATION)
+        
+        forecasts_by_location = {}
+        for forecast in forecast_rows:
+            forecasts_by_location.setdefault(forecast.location, []).append(forecast)
+        StampedeCache.set_many({
+            FORECAST_CACHE_KEY.format(location=location, days=days): forecasts
+            for location, forecasts in forecasts_by_location.items()
+        }, FORECAST_CACHE_DURATION)
+        
+        for result in results:
+            if result['error']:
+                logger.error(f"Weather refresh failed for {result['location']}: {result['error']}")
+        
+        return results
+    
+    @staticmethod
+    def _fetch_location(session, limiter, location, days):
+        """Fetch and parse current weather and forecast for one location (no DB access)"""
+        url = f"{WeatherService._api_base_url()}/forecast.json"
+        api_key = getattr(settings, 'WEATHER_API_KEY', 'demo_key')
+        started = time.monotonic()
+        result = {'location': location, 'latency': None, 'error': None}
+        try:
+            limiter.wait(url)
+            started = time.monotonic()
+            response = session.get(
+                url,
+                params={
+                    'key': api_key,
+                    'q': location,
+                    'days': days,
+                    'aqi': 'no',
+                    'alerts': 'no'
+                },
+                timeout=WEATHER_API_TIMEOUT
+            )
+            result['latency'] = time.monotonic() - started
+            
+            if response.status_code != 200:
+                result['error'] = f"HTTP {response.status_code}"
+                return result
+            
+            data = response.json()
+            result['weather'] = WeatherService._parse_current_weather(location, data)
+            result['forecasts'] = WeatherService._parse_forecast(location, data)
+        except Exception as e:
+            result['latency'] = time.monotonic() - started
+            result['error'] = str(e) or e.__class__.__name__
+        return result
     
     @staticmethod
     def get_historical_weather(location, start_date, end_date=None):
@@ -240,11 +543,25 @@ class WeatherService:
         if not base_weather:
             return None
         
+        return WeatherService.adjust_for_elevation(base_weather, location, elevation)
+    
+    @staticmethod
+    async def aget_mountain_weather(location, elevation):
+        """get_mountain_weather for async views"""
+        base_weather = await WeatherService.aget_current_weather(location)
+        if not base_weather:
+            return None
+        
+        return WeatherService.adjust_for_elevation(base_weather, location, elevation)
+    
+    @staticmethod
+    def adjust_for_elevation(base_weather, location, elevation):
+        """Build an unsaved WeatherData for `elevation` from a reading taken at another elevation"""
         # Calculate elevation difference
         elev_diff = elevation - base_weather.elevation
         
         # Apply lapse rate to temperature (0.65°C cooler per 100m of elevation)
-        temp_adjustment = (elev_diff / 100) * 0.65
+        temp_adjustment = (elev_diff / 100) * LAPSE_RATE_PER_100M
         adjusted_temp = base_weather.temperature - temp_adjustment
         adjusted_feels_like = base_weather.feels_like - temp_adjustment
         
@@ -262,9 +579,53 @@ class WeatherService:
             wind_direction=base_weather.wind_direction,
             precipitation=base_weather.precipitation,
             humidity=base_weather.humidity,
-            pressure=int(base_weather.pressure - (elev_diff / 8)),  # Approximate pressure decrease
+            pressure=int(base_weather.pressure - elev_diff * PRESSURE_DROP_PER_M),  # Approximate pressure decrease
             visibility=base_weather.visibility,
-            uv_index=min(11, base_weather.uv_index + (1 if elev_diff > 1000 else 0)),  # UV increases at altitude
+            uv_index=min(MAX_UV_INDEX, base_weather.uv_index + (1 if elev_diff > UV_ALTITUDE_STEP else 0)),  # UV increases at altitude
         )
         
-        return adjusted_weather
\ No newline at end of file
+        return adjusted_weather
+    
+    @staticmethod
+    def get_weather_profile(location, elevations, days=7):
+        """
+        Get weather adjusted to every elevation of a route for every forecast day.
+
+        The whole elevation x day grid is computed in one NumPy pass from the
+        location's current reading and forecast, using the same adjustments
+        as get_mountain_weather. Returns None when there is no base reading.
+        """
+        base_weather = WeatherService.get_current_weather(location)
+        if not base_weather:
+            return None
+        forecasts = list(WeatherService.get_forecast(location, days) or [])[:days]
+        
+        elevation = np.asarray(elevations, dtype=np.float64)
+        elev_diff = elevation - base_weather.elevation
+        temp_adjustment = elev_diff / 100 * LAPSE_RATE_PER_100M
+        
+        # Forecast columns broadcast against elevation rows: (elevations, days)
+        min_temp = np.array([float(forecast.min_temp) for forecast in forecasts])
+        max_temp = np.array([float(forecast.max_temp) for forecast in forecasts])
+        
+        return {
+            'location': location,
+            'base_elevation': base_weather.elevation,
+            'timestamp': base_weather.timestamp,
+            'elevations': elevation.tolist(),
+            'dates': [forecast.date for forecast in forecasts],
+            'current': {
+                'temperature': np.round(base_weather.temperature - temp_adjustment, 1).tolist(),
+                'feels_like': np.round(base_weather.feels_like - temp_adjustment, 1).tolist(),
+                'pressure': np.round(base_weather.pressure - elev_diff * PRESSURE_DROP_PER_M).astype(int).tolist(),
+                'uv_index': np.minimum(
+                    MAX_UV_INDEX, base_weather.uv_index + (elev_diff > UV_ALTITUDE_STEP)
+                ).astype(int).tolist(),
+            },
+            'forecast': {
+                'min_temp': np.round(min_temp[np.newaxis, :] - temp_adjustment[:, np.newaxis], 1).tolist(),
+                'max_temp': np.round(max_temp[np.newaxis, :] - temp_adjustment[:, np.newaxis], 1).tolist(),
+                'condition': [forecast.condition for forecast in forecasts],
+                'precipitation_chance': [forecast.precipitation_chance for forecast in forecasts],
+            },
+        }
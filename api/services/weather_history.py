@@ -0,0 +1,345 @@
+import logging
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Avg, Count, F, Max, Min, Sum
+from django.db.models.functions import Trunc
+from django.utils import timezone
+
+from ..models import WeatherData, WeatherRollup
+from .cache_versions import CacheVersionService
+from .caching import StampedeCache
+
+logger = logging.getLogger(__name__)
+
+# Partitioning and retention defaults
+WEATHER_PARTITIONS_AHEAD = 3  # months of empty partitions kept ready
+WEATHER_RAW_RETENTION_MONTHS = 12  # months of raw readings kept; rollups are kept forever
+
+# Aggregated history, cached per location, interval and range of whole buckets
+WEATHER_HISTORY_CACHE_KEY = "weather_history_{location}_{interval}_{start}_{end}"
+WEATHER_HISTORY_CACHE_DURATION = 60 * 5  # 5 minutes while the last bucket is still filling up
+WEATHER_HISTORY_CLOSED_CACHE_DURATION = 60 * 60 * 24  # 24 hours once it has ended
+HISTORY_INTERVALS = ('hour', 'day', 'week')
+HISTORY_BUCKET_LENGTHS = {'hour': timedelta(hours=1), 'day': timedelta(days=1), 'week': timedelta(weeks=1)}
+
+# Recomputes whole hourly/daily buckets from the raw readings in a range,
+# so running it again over the same range is harmless
+DOWNSAMPLE_SQL = """
+INSERT INTO {rollup_table} (
+    location, interval, bucket, samples, min_temperature, max_temperature, avg_temperature,
+    total_precipitation, max_wind_speed, avg_humidity, avg_pressure
+)
+SELECT
+    location, %(interval)s, date_trunc(%(interval)s, timestamp), count(*),
+    min(temperature), max(temperature), avg(temperature),
+    coalesce(sum(precipitation), 0), max(wind_speed), avg(humidity), avg(pressure)
+FROM {raw_table}
+WHERE timestamp >= %(start)s AND timestamp < %(end)s
+GROUP BY location, date_trunc(%(interval)s, timestamp)
+ON CONFLICT (location, interval, bucket) DO UPDATE SET
+    samples = EXCLUDED.samples,
+    min_temperature = EXCLUDED.min_temperature,
+    max_temperature = EXCLUDED.max_temperature,
+    avg_temperature = EXCLUDED.avg_temperature,
+    total_precipitation = EXCLUDED.total_precipitation,
+    max_wind_speed = EXCLUDED.max_wind_speed,
+    avg_humidity = EXCLUDED.avg_humidity,
+    avg_pressure = EXCLUDED.avg_pressure
+"""
+
+
+def month_start(value):
+    """First instant (UTC) of the month containing a date or datetime"""
+    return datetime(value.year, value.month, 1, tzinfo=dt_timezone.utc)
+
+
+def day_start(value):
+    """Midnight (UTC) starting the day of an aware datetime"""
+    return datetime.combine(value.astimezone(dt_timezone.utc).date(), time.min, tzinfo=dt_timezone.utc)
+
+
+def bucket_start(value, interval):
+    """Start (UTC) of the hour, day or week (from Monday, like date_trunc) containing `value`"""
+    if interval == 'hour':
+        return value.astimezone(dt_timezone.utc).replace(minute=0, second=0, microsecond=0)
+    start = day_start(value)
+    if interval == 'week':
+        start -= timedelta(days=start.weekday())
+    return start
+
+
+def add_months(month, count):
+    """Shift a month_start() by a number of months"""
+    index = month.year * 12 + month.month - 1 + count
+    return month.replace(year=index // 12, month=index % 12 + 1)
+
+
+class WeatherHistoryService:
+    """
+    Service for the WeatherData time series storage.
+
+    WeatherData is a range-partitioned table with one partition per month
+    (plus a default partition catching anything outside them). Raw readings
+    are rolled up into hourly and daily WeatherRollup rows, and whole
+    partitions past the retention period are archived and dropped instead of
+    being deleted row by row.
+    """
+
+    @staticmethod
+    def partition_name(month):
+        return f"{WeatherData._meta.db_table}_p{month:%Y%m}"
+
+    @staticmethod
+    def default_partition_name():
+        return f"{WeatherData._meta.db_table}_default"
+
+    @staticmethod
+    def get_partitions():
+        """Return {month: partition name} for the existing monthly partitions"""
+        with connection.cursor() as cursor:
+            cursor.execute(
+                """
+                SELECT child.relname
+                FROM pg_inherits
+                JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+                JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+                WHERE parent.relname = %s
+                """,
+                [WeatherData._meta.db_table]
+            )
+            names = [row[0] for row in cursor.fetchall()]
+
+        prefix = f"{WeatherData._meta.db_table}_p"
+        partitions = {}
+        for name in names:
+            if name.startswith(prefix):
+                month = datetime.strptime(name[len(prefix):], '%Y%m').replace(tzinfo=dt_timezone.utc)
+                partitions[month] = name
+        return partitions
+
+    @staticmethod
+    def create_partition(month):
+        """
+        Create the partition for a month, moving any of its rows out of the
+        default partition first (attaching would fail otherwise).
+        """
+        table = WeatherData._meta.db_table
+        name = WeatherHistoryService.partition_name(month)
+        quote = connection.ops.quote_name
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                f"CREATE TABLE {quote(name)} (LIKE {quote(table)} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+            )
+            cursor.execute(
+                f"""
+                WITH moved AS (
+                    DELETE FROM {quote(WeatherHistoryService.default_partition_name())}
+                    WHERE timestamp >= %s AND timestamp < %s
+                    RETURNING *
+                )
+                INSERT INTO {quote(name)} SELECT * FROM moved
+                """,
+                [month, add_months(month, 1)]
+            )
+            cursor.execute(
+                f"ALTER TABLE {quote(table)} ATTACH PARTITION {quote(name)} FOR VALUES FROM (%s) TO (%s)",
+                [month, add_months(month, 1)]
+            )
+        logger.info(f"Created weather partition {name}")
+        return name
+
+    @staticmethod
+    def ensure_partitions(months_ahead=None):
+        """Create any missing partitions from the current month to `months_ahead` months out"""
+        if months_ahead is None:
+            months_ahead = getattr(settings, 'WEATHER_PARTITIONS_AHEAD', WEATHER_PARTITIONS_AHEAD)
+        existing = WeatherHistoryService.get_partitions()
+        current = month_start(timezone.now())
+        created = []
+        for offset in range(months_ahead + 1):
+            month = add_months(current, offset)
+            if month not in existing:
+                created.append(WeatherHistoryService.create_partition(month))
+        return created
+
+    @staticmethod
+    def expire_partitions(retention_months=None, archive_dir=None):
+        """
+        Drop the monthly partitions older than the retention period.
+        Their readings are rolled up first, and written to
+        `<archive_dir>/<partition>.csv` beforehand when an archive directory is given.
+        """
+        if retention_months is None:
+            retention_months = getattr(settings, 'WEATHER_RAW_RETENTION_MONTHS', WEATHER_RAW_RETENTION_MONTHS)
+        cutoff = add_months(month_start(timezone.now()), -retention_months)
+        quote = connection.ops.quote_name
+
+        dropped = []
+        for month, name in sorted(WeatherHistoryService.get_partitions().items()):
+            if month >= cutoff:
+                continue
+            WeatherHistoryService.downsample(month, add_months(month, 1))
+            if archive_dir:
+                WeatherHistoryService.archive_partition(name, archive_dir)
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.execute(f"ALTER TABLE {quote(WeatherData._meta.db_table)} DETACH PARTITION {quote(name)}")
+                cursor.execute(f"DROP TABLE {quote(name)}")
+            logger.info(f"Dropped weather partition {name}")
+            dropped.append(name)
+
+        if dropped:
+            CacheVersionService.bump(WeatherData)
+        return dropped
+
+    @staticmethod
+    def archive_partition(name, archive_dir):
+        """Stream every row of a partition to `<archive_dir>/<partition>.csv` with COPY"""
+        path = Path(archive_dir) / f"{name}.csv"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with connection.cursor() as cursor, path.open('w', newline='') as archive:
+            cursor.copy_expert(
+                f"COPY (SELECT * FROM {connection.ops.quote_name(name)} ORDER BY timestamp) TO STDOUT WITH CSV HEADER",
+                archive
+            )
+        return path
+
+    @staticmethod
+    def downsample(start, end):
+        """
+        Roll the raw readings between the datetimes `start` and `end` into
+        hourly and daily WeatherRollup rows. The range is widened to whole
+        days (UTC) so every bucket is recomputed from all of its readings.
+        """
+        start = day_start(start)
+        if day_start(end) != end:
+            end = day_start(end) + timedelta(days=1)
+
+        sql = DOWNSAMPLE_SQL.format(
+            rollup_table=connection.ops.quote_name(WeatherRollup._meta.db_table),
+            raw_table=connection.ops.quote_name(WeatherData._meta.db_table),
+        )
+        counts = {}
+        with transaction.atomic(), connection.cursor() as cursor:
+            for interval in ('hour', 'day'):
+                cursor.execute(sql, {'interval': interval, 'start': start, 'end': end})
+                counts[interval] = cursor.rowcount
+        CacheVersionService.bump(WeatherRollup)
+        return counts
+
+    @staticmethod
+    def raw_retention_cutoff():
+        """Start of the oldest month whose raw readings are kept"""
+        retention_months = getattr(settings, 'WEATHER_RAW_RETENTION_MONTHS', WEATHER_RAW_RETENTION_MONTHS)
+        return add_months(month_start(timezone.now()), -retention_months)
+
+    @staticmethod
+    def bucket_range(interval, start, end):
+        """Widen `start`/`end` to whole `interval` buckets: start of the first one, end of the last one"""
+        last = bucket_start(end, interval)
+        return bucket_start(start, interval), last if last == end else last + HISTORY_BUCKET_LENGTHS[interval]
+
+    @staticmethod
+    def get_history(location, interval, start, end):
+        """
+        Aggregate a location's weather into `interval` buckets between `start` and `end`.
+
+        Each bucket has samples, min/max/avg temperature, total precipitation
+        and max wind speed. Buckets are grouped in SQL: from the raw readings
+        within the retention period and from the hourly/daily rollups before it.
+        The range is widened to whole buckets (see bucket_range), so requests
+        ending "now" share one cache entry until the current bucket ends.
+        """
+        start, end = WeatherHistoryService.bucket_range(interval, start, end)
+        cache_key = WEATHER_HISTORY_CACHE_KEY.format(
+            location=location, interval=interval, start=int(start.timestamp()), end=int(end.timestamp())
+        )
+        # Until the last bucket has ended, new readings can still land in it
+        duration = WEATHER_HISTORY_CLOSED_CACHE_DURATION if end <= timezone.now() else WEATHER_HISTORY_CACHE_DURATION
+        return StampedeCache.get_or_compute(
+            cache_key,
+            lambda: WeatherHistoryService._aggregate_history(location, interval, start, end),
+            duration
+        )
+
+    @staticmethod
+    def _aggregate_history(location, interval, start, end):
+        cutoff = WeatherHistoryService.raw_retention_cutoff()
+        buckets = {}
+
+        if start < cutoff:
+            rollups = WeatherRollup.objects.filter(
+                location__iexact=location,
+                interval='hour' if interval == 'hour' else 'day',
+                bucket__gte=start,
+                bucket__lt=min(end, cutoff)
+            ).annotate(
+                period=Trunc('bucket', interval, tzinfo=dt_timezone.utc)
+            ).values('period').annotate(
+                count=Sum('samples'),
+                low=Min('min_temperature'),
+                high=Max('max_temperature'),
+                weighted_temperature=Sum(F('avg_temperature') * F('samples')),
+                precipitation=Sum('total_precipitation'),
+                wind=Max('max_wind_speed'),
+            )
+            for row in rollups:
+                WeatherHistoryService._merge_bucket(buckets, row['period'], {
+                    'samples': row['count'],
+                    'min_temperature': row['low'],
+                    'max_temperature': row['high'],
+                    'avg_temperature': row['weighted_temperature'] / row['count'],
+                    'total_precipitation': row['precipitation'],
+                    'max_wind_speed': row['wind'],
+                })
+
+        if end > cutoff:
+            readings = WeatherData.objects.filter(
+                location__iexact=location,
+                timestamp__gte=max(start, cutoff),
+                timestamp__lt=end
+            ).annotate(
+                bucket=Trunc('timestamp', interval, tzinfo=dt_timezone.utc)
+            ).values('bucket').annotate(
+                samples=Count('id'),
+                min_temperature=Min('temperature'),
+                max_temperature=Max('temperature'),
+                avg_temperature=Avg('temperature'),
+                total_precipitation=Sum('precipitation'),
+                max_wind_speed=Max('wind_speed'),
+            )
+            for row in readings:
+                WeatherHistoryService._merge_bucket(buckets, row.pop('bucket'), {
+                    **row,
+                    'avg_temperature': float(row['avg_temperature']),
+                    'total_precipitation': float(row['total_precipitation'] or 0),
+                })
+
+        return [
+            {
+                'bucket': bucket,
+                **values,
+                'avg_temperature': round(values['avg_temperature'], 1),
+                'total_precipitation': round(values['total_precipitation'], 1),
+            }
+            for bucket, values in sorted(buckets.items())
+        ]
+
+    @staticmethod
+    def _merge_bucket(buckets, bucket, values):
+        """Add aggregates to a bucket, combining with any already there (a week spanning the cutoff)"""
+        existing = buckets.get(bucket)
+        if existing is None:
+            buckets[bucket] = values
+            return
+        samples = existing['samples'] + values['samples']
+        existing['avg_temperature'] = (
+            existing['avg_temperature'] * existing['samples'] + values['avg_temperature'] * values['samples']
+        ) / samples
+        existing['samples'] = samples
+        existing['min_temperature'] = min(existing['min_temperature'], values['min_temperature'])
+        existing['max_temperature'] = max(existing['max_temperature'], values['max_temperature'])
+        existing['total_precipitation'] += values['total_precipitation']
+        existing['max_wind_speed'] = max(existing['max_wind_speed'], values['max_wind_speed'])
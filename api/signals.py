@@ -0,0 +1,65 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .models import APIKey, Destination, NationalityStat, TourismStat, normalize_array_value
+from .services.api_keys import APIKeyService
+from .services.cache_versions import CacheVersionService
+from .services.recommendations import RecommendationService
+from .services.tourism_analytics import TourismAnalyticsService
+
+# Fields that feed the recommendation TF-IDF model
+RECOMMENDATION_CONTENT_FIELDS = {'name', 'type', 'region', 'description'}
+
+
+@receiver(post_save, sender=Destination)
+def refresh_similarity_index_on_save(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Queue a rebuild of the similarity index when a destination's content changes"""
+    # Fixture loads are indexed lazily or by build_recommendation_index
+    if raw:
+        return
+    if update_fields and not RECOMMENDATION_CONTENT_FIELDS.intersection(update_fields):
+        return
+    RecommendationService.schedule_rebuild()
+
+
+@receiver(post_delete, sender=Destination)
+def refresh_similarity_index_on_delete(sender, instance, **kwargs):
+    """Drop a deleted destination from the similarity index"""
+    RecommendationService.schedule_rebuild()
+
+
+@receiver(post_save, sender=APIKey)
+@receiver(post_delete, sender=APIKey)
+def invalidate_cached_api_key(sender, instance, **kwargs):
+    """Drop cached copies of a key edited or deleted outside revoke_api_key (e.g. the admin)"""
+    APIKeyService.invalidate(instance.key)
+
+
+@receiver(pre_save)
+def normalize_array_fields(sender, instance, **kwargs):
+    """Store filterable ArrayField values lower-cased (also applies to fixture loads)"""
+    for field in getattr(sender, 'normalized_array_fields', ()):
+        values = getattr(instance, field)
+        if values:
+            setattr(instance, field, [normalize_array_value(value) for value in values])
+
+
+@receiver(post_save)
+@receiver(post_delete)
+def bump_cache_version(sender, instance, **kwargs):
+    """Invalidate cached responses built from this model, including child models like Room or TrailAlert"""
+    # Imported here: the views import the services this module wires up
+    from .views import get_cached_response_models
+
+    # Bookkeeping writes (jobs, API usage, ...) back no cached response
+    if sender in get_cached_response_models():
+        CacheVersionService.bump(sender)
+
+
+@receiver(post_save, sender=TourismStat)
+@receiver(post_delete, sender=TourismStat)
+@receiver(post_save, sender=NationalityStat)
+@receiver(post_delete, sender=NationalityStat)
+def refresh_tourism_rollups(sender, instance, **kwargs):
+    """Queue a refresh of the tourism analytics series; PurposeStat feeds no rollup"""
+    TourismAnalyticsService.schedule_refresh()
@@ -0,0 +1,62 @@
+import logging
+
+from django.conf import settings
+from django.core.mail import send_mail
+
+from .services.jobs import JobService, job_task
+from .services.recommendations import RecommendationService
+from .services.tourism_analytics import TourismAnalyticsService
+from .services.trail_status import TrailStatusService
+from .services.weather import WeatherService
+from .services.weather_history import WeatherHistoryService
+
+logger = logging.getLogger(__name__)
+
+
+@job_task('email.send')
+def send_email(subject, message, recipient_list, from_email=None):
+    send_mail(subject, message, from_email or settings.DEFAULT_FROM_EMAIL, recipient_list, fail_silently=False)
+
+
+@job_task('weather.refresh')
+def refresh_weather():
+    results = WeatherService.update_all_locations()
+    failures = [result for result in results if result['error']]
+    if results and len(failures) == len(results):
+        raise RuntimeError(f"Weather refresh failed for all {len(results)} locations")
+
+
+@job_task('weather.refresh_location')
+def refresh_location_weather(location):
+    if not WeatherService.refresh_current_weather(location):
+        raise RuntimeError(f"Could not fetch current weather for {location}")
+
+
+@job_task('weather.partitions')
+def maintain_weather_partitions():
+    WeatherHistoryService.ensure_partitions()
+    WeatherHistoryService.expire_partitions()
+
+
+@job_task('trails.import')
+def import_trails(source_url=None):
+    if not (source_url or getattr(settings, 'TRAIL_STATUS_API_URL', None)):
+        logger.info("TRAIL_STATUS_API_URL is not configured, skipping the trail import")
+        return
+    if TrailStatusService.import_trail_updates_from_external_source(source_url) is False:
+        raise RuntimeError("Trail import failed")
+
+
+@job_task('recommendations.rebuild_index')
+def rebuild_similarity_index():
+    RecommendationService.rebuild_similarity_index()
+
+
+@job_task('tourism.refresh_rollups')
+def refresh_tourism_rollups():
+    TourismAnalyticsService.refresh()
+
+
+@job_task('jobs.prune')
+def prune_jobs():
+    JobService.prune()
@@ -0,0 +1,30 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+def assert_constant_queries(testcase, create_rows, fetch, sizes=(1, 25)):
+    """
+    Assert that `fetch()` runs the same number of queries however many rows exist.
+
+    `create_rows(n)` seeds `n` additional rows, `fetch()` performs the request
+    under test (e.g. `lambda: self.client.get('/api/v1/lodgings/')`). The
+    query count is captured after seeding each entry of `sizes` and must not
+    change, which catches N+1 regressions in nested serializers. The cache is
+    cleared before each fetch so cached responses don't hide the queries.
+    """
+    counts = []
+    seeded = 0
+    for size in sizes:
+        create_rows(size - seeded)
+        seeded = size
+        cache.clear()
+        with CaptureQueriesContext(connection) as context:
+            fetch()
+        counts.append(len(context.captured_queries))
+
+    testcase.assertEqual(
+        len(set(counts)), 1,
+        f"Query count grows with row count: {dict(zip(sizes, counts))}"
+    )
+    return counts[0]
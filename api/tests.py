@@ -1,3 +1,442 @@
-from django.test import TestCase
+import json
+import random
+from datetime import time, timedelta
+
+from decimal import Decimal
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from django.db import connection
+from django.contrib.postgres.search import SearchQuery
+from django.test import RequestFactory, TestCase, override_settings
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from .models import (
+    Destination, DestinationPhoto, Event, EventLink, EventPhoto, Guide, GuideReview, IssuingOffice, Lodging,
+    LodgingPhoto, Permit, PermitFee, PermitOffice, Room, TourismStat, TrailAlert, TrailSegment, TrailStatus,
+    WeatherData, WeatherForecast
+)
+from .renderers import FastJSONRenderer
+from .services.trail_status import TrailStatusService
+from .services.weather import WeatherService
+from .testing import assert_constant_queries
+from .views import DestinationViewSet, LodgingViewSet
+
+# The tests run in one process, so a per-process cache behaves like the shared one
+LOCAL_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+class QueryPlanTests(TestCase):
+    """EXPLAIN the hot service and viewset queries over a large skewed dataset: none may scan sequentially"""
+    rows = 20000
+
+    @classmethod
+    def setUpTestData(cls):
+        cls._seed(random.Random(42), cls.rows)
+        with connection.cursor() as cursor:
+            for model in (Destination, Lodging, Guide, Event, TrailStatus, WeatherData, WeatherForecast, TourismStat):
+                cursor.execute(f"ANALYZE {model._meta.db_table}")
+
+    def test_hot_queries_use_indexes(self):
+        for label, queryset in self._hot_queries():
+            with self.subTest(label):
+                plan = json.loads(queryset.explain(format='json'))
+                self.assertFalse(
+                    self._has_seq_scan(plan, queryset.model._meta.db_table),
+                    f"{label} falls back to a sequential scan"
+                )
+
+    @staticmethod
+    def _hot_queries():
+        now = timezone.now()
+        today = now.date()
+        return [
+            ('WeatherService.get_current_weather', WeatherData.objects.filter(
+                location__iexact='location 7', timestamp__gte=now - timedelta(hours=3)
+            ).order_by('-timestamp')[:1]),
+            ('WeatherService.get_historical_weather', WeatherService.get_historical_weather(
+                'Location 7', now - timedelta(days=7)
+            )),
+            ('WeatherService.get_forecast', WeatherForecast.objects.filter(
+                location__iexact='location 7', date__gte=today, date__lt=today + timedelta(days=7)
+            ).order_by('date')),
+            ('TrailStatusService.get_trails_by_region', TrailStatusService.get_trails_by_region('region 7')),
+            ('TrailStatusService.get_trails_by_status', TrailStatusService.get_trails_by_status('closed')),
+            ('DestinationViewSet ?region=', Destination.objects.filter(region='Region 7')),
+            ('DestinationViewSet.heritage', Destination.objects.filter(type='heritage')),
+            ('DestinationViewSet list', Destination.objects.order_by('-created_at', '-id')[:50]),
+            ('LodgingViewSet ?place=', Lodging.objects.filter(place='Place 7', availability=True)),
+            ('LodgingViewSet.by_destination', Lodging.objects.filter(destination_id='destination-7')),
+            ('GuideViewSet.top_rated', Guide.objects.filter(rating__gte=4.5, available=True)),
+            ('EventViewSet.upcoming', Event.objects.filter(end_date__gte=today).order_by('start_date')),
+            ('TourismStatViewSet.annual', TourismStat.objects.filter(month__isnull=True).order_by('-year')),
+            ('TourismStatViewSet.monthly', TourismStat.objects.filter(year=1500, month__isnull=False).order_by('month')),
+            ('WeatherDataViewSet list', WeatherData.objects.order_by('-timestamp', '-id')[:50]),
+        ]
+
+    @classmethod
+    def _has_seq_scan(cls, plan, table):
+        if isinstance(plan, list):
+            return any(cls._has_seq_scan(node, table) for node in plan)
+        node = plan.get('Plan', plan)
+        relation = node.get('Relation Name', '')
+        # Partitioned tables (WeatherData) are scanned through their partitions
+        if node.get('Node Type') == 'Seq Scan' and (relation == table or relation.startswith(f"{table}_")):
+            return True
+        return any(cls._has_seq_scan(child, table) for child in node.get('Plans', []))
+
+    @staticmethod
+    def _seed(rng, rows):
+        """Seed realistic, skewed data: a few rare values are the selective ones queried"""
+        now = timezone.now()
+        today = now.date()
+
+        Destination.objects.bulk_create((
+            Destination(
+                id=f"destination-{i}",
+                name=f"Destination {i}",
+                type='heritage' if rng.random() < 0.02 else rng.choice(['city', 'trek', 'park', 'cultural']),
+                region=f"Region {rng.randrange(200)}",
+                difficulty=rng.choice(['easy', 'moderate', 'hard']),
+            )
+            for i in range(rows)
+        ), batch_size=5000)
+
+        Lodging.objects.bulk_create((
+            Lodging(
+                name=f"Lodge {i}",
+                type=rng.choice(['hotel', 'guesthouse', 'teahouse', 'lodge']),
+                destination_id=f"destination-{rng.randrange(rows)}",
+                place=f"Place {rng.randrange(500)}",
+                latitude=round(rng.uniform(26.3, 30.5), 6),
+                longitude=round(rng.uniform(80.0, 88.2), 6),
+                min_price=1000,
+                max_price=5000,
+                availability=rng.random() < 0.8,
+            )
+            for i in range(rows)
+        ), batch_size=5000)
+
+        Guide.objects.bulk_create((
+            Guide(
+                name=f"Guide {i}",
+                license_id=f"LIC-{i}",
+                phone='000',
+                languages=['english'],
+                regions=['khumbu'],
+                experience_years=5,
+                rating=round(rng.uniform(4.5, 5.0) if rng.random() < 0.02 else rng.uniform(2.0, 4.4), 1),
+                available=rng.random() < 0.5,
+                daily_rate=3000,
+            )
+            for i in range(rows)
+        ), batch_size=5000)
+
+        def event_dates():
+            # Mostly past events, a few upcoming ones
+            start = today + timedelta(days=rng.randrange(1, 90) if rng.random() < 0.02 else -rng.randrange(1, 3650))
+            return start, start + timedelta(days=rng.randrange(0, 5))
+
+        Event.objects.bulk_create((
+            Event(
+                name=f"Event {i}",
+                type='cultural',
+                start_date=start,
+                end_date=end,
+                city='Kathmandu',
+                venue='Durbar Square',
+                latitude=27.7,
+                longitude=85.3,
+                description='Synthetic event',
+            )
+            for i, (start, end) in ((i, event_dates()) for i in range(rows))
+        ), batch_size=5000)
+
+        TrailStatus.objects.bulk_create((
+            TrailStatus(
+                name=f"Trail {i}",
+                region=f"Region {rng.randrange(200)}",
+                status='closed' if rng.random() < 0.03 else rng.choice(['open', 'caution']),
+                source='synthetic',
+            )
+            for i in range(rows)
+        ), batch_size=5000)
+
+        WeatherData.objects.bulk_create((
+            WeatherData(
+                location=f"Location {rng.randrange(500)}",
+                latitude=27.7,
+                longitude=85.3,
+                elevation=1400,
+                timestamp=now - timedelta(minutes=rng.randrange(60 * 24 * 365)),
+                temperature=20,
+                feels_like=20,
+                condition='Clear',
+                wind_speed=5,
+                wind_direction='N',
+                precipitation=0,
+                humidity=50,
+                pressure=1013,
+                visibility=10000,
+                uv_index=5,
+            )
+            for _ in range(rows)
+        ), batch_size=5000)
+
+        days = 40
+        WeatherForecast.objects.bulk_create((
+            WeatherForecast(
+                location=f"Location {i // days}",
+                date=today + timedelta(days=i % days - days // 2),
+                min_temp=10,
+                max_temp=20,
+                condition='Clear',
+                precipitation_chance=10,
+                sunrise=time(6, 0),
+                sunset=time(18, 0),
+            )
+            for i in range(rows)
+        ), batch_size=5000)
+
+        TourismStat.objects.bulk_create((
+            TourismStat(year=1000 + i // 13, month=(i % 13) or None, total_arrivals=1000)
+            for i in range(rows)
+        ), batch_size=5000)
+
+
+class FastSerializerParityTests(TestCase):
+    """The .values() list serializers must render the same bytes as the ModelSerializers"""
+
+    @classmethod
+    def setUpTestData(cls):
+        full = Destination.objects.create(
+            id='parity-full', name='Everest Base Camp', type='trek', region='Khumbu',
+            description='Classic "trek"', difficulty='hard', duration=14,
+            max_elevation=Decimal('5364.00'), min_elevation=Decimal('2860.50'),
+            latitude=Decimal('27.988056'), longitude=Decimal('86.925278'),
+            best_season=['spring', 'autumn'], permits_required=['tims'], highlights=['views', 'monasteries'],
+        )
+        DestinationPhoto.objects.create(destination=full, photo='destinations/ebc.jpg', caption='Camp', is_primary=True)
+        DestinationPhoto.objects.create(destination=full, photo='destinations/ebc-2.jpg')
+        Destination.objects.create(
+            id='parity-sparse', name='Line\u2028separated Sagarmāthā', type='city', region='Bagmati',
+            longitude=Decimal('85.324000'),
+        )
+        Destination.objects.create(
+            id='parity-min-elevation', name='Terai', type='park', region='Chitwan', min_elevation=Decimal('150.00'),
+        )
+
+        lodge = Lodging.objects.create(
+            id='parity-lodge', name='Yak Lodge', type='lodge', destination=full, place='Lukla',
+            latitude=Decimal('27.687000'), longitude=Decimal('86.731000'), phone='+977-1-4000000',
+            email='yak@example.com', website='https://yak.example.com', min_price=1000, max_price=5000,
+            rating=Decimal('4.5'), amenities=['wifi', 'hot shower'], booking_link='https://yak.example.com/book',
+        )
+        Room.objects.create(lodging=lodge, room_type='Twin', price=1500, amenities=['heater'])
+        Room.objects.create(lodging=lodge, room_type='Dorm', price=1000, capacity=6)
+        LodgingPhoto.objects.create(lodging=lodge, photo='lodgings/yak.jpg')
+        Lodging.objects.create(
+            id='parity-teahouse', name='Teahouse', type='teahouse', place='Namche',
+            latitude=Decimal('27.805000'), longitude=Decimal('86.713000'), min_price=500, max_price=800,
+            availability=False,
+        )
+
+    def test_fast_list_output_matches_model_serializer(self):
+        request = RequestFactory().get('/')
+        for viewset in (DestinationViewSet, LodgingViewSet):
+            with self.subTest(viewset.__name__):
+                queryset = viewset.queryset.defer('search_vector').order_by(*viewset.ordering)
+
+                rows = queryset.prefetch_related(*viewset.prefetch_related_fields)
+                data = viewset.serializer_class(rows, many=True, context={'request': request}).data
+                expected = JSONRenderer().render(data)
+
+                serializer = viewset.fast_serializer_class(context={'request': request})
+                actual = FastJSONRenderer().render(serializer.serialize(queryset.values(*serializer.get_columns())))
+
+                self.assertEqual(actual, expected)
+
+
+@override_settings(CACHES=LOCAL_CACHES)
+class ListQueryCountTests(TestCase):
+    """List endpoints with nested relations run the same number of queries for 1 or 25 rows"""
+
+    def setUp(self):
+        self.ids = itertools.count()
+
+    def assert_list_queries_constant(self, path, create_rows):
+        def fetch():
+            response = self.client.get(path)
+            self.assertEqual(response.status_code, 200)
+
+        assert_constant_queries(self, create_rows, fetch)
+
+    def test_lodgings(self):
+        destination = Destination.objects.create(name='Lukla', type='city', region='Khumbu')
+
+        def create_rows(count):
+            for _ in range(count):
+                lodging = Lodging.objects.create(
+                    name=f"Lodge {next(self.ids)}", type='lodge', destination=destination, place='Lukla',
+                    latitude=27.687, longitude=86.731, min_price=1000, max_price=5000,
+                )
+                Room.objects.create(lodging=lodging, room_type='Twin', price=1500)
+                Room.objects.create(lodging=lodging, room_type='Dorm', price=1000)
+                LodgingPhoto.objects.create(lodging=lodging, photo='lodgings/lodge.jpg')
+
+        self.assert_list_queries_constant('/api/v1/lodgings/', create_rows)
+
+    def test_trails(self):
+        def create_rows(count):
+            for _ in range(count):
+                trail = TrailStatus.objects.create(
+                    name=f"Trail {next(self.ids)}", region='Khumbu', status='open', source='test'
+                )
+                for name in ('Lukla - Phakding', 'Phakding - Namche'):
+                    segment = TrailSegment.objects.create(trail=trail, segment=name, status='open', description='')
+                    TrailAlert.objects.create(segment=segment, type='snow', severity='low', description='Icy')
+
+        self.assert_list_queries_constant('/api/v1/trails/', create_rows)
+
+    def test_permits(self):
+        office = IssuingOffice.objects.create(
+            name='Tourism Board', address='Kathmandu', latitude=27.7, longitude=85.3, hours='10-17'
+        )
+
+        def create_rows(count):
+            for _ in range(count):
+                permit = Permit.objects.create(
+                    name=f"Permit {next(self.ids)}", description='', regions=['khumbu'],
+                    required_documents=['passport'], application_process='', validity='30 days',
+                )
+                PermitFee.objects.create(permit=permit, nationality='Foreign', amount=3000)
+                PermitFee.objects.create(permit=permit, nationality='SAARC', amount=1000)
+                PermitOffice.objects.create(permit=permit, office=office)
+
+        self.assert_list_queries_constant('/api/v1/permits/', create_rows)
+
+    def test_guides(self):
+        def create_rows(count):
+            for _ in range(count):
+                n = next(self.ids)
+                guide = Guide.objects.create(
+                    name=f"Guide {n}", license_id=f"LIC-{n}", phone='000', languages=['english'],
+                    regions=['khumbu'], experience_years=5, daily_rate=3000,
+                )
+                GuideReview.objects.create(guide=guide, user_name='Asha', rating=5, comment='Great')
+                GuideReview.objects.create(guide=guide, user_name='Ben', rating=4, comment='Good')
+
+        self.assert_list_queries_constant('/api/v1/guides/', create_rows)
+
+    def test_events(self):
+        today = timezone.now().date()
+
+        def create_rows(count):
+            for _ in range(count):
+                event = Event.objects.create(
+                    name=f"Event {next(self.ids)}", type='cultural', start_date=today, end_date=today,
+                    city='Kathmandu', venue='Durbar Square', latitude=27.7, longitude=85.3, description='',
+                )
+                EventPhoto.objects.create(event=event, photo='events/event.jpg')
+                EventLink.objects.create(event=event, title='Tickets', url='https://example.com')
+
+        self.assert_list_queries_constant('/api/v1/events/', create_rows)
+
+
+class StubWeatherAPI(BaseHTTPRequestHandler):
+    """Minimal stand-in for the weather API's /forecast.json; the location "Broken" answers 500"""
+
+    def do_GET(self):
+        query = parse_qs(urlsplit(self.path).query)
+        location = query['q'][0]
+        if location == 'Broken':
+            self.send_error(500)
+            return
+
+        today = timezone.now().date()
+        body = json.dumps({
+            'location': {'name': location, 'lat': 27.7172, 'lon': 85.324},
+            'current': {
+                'temp_c': 21, 'feelslike_c': 20, 'condition': {'text': 'Sunny'},
+                'wind_kph': 5, 'wind_dir': 'N', 'precip_mm': 0.2, 'humidity': 40,
+                'pressure_mb': 1013, 'vis_km': 10, 'uv': 5,
+            },
+            'forecast': {'forecastday': [
+                {
+                    'date': (today + timedelta(days=day)).isoformat(),
+                    'day': {'mintemp_c': 10 + day, 'maxtemp_c': 25, 'condition': {'text': 'Sunny'}, 'daily_chance_of_rain': 10},
+                    'astro': {'sunrise': '06:05 AM', 'sunset': '05:45 PM'},
+                }
+                for day in range(int(query['days'][0]))
+            ]},
+        }).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@override_settings(CACHES=LOCAL_CACHES)
+class WeatherRefreshTests(TestCase):
+    """update_all_locations against a local stub of the weather API"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), StubWeatherAPI)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.addClassCleanup(cls.server.server_close)
+        cls.addClassCleanup(cls.server.shutdown)
+
+    def test_refresh_bulk_inserts_readings_and_upserts_forecasts(self):
+        today = timezone.now().date()
+        for location in ('Kathmandu', 'Pokhara', 'Broken'):
+            WeatherForecast.objects.create(
+                location=location, date=today, min_temp=-5, max_temp=0, condition='Snow',
+                precipitation_chance=90, sunrise=time(7, 0), sunset=time(17, 0),
+            )
+
+        base_url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        with override_settings(WEATHER_API_BASE_URL=base_url):
+            results = WeatherService.update_all_locations(max_workers=4, requests_per_second=0, days=3)
+
+        errors = {result['location']: result['error'] for result in results}
+        self.assertEqual(errors, {'Kathmandu': None, 'Pokhara': None, 'Broken': 'HTTP 500'})
+
+        readings = WeatherData.objects.filter(location__in=['Kathmandu', 'Pokhara'])
+        self.assertEqual(readings.count(), 2)
+        self.assertEqual({reading.temperature for reading in readings}, {21})
+        self.assertFalse(WeatherData.objects.filter(location='Broken').exists())
+
+        # Today's rows were updated in place, the next two days inserted
+        for location in ('Kathmandu', 'Pokhara'):
+            forecasts = list(WeatherForecast.objects.filter(location=location).order_by('date'))
+            self.assertEqual([forecast.date for forecast in forecasts], [today + timedelta(days=day) for day in range(3)])
+            self.assertEqual([forecast.min_temp for forecast in forecasts], [10, 11, 12])
+            self.assertEqual(forecasts[0].condition, 'Sunny')
+        self.assertEqual(WeatherForecast.objects.get(location='Broken').condition, 'Snow')
+
+
+class SearchVectorTests(TestCase):
+    """search_vector is kept by a database trigger, so bulk writes are searchable too"""
+
+    def assert_searchable(self, term, pk):
+        matches = Destination.objects.filter(search_vector=SearchQuery(term, config='english'))
+        self.assertEqual(list(matches.values_list('pk', flat=True)), [pk])
+
+    def test_bulk_create_and_update_refresh_the_vector(self):
+        Destination.objects.bulk_create([
+            Destination(id='bulk', name='Gokyo Lakes', type='trek', region='Khumbu', highlights=['turquoise'])
+        ])
+        self.assert_searchable('gokyo', 'bulk')
+        self.assert_searchable('turquoise', 'bulk')
+
+        Destination.objects.filter(pk='bulk').update(name='Renjo Pass')
+        self.assert_searchable('renjo', 'bulk')
+        self.assertFalse(Destination.objects.filter(search_vector=SearchQuery('gokyo', config='english')).exists())
 
-# Create your tests here.
@@ -3,7 +3,8 @@ from rest_framework.routers import DefaultRouter
 from .views import (
     DestinationViewSet, LodgingViewSet, GuideViewSet, AgencyViewSet,
     PermitViewSet, EventViewSet, TrailStatusViewSet, WeatherDataViewSet,
-    WeatherForecastViewSet, TourismStatViewSet
+    WeatherForecastViewSet, TourismStatViewSet, IssuingOfficeViewSet,
+    weather_latest, weather_mountain, forecast_for_location, trail_alerts
 )
 
 # Create a router and register our viewsets with it
@@ -13,6 +14,7 @@ router.register(r'lodgings', LodgingViewSet)
 router.register(r'guides', GuideViewSet)
 router.register(r'agencies', AgencyViewSet)
 router.register(r'permits', PermitViewSet)
+router.register(r'offices', IssuingOfficeViewSet)
 router.register(r'events', EventViewSet)
 router.register(r'trails', TrailStatusViewSet)
 router.register(r'weather', WeatherDataViewSet)
@@ -22,5 +24,11 @@ router.register(r'weather-forecast', WeatherForecastViewSet, basename='weather-f
 
 # The API URLs are now determined automatically by the router
 urlpatterns = [
+    # Async views, routed ahead of the viewsets they extend
+    path('weather/latest/', weather_latest, name='weatherdata-latest'),
+    path('weather/mountain/', weather_mountain, name='weatherdata-mountain'),
+    path('forecasts/for_location/', forecast_for_location, name='weatherforecast-for-location'),
+    path('weather-forecast/for_location/', forecast_for_location, name='weather-forecast-for-location'),
+    path('trails/alerts/', trail_alerts, name='trailstatus-alerts'),
     path('', include(router.urls)),
 ]
\ No newline at end of file
@@ -1,6 +1,9 @@
 from rest_framework import viewsets, filters, permissions
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import BrowsableAPIRenderer
+from rest_framework.settings import api_settings
 from django_filters.rest_framework import DjangoFilterBackend, FilterSet
 from django.shortcuts import get_object_or_404
 from django_filters import CharFilter
@@ -8,18 +11,29 @@ from django.shortcuts import render
 
 from .models import (
     Destination, Lodging, Guide, Agency, Permit,
-    Event, TrailStatus, WeatherData, WeatherForecast, TourismStat
+    Event, TrailStatus, WeatherData, WeatherForecast, TourismStat, IssuingOffice,
+    normalize_array_value
 )
 from .serializers.serializers import (
     DestinationSerializer, LodgingSerializer, GuideSerializer, 
     AgencySerializer, PermitSerializer, EventSerializer, 
     TrailStatusSerializer, WeatherDataSerializer, WeatherForecastSerializer,
-    TourismStatSerializer, UserRegistrationSerializer, UserProfileSerializer
+    TourismStatSerializer, UserRegistrationSerializer, UserProfileSerializer,
+    IssuingOfficeSerializer, DynamicFieldsModelSerializer
 )
+from .serializers.fast import FastDestinationSerializer, FastLodgingSerializer
 from .services.weather import WeatherService
+from .services.weather_history import HISTORY_INTERVALS, WeatherHistoryService
+from .pagination import KeysetCursorPagination
+from .renderers import FastJSONRenderer
+from .search import FullTextSearchFilter, SearchRankOrderingFilter
+from .services.api_keys import APIKeyService
+from .services.geo import GeoService
+from .services.tourism_analytics import TOP_NATIONALITIES_LIMIT, TourismAnalyticsService
 from api.services.trail_status import TrailStatusService
-from django.utils.decorators import method_decorator
-from django.views.decorators.cache import cache_page
+from .services.cache_versions import CacheVersionService
+from .services.jobs import JobService
+from django.core.cache import cache
 
 from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
@@ -32,30 +46,349 @@ from django.contrib.auth import authenticate
 from django.contrib.auth.tokens import default_token_generator
 from django.utils.http import urlsafe_base64_encode
 from django.utils.encoding import force_bytes
-from django.core.mail import send_mail
 from django.conf import settings
 from rest_framework_simplejwt.tokens import AccessToken
 from django.contrib.auth import login
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.views.decorators.http import require_POST
-from django.http import Http404
+from django.views.decorators.http import require_GET, require_POST
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from datetime import datetime, timedelta
+from rest_framework.utils.encoders import JSONEncoder
+import csv
+import functools
+import hashlib
+import json
+
+# Cached list/detail responses; keys embed the model versions, so entries
+# are invalidated by writes rather than by their timeout
+RESPONSE_CACHE_KEY = "api_response_{model}_{versions}_{action}_{tier}_{path}"
+RESPONSE_CACHE_DURATION = 60 * 60 * 6  # 6 hours
+
+class _Echo:
+    """File-like object whose write() hands back the value, for streaming csv.writer output"""
+    def write(self, value):
+        return value
+
+
+def _flatten(data, prefix=''):
+    """Flatten nested serializer output into dotted CSV columns"""
+    flat = {}
+    for key, value in data.items():
+        column = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(_flatten(value, f"{column}."))
+        elif isinstance(value, list):
+            flat[column] = json.dumps(value, cls=JSONEncoder)
+        else:
+            flat[column] = value
+    return flat
+
+
+def stream_ndjson(rows):
+    """Yield one JSON document per line for each serialized row"""
+    for row in rows:
+        yield json.dumps(row, cls=JSONEncoder) + '\n'
+
+
+def stream_csv(rows):
+    """Yield CSV lines for serialized rows; columns come from the first row"""
+    writer = csv.writer(_Echo())
+    columns = None
+    for row in rows:
+        flat = _flatten(row)
+        if columns is None:
+            columns = list(flat)
+            yield writer.writerow(columns)
+        yield writer.writerow([flat.get(column) for column in columns])
+
+
+def _parse_history_bound(value):
+    """Parse an ISO date or datetime query parameter: None if absent, False if invalid"""
+    if not value:
+        return None
+    try:
+        parsed = parse_datetime(value)
+        if parsed is None:
+            day = parse_date(value)
+            if day is None:
+                return False
+            parsed = datetime.combine(day, datetime.min.time())
+    except ValueError:
+        return False
+    return parsed if timezone.is_aware(parsed) else timezone.make_aware(parsed)
+
 
 class CachedReadOnlyModelViewSet(viewsets.ReadOnlyModelViewSet):
-    """Base ViewSet with caching for list and retrieve actions"""
+    """
+    Base ViewSet with caching for list and retrieve actions.
+    List responses are keyset-paginated; subclasses set `ordering` to an
+    indexed column with a unique tie-breaker.
+
+    List and detail responses are cached under versioned keys (see
+    CacheVersionService), so writes invalidate them immediately.
+
+    `?fields=`, `?expand=` and `?omit=` narrow the serialized fields, the
+    loaded columns and the prefetched relations together.
+
+    Subclasses declare the relations their serializer reads in
+    `select_related_fields` / `prefetch_related_fields`. The plan is applied
+    by `get_queryset()`, so list, retrieve and custom actions all load a page
+    in a fixed number of queries regardless of its size.
+
+    Subclasses that set `fast_serializer_class` (see api.serializers.fast)
+    build list pages from `.values()` rows instead of model instances and
+    ModelSerializers, unless a sparse fieldset is requested or
+    API_FAST_SERIALIZATION is off.
+    """
+    pagination_class = KeysetCursorPagination
+    export_chunk_size = 2000
+    select_related_fields = ()
+    prefetch_related_fields = ()
+    fast_serializer_class = None
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        # The tsvector is only ever filtered on, never serialized
+        if getattr(queryset.model, 'search_vector_fields', ()):
+            queryset = queryset.defer('search_vector')
+        
+        prefetch_related_fields = self.prefetch_related_fields
+        selection = self.get_field_selection()
+        if selection:
+            # Load only the columns and relations the selected fields read
+            serializer_class = self.get_serializer_class()
+            selected = serializer_class.select_fields(**selection)
+            paths = serializer_class.get_prefetch_paths(selected)
+            prefetch_related_fields = [path for path in prefetch_related_fields if path in paths]
+            columns = serializer_class.get_model_columns(selected)
+            if columns is not None:
+                queryset = queryset.only(*columns, *self.get_ordering_columns(queryset.model))
+        
+        if self.select_related_fields:
+            queryset = queryset.select_related(*self.select_related_fields)
+        if prefetch_related_fields:
+            queryset = queryset.prefetch_related(*prefetch_related_fields)
+        return queryset
     
-    @method_decorator(cache_page(60*1))  # Cache for 15 minutes
-    def list(self, request, *args, **kwargs):
-        return super().list(request, *args, **kwargs)
+    def get_field_selection(self):
+        """
+        Sparse fieldset from `?fields=`, `?expand=` and `?omit=` (comma-separated),
+        as serializer kwargs; empty when none is given or the serializer can't narrow.
+        """
+        serializer_class = self.get_serializer_class()
+        if self.request is None or not issubclass(serializer_class, DynamicFieldsModelSerializer):
+            return {}
         
-    @method_decorator(cache_page(60*15))  # Cache for 15 minutes
+        selection = {}
+        for param in ('fields', 'expand', 'omit'):
+            value = self.request.query_params.get(param)
+            if not value:
+                continue
+            names = [name.strip() for name in value.split(',') if name.strip()]
+            allowed = getattr(serializer_class.Meta, 'expandable_fields', {}) if param == 'expand' else serializer_class.Meta.fields
+            unknown = sorted(set(names) - set(allowed))
+            if unknown:
+                raise ParseError(f"Unknown field(s) in '{param}': {', '.join(unknown)}")
+            selection[param] = names
+        return selection
+    
+    def get_ordering_columns(self, model):
+        """Model fields the keyset paginator reads from each row of a page"""
+        ordering = list(self.ordering or ())
+        ordering += self.request.query_params.get(api_settings.ORDERING_PARAM, '').split(',')
+        concrete = {field.name for field in model._meta.concrete_fields}
+        return {name.strip().lstrip('-') for name in ordering if name.strip().lstrip('-') in concrete}
+    
+    def get_serializer(self, *args, **kwargs):
+        for key, value in self.get_field_selection().items():
+            kwargs.setdefault(key, value)
+        return super().get_serializer(*args, **kwargs)
+
+    def get_cache_models(self):
+        """The model and every related model its query plan (and so its serializer) reads"""
+        model = self.queryset.model
+        models = [model]
+        for path in (*self.select_related_fields, *self.prefetch_related_fields):
+            current = model
+            for name in path.split('__'):
+                current = current._meta.get_field(name).related_model
+                if current not in models:
+                    models.append(current)
+        return models
+
+    def get_response_cache_key(self, request, versions):
+        """Cache key for a list/detail response, scoped to the given model versions"""
+        api_key = getattr(request, 'api_key', None)
+        # The tier caps page_size, so it is part of the response identity
+        tier = api_key.tier if api_key else 'anonymous'
+        path = hashlib.md5(request.get_full_path().encode()).hexdigest()
+        return RESPONSE_CACHE_KEY.format(
+            model=self.queryset.model._meta.label_lower,
+            versions='.'.join(str(version) for version in versions),
+            action=self.action,
+            tier=tier,
+            path=path,
+        )
+
+    def cached_response(self, request, handler, *args, **kwargs):
+        """
+        Serve a list/detail response through the versioned cache.
+
+        The ETag and Last-Modified validators are derived from the model
+        versions alone, so a conditional request that matches is answered
+        with 304 Not Modified without touching the database or serializers.
+        """
+        versions = CacheVersionService.get_versions(self.get_cache_models())
+        cache_key = self.get_response_cache_key(request, versions)
+        # JSON and the browsable API are different representations of the same data
+        etag = quote_etag(hashlib.md5(f"{cache_key}:{request.accepted_renderer.format}".encode()).hexdigest())
+        last_modified = CacheVersionService.last_modified(versions)
+
+        not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if not_modified is not None:
+            not_modified['ETag'] = etag
+            return not_modified
+
+        data = cache.get(cache_key)
+        if data is not None:
+            response = Response(data)
+        else:
+            response = handler(request, *args, **kwargs)
+            if response.status_code == 200:
+                duration = getattr(settings, 'API_RESPONSE_CACHE_DURATION', RESPONSE_CACHE_DURATION)
+                cache.set(cache_key, response.data, duration)
+
+        if response.status_code == 200:
+            response['ETag'] = etag
+            response['Last-Modified'] = http_date(last_modified)
+        return response
+
+    def use_fast_serializer(self):
+        return (
+            self.fast_serializer_class is not None
+            and getattr(settings, 'API_FAST_SERIALIZATION', True)
+            and not self.get_field_selection()
+        )
+
+    def fast_list(self, request, *args, **kwargs):
+        """list() over `.values()` rows, with the same output as serializer_class"""
+        queryset = self.filter_queryset(self.get_queryset())
+        serializer = self.fast_serializer_class(context=self.get_serializer_context())
+        # Annotations (e.g. search_rank) are kept for the keyset cursor
+        rows = queryset.prefetch_related(None).values(*serializer.get_columns(), *queryset.query.annotations)
+
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(serializer.serialize(page))
+        return Response(serializer.serialize(rows))
+
+    def list(self, request, *args, **kwargs):
+        handler = self.fast_list if self.use_fast_serializer() else super().list
+        return self.cached_response(request, handler, *args, **kwargs)
+
     def retrieve(self, request, *args, **kwargs):
-        return super().retrieve(request, *args, **kwargs)
+        return self.cached_response(request, super().retrieve, *args, **kwargs)
+
+    @action(detail=False)
+    def export(self, request):
+        """
+        Stream every (filtered) row as NDJSON, or as CSV with `?output=csv`.
+        Rows are read through a server-side cursor in chunks and serialized
+        one at a time, so memory stays flat however many rows are exported.
+        """
+        output = request.query_params.get('output', 'ndjson')
+        if output not in ('ndjson', 'csv'):
+            return Response({"error": "output must be 'ndjson' or 'csv'"}, status=400)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        serializer = self.get_serializer()
+        rows = (
+            serializer.to_representation(obj)
+            for obj in queryset.iterator(chunk_size=self.export_chunk_size)
+        )
+        filename = f"{queryset.model._meta.model_name}-export"
+
+        if output == 'csv':
+            response = StreamingHttpResponse(stream_csv(rows), content_type='text/csv')
+            response['Content-Disposition'] = f'attachment; filename="{filename}.csv"'
+        else:
+            response = StreamingHttpResponse(stream_ndjson(rows), content_type='application/x-ndjson')
+            response['Content-Disposition'] = f'attachment; filename="{filename}.ndjson"'
+        return response
+
+
+@functools.cache
+def get_cached_response_models():
+    """Every model read by some CachedReadOnlyModelViewSet, i.e. whose writes must bump a cache version"""
+    models = set()
+    viewsets_left = CachedReadOnlyModelViewSet.__subclasses__()
+    while viewsets_left:
+        viewset = viewsets_left.pop()
+        viewsets_left.extend(viewset.__subclasses__())
+        if viewset.queryset is not None:
+            models.update(viewset().get_cache_models())
+    return frozenset(models)
+
+
+class NearbyMixin:
+    """Adds a `nearby` action to viewsets whose model has latitude/longitude columns"""
+    nearby_default_radius_km = 10
+    nearby_max_radius_km = 500
+
+    @action(detail=False)
+    def nearby(self, request):
+        """Get items within `radius_km` of `lat`/`lng`, nearest first (page size: `limit`)"""
+        try:
+            lat = float(request.query_params['lat'])
+            lng = float(request.query_params['lng'])
+            radius_km = float(request.query_params.get('radius_km', self.nearby_default_radius_km))
+        except KeyError:
+            return Response({"error": "Both 'lat' and 'lng' parameters are required"}, status=400)
+        except ValueError:
+            return Response({"error": "'lat', 'lng' and 'radius_km' must be numbers"}, status=400)
+
+        if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+            return Response({"error": "'lat' or 'lng' out of range"}, status=400)
+        if not 0 < radius_km <= self.nearby_max_radius_km:
+            return Response({
+                "error": f"'radius_km' must be between 0 and {self.nearby_max_radius_km}"
+            }, status=400)
+
+        queryset = GeoService.nearby(self.filter_queryset(self.get_queryset()), lat, lng, radius_km)
+
+        paginator = KeysetCursorPagination()
+        paginator.ordering = ('distance_km', 'pk')
+        paginator.page_size_query_param = 'limit'
+        page = paginator.paginate_queryset(queryset, request)
+
+        data = self.get_serializer(page, many=True).data
+        for item, obj in zip(data, page):
+            item['distance_km'] = round(obj.distance_km, 3)
+        return paginator.get_paginated_response(data)
+
+
+class ArrayMembershipFilter(CharFilter):
+    """
+    Filter an ArrayField by comma-separated values, e.g. `?amenities=wifi,hot shower`.
+    `contains` matches rows having all values, `overlap` rows having any of them.
+    Values are normalised like the stored ones so the lookup can use a GIN index.
+    """
+    def filter(self, qs, value):
+        values = [normalize_array_value(v) for v in value.split(',') if v.strip()] if value else []
+        if not values:
+            return qs
+        return qs.filter(**{f"{self.field_name}__{self.lookup_expr}": values})
 
 
 # Custom filter sets for handling ArrayFields
 class DestinationFilterSet(FilterSet):
-    best_season = CharFilter(field_name='best_season', lookup_expr='icontains')
+    best_season = ArrayMembershipFilter(field_name='best_season', lookup_expr='contains')
+    best_season__overlap = ArrayMembershipFilter(field_name='best_season', lookup_expr='overlap')
     permits_required = CharFilter(field_name='permits_required', lookup_expr='icontains')
     highlights = CharFilter(field_name='highlights', lookup_expr='icontains')
 
@@ -65,7 +398,8 @@ class DestinationFilterSet(FilterSet):
 
 
 class LodgingFilterSet(FilterSet):
-    amenities = CharFilter(field_name='amenities', lookup_expr='icontains')
+    amenities = ArrayMembershipFilter(field_name='amenities', lookup_expr='contains')
+    amenities__overlap = ArrayMembershipFilter(field_name='amenities', lookup_expr='overlap')
     
     class Meta:
         model = Lodging
@@ -73,9 +407,12 @@ class LodgingFilterSet(FilterSet):
 
 
 class GuideFilterSet(FilterSet):
-    languages = CharFilter(field_name='languages', lookup_expr='icontains')
-    regions = CharFilter(field_name='regions', lookup_expr='icontains')
-    specialization = CharFilter(field_name='specialization', lookup_expr='icontains')
+    languages = ArrayMembershipFilter(field_name='languages', lookup_expr='contains')
+    languages__overlap = ArrayMembershipFilter(field_name='languages', lookup_expr='overlap')
+    regions = ArrayMembershipFilter(field_name='regions', lookup_expr='contains')
+    regions__overlap = ArrayMembershipFilter(field_name='regions', lookup_expr='overlap')
+    specialization = ArrayMembershipFilter(field_name='specialization', lookup_expr='contains')
+    specialization__overlap = ArrayMembershipFilter(field_name='specialization', lookup_expr='overlap')
     
     class Meta:
         model = Guide
@@ -83,8 +420,10 @@ class GuideFilterSet(FilterSet):
 
 
 class AgencyFilterSet(FilterSet):
-    regions = CharFilter(field_name='regions', lookup_expr='icontains')
-    services = CharFilter(field_name='services', lookup_expr='icontains')
+    regions = ArrayMembershipFilter(field_name='regions', lookup_expr='contains')
+    regions__overlap = ArrayMembershipFilter(field_name='regions', lookup_expr='overlap')
+    services = ArrayMembershipFilter(field_name='services', lookup_expr='contains')
+    services__overlap = ArrayMembershipFilter(field_name='services', lookup_expr='overlap')
     
     class Meta:
         model = Agency
@@ -92,7 +431,8 @@ class AgencyFilterSet(FilterSet):
 
 
 class PermitFilterSet(FilterSet):
-    regions = CharFilter(field_name='regions', lookup_expr='icontains')
+    regions = ArrayMembershipFilter(field_name='regions', lookup_expr='contains')
+    regions__overlap = ArrayMembershipFilter(field_name='regions', lookup_expr='overlap')
     
     class Meta:
         model = Permit
@@ -100,7 +440,8 @@ class PermitFilterSet(FilterSet):
 
 
 class EventFilterSet(FilterSet):
-    activities = CharFilter(field_name='activities', lookup_expr='icontains')
+    activities = ArrayMembershipFilter(field_name='activities', lookup_expr='contains')
+    activities__overlap = ArrayMembershipFilter(field_name='activities', lookup_expr='overlap')
     
     class Meta:
         model = Event
@@ -203,14 +544,12 @@ def password_reset(request):
     uid = urlsafe_base64_encode(force_bytes(user.pk))
     reset_url = f"{request.build_absolute_uri('/').rstrip('/')}/reset-password/{uid}/{token}/"
     
-    # Send email
-    send_mail(
-        'Reset your password',
-        f'Click the following link to reset your password: {reset_url}',
-        settings.DEFAULT_FROM_EMAIL,
-        [email],
-        fail_silently=False,
-    )
+    # Send the email from a background job; a reset already queued for this user is reused
+    JobService.enqueue('email.send', {
+        'subject': 'Reset your password',
+        'message': f'Click the following link to reset your password: {reset_url}',
+        'recipient_list': [email],
+    }, dedup_key=f"password_reset_{user.pk}")
     
     return Response({'detail': 'Password reset email sent if email exists'})
 
@@ -267,28 +606,32 @@ def token_verify(request):
         messages.error(request, f"Authentication error: {str(e)}")
         return redirect('/?show_login=true')
 
-class DestinationViewSet(CachedReadOnlyModelViewSet):
+class DestinationViewSet(NearbyMixin, CachedReadOnlyModelViewSet):
     """
     API endpoints for viewing destination information.
     """
     queryset = Destination.objects.all()
+    prefetch_related_fields = ('photos',)
     serializer_class = DestinationSerializer
+    fast_serializer_class = FastDestinationSerializer
+    renderer_classes = [FastJSONRenderer, BrowsableAPIRenderer]
     filterset_class = DestinationFilterSet  # Use our custom filterset
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, FullTextSearchFilter, SearchRankOrderingFilter]
     search_fields = ['name', 'description', 'highlights']
     ordering_fields = ['name', 'created_at', 'updated_at']
+    ordering = ('-created_at', '-id')
     
     @action(detail=False)
     def treks(self, request):
         """Get all trekking destinations"""
-        treks = self.queryset.filter(type='trek')
+        treks = self.get_queryset().filter(type='trek')
         serializer = self.get_serializer(treks, many=True)
         return Response(serializer.data)
     
     @action(detail=False)
     def heritage(self, request):
         """Get all heritage sites"""
-        heritage = self.queryset.filter(type='heritage')
+        heritage = self.get_queryset().filter(type='heritage')
         serializer = self.get_serializer(heritage, many=True)
         return Response(serializer.data)
     
@@ -302,18 +645,64 @@ class DestinationViewSet(CachedReadOnlyModelViewSet):
         
         serializer = self.get_serializer(recommendations, many=True)
         return Response(serializer.data)
+    
+    profile_max_waypoints = 100
+    
+    @action(detail=True, url_path='weather-profile')
+    def weather_profile(self, request, pk=None):
+        """
+        Get weather at every waypoint elevation for every forecast day in one call.
+        Waypoints are `?elevations=1400,2800,3440,5364`, or `steps` (default 5)
+        elevations spread between the destination's min and max elevation.
+        Weather is looked up by the destination name unless `location` is given.
+        """
+        destination = self.get_object()
+        location = request.query_params.get('location') or destination.name
+        
+        try:
+            days = int(request.query_params.get('days', 7))
+            if request.query_params.get('elevations'):
+                elevations = [float(value) for value in request.query_params['elevations'].split(',') if value.strip()]
+            else:
+                steps = int(request.query_params.get('steps', 5))
+                if destination.min_elevation is None and destination.max_elevation is None:
+                    return Response({
+                        "error": "Destination has no elevation range; pass 'elevations'"
+                    }, status=400)
+                low = float(destination.min_elevation if destination.min_elevation is not None else destination.max_elevation)
+                high = float(destination.max_elevation if destination.max_elevation is not None else destination.min_elevation)
+                steps = max(steps, 2) if high != low else 1
+                elevations = [round(low + (high - low) * i / max(steps - 1, 1)) for i in range(steps)]
+        except ValueError:
+            return Response({"error": "'elevations', 'steps' and 'days' must be numbers"}, status=400)
+        
+        if not 0 < len(elevations) <= self.profile_max_waypoints:
+            return Response({
+                "error": f"Between 1 and {self.profile_max_waypoints} waypoints are supported"
+            }, status=400)
+        if not 1 <= days <= 14:
+            return Response({"error": "'days' must be between 1 and 14"}, status=400)
+        
+        profile = WeatherService.get_weather_profile(location, elevations, days)
+        if profile is None:
+            return Response({"error": f"Could not retrieve weather for {location}"}, status=404)
+        return Response(profile)
 
 
-class LodgingViewSet(CachedReadOnlyModelViewSet):
+class LodgingViewSet(NearbyMixin, CachedReadOnlyModelViewSet):
     """
     API endpoints for viewing lodging information.
     """
     queryset = Lodging.objects.all()
+    prefetch_related_fields = ('rooms', 'photos')
     serializer_class = LodgingSerializer
+    fast_serializer_class = FastLodgingSerializer
+    renderer_classes = [FastJSONRenderer, BrowsableAPIRenderer]
     filterset_class = LodgingFilterSet  # Use our custom filterset
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, FullTextSearchFilter, SearchRankOrderingFilter]
     search_fields = ['name', 'place', 'amenities']
     ordering_fields = ['name', 'min_price', 'rating', 'created_at']
+    ordering = ('-created_at', '-id')
     
     @action(detail=False)
     def by_destination(self, request):
@@ -322,7 +711,7 @@ class LodgingViewSet(CachedReadOnlyModelViewSet):
         if not destination_id:
             return Response({"error": "Destination ID is required"}, status=400)
             
-        lodgings = self.queryset.filter(destination_id=destination_id)
+        lodgings = self.get_queryset().filter(destination_id=destination_id)
         serializer = self.get_serializer(lodgings, many=True)
         return Response(serializer.data)
 
@@ -332,16 +721,18 @@ class GuideViewSet(CachedReadOnlyModelViewSet):
     API endpoints for viewing guide information.
     """
     queryset = Guide.objects.all()
+    prefetch_related_fields = ('reviews',)
     serializer_class = GuideSerializer
     filterset_class = GuideFilterSet  # Use our custom filterset
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, FullTextSearchFilter, SearchRankOrderingFilter]
     search_fields = ['name', 'specialization']
     ordering_fields = ['name', 'experience_years', 'daily_rate', 'rating']
+    ordering = ('-created_at', '-id')
     
     @action(detail=False)
     def top_rated(self, request):
         """Get top rated guides (rating >= 4.5)"""
-        top_guides = self.queryset.filter(rating__gte=4.5, available=True)
+        top_guides = self.get_queryset().filter(rating__gte=4.5, available=True)
         serializer = self.get_serializer(top_guides, many=True)
         return Response(serializer.data)
 
@@ -351,11 +742,13 @@ class AgencyViewSet(CachedReadOnlyModelViewSet):
     API endpoints for viewing trekking agency information.
     """
     queryset = Agency.objects.all()
+    prefetch_related_fields = ('reviews',)
     serializer_class = AgencySerializer
     filterset_class = AgencyFilterSet  # Use our custom filterset
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, FullTextSearchFilter, SearchRankOrderingFilter]
     search_fields = ['name', 'services']
     ordering_fields = ['name', 'rating']
+    ordering = ('-created_at', '-id')
 
 
 class PermitViewSet(CachedReadOnlyModelViewSet):
@@ -363,127 +756,169 @@ class PermitViewSet(CachedReadOnlyModelViewSet):
     API endpoints for viewing permit information.
     """
     queryset = Permit.objects.all()
+    prefetch_related_fields = ('fees', 'issuing_offices__office')
     serializer_class = PermitSerializer
     filterset_class = PermitFilterSet  # Use our custom filterset
     filter_backends = [DjangoFilterBackend, filters.SearchFilter]
     search_fields = ['name', 'description']
+    ordering = ('-created_at', '-id')
 
 
-class EventViewSet(CachedReadOnlyModelViewSet):
+class EventViewSet(NearbyMixin, CachedReadOnlyModelViewSet):
     """
     API endpoints for viewing event information.
     """
     queryset = Event.objects.all()
+    prefetch_related_fields = ('photos', 'links')
     serializer_class = EventSerializer
     filterset_class = EventFilterSet  # Use our custom filterset
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, FullTextSearchFilter, SearchRankOrderingFilter]
     search_fields = ['name', 'description', 'activities']
     ordering_fields = ['start_date', 'name']
+    ordering = ('-created_at', '-id')
     
     @action(detail=False)
     def upcoming(self, request):
         """Get upcoming events"""
         from django.utils import timezone
         today = timezone.now().date()
-        upcoming = self.queryset.filter(end_date__gte=today).order_by('start_date')
+        upcoming = self.get_queryset().filter(end_date__gte=today).order_by('start_date')
         serializer = self.get_serializer(upcoming, many=True)
         return Response(serializer.data)
 
 
+class IssuingOfficeViewSet(NearbyMixin, CachedReadOnlyModelViewSet):
+    """
+    API endpoints for viewing permit issuing offices.
+    """
+    queryset = IssuingOffice.objects.all()
+    serializer_class = IssuingOfficeSerializer
+    filter_backends = [filters.SearchFilter]
+    search_fields = ['name', 'address']
+    ordering = ('name', 'id')
+
+
 class TrailStatusViewSet(CachedReadOnlyModelViewSet):
     """
     API endpoints for viewing trail status information.
+    `/trails/alerts/` is served by the async `trail_alerts` view.
     """
     queryset = TrailStatus.objects.all()
+    prefetch_related_fields = ('conditions', 'conditions__alerts')
     serializer_class = TrailStatusSerializer
     filter_backends = [DjangoFilterBackend, filters.SearchFilter]
     filterset_fields = ['region', 'status']
     search_fields = ['name']
-    
-    @action(detail=False)
-    def alerts(self, request):
-        """Get trails with alerts"""
-        trails_with_alerts = TrailStatusService.get_trails_with_alerts()
-        serializer = self.get_serializer(trails_with_alerts, many=True)
-        return Response(serializer.data)
+    ordering = ('-created_at', '-id')
 
 
 class WeatherDataViewSet(CachedReadOnlyModelViewSet):
     """
     API endpoints for viewing current weather data.
+    `/weather/latest/` and `/weather/mountain/` are served by the async
+    `weather_latest` and `weather_mountain` views.
     """
     queryset = WeatherData.objects.all()
     serializer_class = WeatherDataSerializer
     filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
     filterset_fields = ['location']
     ordering_fields = ['timestamp']
+    ordering = ('-timestamp', '-id')
     
-    @action(detail=False)
-    def latest(self, request):
-        """Get latest weather data for a location"""
-        location = request.query_params.get('location')
-        weather_data = WeatherService.get_current_weather(location)
-        if weather_data:
-            serializer = self.get_serializer(weather_data)
-            return Response(serializer.data)
-        return Response({"error": f"No weather data found for {location}"}, status=404)
+    history_max_buckets = 2000
+    history_bucket_hours = {'hour': 1, 'day': 24, 'week': 24 * 7}
     
     @action(detail=False)
-    def mountain(self, request):
-        """Get weather adjusted for mountain elevations"""
+    def history(self, request):
+        """
+        Get historical weather for a location aggregated per `interval`
+        (hour, day or week) between `start` and `end` (ISO dates or datetimes,
+        default: the last 7 days, widened to whole buckets), with min/max/avg
+        temperature, total precipitation and max wind speed per bucket
+        """
         location = request.query_params.get('location')
-        elevation = request.query_params.get('elevation')
+        if not location:
+            return Response({"error": "Location parameter is required"}, status=400)
+        
+        interval = request.query_params.get('interval', 'day')
+        if interval not in HISTORY_INTERVALS:
+            return Response({"error": f"'interval' must be one of {', '.join(HISTORY_INTERVALS)}"}, status=400)
         
-        if not location or not elevation:
+        start = _parse_history_bound(request.query_params.get('start'))
+        end = _parse_history_bound(request.query_params.get('end'))
+        if start is False or end is False:
+            return Response({"error": "'start' and 'end' must be ISO dates or datetimes"}, status=400)
+        end = end or timezone.now()
+        start = start or end - timedelta(days=7)
+        if start >= end:
+            return Response({"error": "'start' must be before 'end'"}, status=400)
+        # Whole buckets only, so the default "until now" range is cached per bucket
+        start, end = WeatherHistoryService.bucket_range(interval, start, end)
+        if (end - start) / timedelta(hours=self.history_bucket_hours[interval]) > self.history_max_buckets:
             return Response({
-                "error": "Both 'location' and 'elevation' parameters are required"
+                "error": f"At most {self.history_max_buckets} {interval} buckets per request"
             }, status=400)
         
-        try:
-            elevation = int(elevation)
-            mountain_weather = WeatherService.get_mountain_weather(location, elevation)
-            
-            if not mountain_weather:
-                return Response({
-                    "error": f"Could not retrieve weather for {location}"
-                }, status=404)
-                
-            serializer = self.get_serializer(mountain_weather)
-            return Response(serializer.data)
-        except ValueError:
+        return Response({
+            'location': location,
+            'interval': interval,
+            'start': start,
+            'end': end,
+            'buckets': WeatherHistoryService.get_history(location, interval, start, end),
+        })
+    
+    batch_max_locations = 50
+
+    @action(detail=False)
+    def batch(self, request):
+        """
+        Get latest weather for many locations in one call, keyed by location:
+        `?locations=Kathmandu,Pokhara,Lukla`, optionally with a matching
+        `&elevations=1400,,2860` for the mountain adjustment (blank = none)
+        """
+        locations = [location.strip() for location in request.query_params.get('locations', '').split(',')]
+        if not any(locations):
+            return Response({"error": "'locations' parameter is required"}, status=400)
+        if len(locations) > self.batch_max_locations:
             return Response({
-                "error": "Elevation must be a valid integer"
+                "error": f"At most {self.batch_max_locations} locations per request"
             }, status=400)
+        
+        elevations = request.query_params.get('elevations')
+        if elevations is None:
+            elevations = [None] * len(locations)
+        else:
+            elevations = [elevation.strip() for elevation in elevations.split(',')]
+            if len(elevations) != len(locations):
+                return Response({"error": "'elevations' must have one entry per location"}, status=400)
+            try:
+                elevations = [int(elevation) if elevation else None for elevation in elevations]
+            except ValueError:
+                return Response({"error": "Elevations must be valid integers"}, status=400)
+        
+        requested = [(location, elevation) for location, elevation in zip(locations, elevations) if location]
+        weather_by_location = WeatherService.get_current_weather_batch([location for location, _ in requested])
+        
+        results = {}
+        for location, elevation in requested:
+            weather = weather_by_location[location]
+            if weather and elevation is not None:
+                weather = WeatherService.adjust_for_elevation(weather, location, elevation)
+            results[location] = self.get_serializer(weather).data if weather else None
+        return Response(results)
 
 
 class WeatherForecastViewSet(CachedReadOnlyModelViewSet):
     """
     API endpoints for viewing weather forecasts.
+    `/forecasts/for_location/` is served by the async `forecast_for_location` view.
     """
     queryset = WeatherForecast.objects.all()
     serializer_class = WeatherForecastSerializer
     filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
     filterset_fields = ['location', 'date']
     ordering_fields = ['date']
-    
-    @action(detail=False)
-    def for_location(self, request):
-        """Get weather forecast for a specified location"""
-        location = request.query_params.get('location')
-        if not location:
-            return Response({"error": "Location parameter is required"}, status=400)
-        
-        from django.utils import timezone
-        today = timezone.now().date()
-        
-        # Get 7-day forecast
-        forecasts = WeatherForecast.objects.filter(
-            location=location,
-            date__gte=today
-        ).order_by('date')[:7]
-        
-        serializer = self.get_serializer(forecasts, many=True)
-        return Response(serializer.data)
+    ordering = ('date', 'id')
 
 
 class TourismStatViewSet(CachedReadOnlyModelViewSet):
@@ -491,15 +926,17 @@ class TourismStatViewSet(CachedReadOnlyModelViewSet):
     API endpoints for viewing tourism statistics.
     """
     queryset = TourismStat.objects.all()
+    prefetch_related_fields = ('nationality_breakdown', 'purpose_breakdown')
     serializer_class = TourismStatSerializer
     filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
     filterset_fields = ['year', 'month']
     ordering_fields = ['year', 'month']
+    ordering = ('-year', '-id')
     
     @action(detail=False)
     def annual(self, request):
         """Get annual statistics (no monthly breakdown)"""
-        annual_stats = self.queryset.filter(month__isnull=True).order_by('-year')
+        annual_stats = self.get_queryset().filter(month__isnull=True).order_by('-year')
         serializer = self.get_serializer(annual_stats, many=True)
         return Response(serializer.data)
     
@@ -512,7 +949,7 @@ class TourismStatViewSet(CachedReadOnlyModelViewSet):
         
         try:
             year_int = int(year)
-            monthly_stats = self.queryset.filter(
+            monthly_stats = self.get_queryset().filter(
                 year=year_int, 
                 month__isnull=False
             ).order_by('month')
@@ -520,6 +957,117 @@ class TourismStatViewSet(CachedReadOnlyModelViewSet):
             return Response(serializer.data)
         except ValueError:
             return Response({"error": "Year must be a valid integer"}, status=400)
+    
+    def _analytics_years(self, request):
+        """Optional inclusive `start_year`/`end_year` bounds of an analytics series"""
+        years = []
+        for param in ('start_year', 'end_year'):
+            value = request.query_params.get(param)
+            years.append(int(value) if value else None)
+        return years
+    
+    @action(detail=False, url_path='analytics/monthly-arrivals')
+    def monthly_arrivals(self, request):
+        """Arrivals per month across years, as columns: year, month, arrivals"""
+        try:
+            start_year, end_year = self._analytics_years(request)
+        except ValueError:
+            return Response({"error": "'start_year' and 'end_year' must be valid integers"}, status=400)
+        return Response(TourismAnalyticsService.get_monthly_arrivals(start_year, end_year))
+    
+    @action(detail=False, url_path='analytics/year-over-year')
+    def year_over_year(self, request):
+        """Arrivals per year with the change from the previous year, as columns"""
+        try:
+            start_year, end_year = self._analytics_years(request)
+        except ValueError:
+            return Response({"error": "'start_year' and 'end_year' must be valid integers"}, status=400)
+        return Response(TourismAnalyticsService.get_year_over_year(start_year, end_year))
+    
+    @action(detail=False, url_path='analytics/top-nationalities')
+    def top_nationalities(self, request):
+        """The `limit` (default 10) nationalities with most arrivals over a range of years, as columns"""
+        try:
+            start_year, end_year = self._analytics_years(request)
+            limit = int(request.query_params.get('limit', TOP_NATIONALITIES_LIMIT))
+        except ValueError:
+            return Response({"error": "'start_year', 'end_year' and 'limit' must be valid integers"}, status=400)
+        if not 1 <= limit <= 100:
+            return Response({"error": "'limit' must be between 1 and 100"}, status=400)
+        return Response(TourismAnalyticsService.get_top_nationalities(start_year, end_year, limit))
+
+
+# Async read endpoints. They may wait on the external weather API, so they
+# run on the event loop under ASGI (config/asgi.py) instead of holding a
+# worker thread; api.urls routes them ahead of the viewsets.
+
+def _api_response(data, status=200):
+    """Render like the API's JSON responses outside DRF"""
+    return HttpResponse(FastJSONRenderer().render(data), status=status, content_type='application/json')
+
+
+@require_GET
+async def weather_latest(request, version=None):
+    """Get latest weather data for a location"""
+    location = request.GET.get('location')
+    weather_data = await WeatherService.aget_current_weather(location)
+    if weather_data:
+        return _api_response(WeatherDataSerializer(weather_data, context={'request': request}).data)
+    return _api_response({"error": f"No weather data found for {location}"}, status=404)
+
+
+@require_GET
+async def weather_mountain(request, version=None):
+    """Get weather adjusted for mountain elevations"""
+    location = request.GET.get('location')
+    elevation = request.GET.get('elevation')
+    
+    if not location or not elevation:
+        return _api_response({
+            "error": "Both 'location' and 'elevation' parameters are required"
+        }, status=400)
+    
+    try:
+        elevation = int(elevation)
+    except ValueError:
+        return _api_response({
+            "error": "Elevation must be a valid integer"
+        }, status=400)
+    
+    mountain_weather = await WeatherService.aget_mountain_weather(location, elevation)
+    if not mountain_weather:
+        return _api_response({
+            "error": f"Could not retrieve weather for {location}"
+        }, status=404)
+    
+    return _api_response(WeatherDataSerializer(mountain_weather, context={'request': request}).data)
+
+
+@require_GET
+async def forecast_for_location(request, version=None):
+    """Get weather forecast for a specified location"""
+    location = request.GET.get('location')
+    if not location:
+        return _api_response({"error": "Location parameter is required"}, status=400)
+    
+    today = timezone.now().date()
+    
+    # Get 7-day forecast
+    forecasts = [
+        forecast async for forecast in WeatherForecast.objects.filter(
+            location=location,
+            date__gte=today
+        ).order_by('date')[:7]
+    ]
+    
+    return _api_response(WeatherForecastSerializer(forecasts, many=True, context={'request': request}).data)
+
+
+@require_GET
+async def trail_alerts(request, version=None):
+    """Get trails with alerts"""
+    trails_with_alerts = await TrailStatusService.aget_trails_with_alerts()
+    return _api_response(TrailStatusSerializer(trails_with_alerts, many=True, context={'request': request}).data)
         
 
 
@@ -583,6 +1131,7 @@ def revoke_api_key(request, key):
             # Deactivate the key instead of deleting it
             api_key.is_active = False
             api_key.save()
+            APIKeyService.invalidate(api_key.key)
             
             messages.success(request, f"API key '{api_key.name}' has been revoked")
         
@@ -38,6 +38,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework',
     'api',
     'django_filters',
@@ -51,6 +52,7 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'api.middlewares.rate_limiting.APIKeyMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -143,16 +145,47 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 # weather api key
 WEATHER_API_KEY = '14e5aeb61d364b92af835919250705'
-
-
-
-# Simple memory cache for development
+WEATHER_API_BASE_URL = 'https://api.weatherapi.com/v1'
+# Bulk refresh (update_weather): concurrent requests and requests/second per host
+WEATHER_REFRESH_CONCURRENCY = 8
+WEATHER_API_RATE_LIMIT = 10
+
+# WeatherData monthly partitions (see manage_weather_partitions)
+WEATHER_PARTITIONS_AHEAD = 3
+WEATHER_RAW_RETENTION_MONTHS = 12
+
+# Background jobs, run by `manage.py run_jobs` workers (see JobService).
+# Password reset emails and stale weather refreshes are sent through them,
+# so at least one worker must be running.
+JOB_MAX_ATTEMPTS = 5
+JOB_RETRY_BACKOFF = 30  # seconds before the first retry, doubled for each further one
+JOB_RETRY_BACKOFF_MAX = 60 * 60
+JOB_RETENTION_DAYS = 7
+# Periodic jobs (replacing cron invocations of update_weather) are listed in
+# api.services.jobs.JOB_SCHEDULE; set JOB_SCHEDULE here only to replace them
+
+# Destination recommendations: precomputed top-K similarity index
+RECOMMENDATION_INDEX_PATH = BASE_DIR / 'var' / 'destination_similarity.npz'
+RECOMMENDATION_TOP_K = 20
+RECOMMENDATION_REBUILD_DELAY = 60  # seconds of destination edits batched into one queued rebuild
+
+# Tourism statistic edits within this many seconds share one queued rollup refresh
+TOURISM_ROLLUP_REFRESH_DELAY = 30
+
+
+
+# Versioned list/detail response cache (see CacheVersionService)
+API_RESPONSE_CACHE_DURATION = 60 * 60 * 6
+# Build /destinations/ and /lodgings/ list pages from .values() rows (see api.serializers.fast)
+API_FAST_SERIALIZATION = True
+
+# The cache must be shared by every web and run_jobs process: cache versions,
+# refreshed weather and revoked API keys are written by one process and must
+# be seen by all of them (a per-process LocMemCache would serve stale data)
 CACHES = {
     "default": {
-        # "BACKEND": "django_redis.cache.RedisCache",
-        # "LOCATION": "redis://127.0.0.1:6379/1",
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-        'LOCATION': 'nepal-tourism-cache',
+        "BACKEND": "django_redis.cache.RedisCache",
+        "LOCATION": "redis://127.0.0.1:6379/1",
         "OPTIONS": {
             "CLIENT_CLASS": "django_redis.client.DefaultClient",
         }
@@ -160,6 +193,19 @@ CACHES = {
 }
 
 
+# Shared backend for the API key rate limiter. Leaving it unset counts per
+# process (each worker then allows the full quota), which api.checks only
+# accepts with DEBUG on
+RATE_LIMIT_REDIS_URL = "redis://127.0.0.1:6379/2"
+
+# API key lookups are cached per process for this many seconds, and
+# last_used timestamps are written back in batches at this interval
+API_KEY_LOCAL_CACHE_DURATION = 10
+API_KEY_LAST_USED_FLUSH_INTERVAL = 30
+# Seconds between roll-ups of in-memory API usage counters into APIUsage rows
+API_USAGE_FLUSH_INTERVAL = 60
+
+
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
         'rest_framework_simplejwt.authentication.JWTAuthentication',
@@ -173,6 +219,9 @@ REST_FRAMEWORK = {
     'ALLOWED_VERSIONS': ['v1', 'v2'],
     'VERSION_PARAM': 'version',
 
+    'DEFAULT_PAGINATION_CLASS': 'api.pagination.KeysetCursorPagination',
+    'PAGE_SIZE': 50,
+
     'DEFAULT_THROTTLE_CLASSES': [
         'rest_framework.throttling.AnonRateThrottle',
         'rest_framework.throttling.UserRateThrottle'